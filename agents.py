@@ -1,46 +1,125 @@
-from langchain_community.chat_models import ChatOpenAI
+from metrics import instrument
+import model_router
+from question_index import QuestionIndex
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, BaseMessage
 import os
 import re
 
+# Answers this short (in words) count as short answers
+SHORT_ANSWER_WORDS = 3
+
+# Phrases that mean the interviewee is struggling or wants to change topic
+STRUGGLE_SIGNALS = (
+    'i dont know', 'not sure', 'confused', 'dont understand',
+    'what do you mean', '??', 'why', 'can we move on',
+    'different topic', 'next question'
+)
+
+# Word signals match whole words only, not inside longer words; "??" matches anywhere
+_STRUGGLE_PATTERN = re.compile('|'.join(
+    re.escape(signal) if not signal[0].isalnum() else r'\b' + re.escape(signal) + r'\b'
+    for signal in STRUGGLE_SIGNALS
+))
+
+# Extra attempts when the model repeats an earlier question
+MAX_REGENERATIONS = int(os.getenv('QUESTION_MAX_REGENERATIONS', '1'))
+
+def is_short_answer(user_message: str) -> bool:
+    return len(user_message.split()) <= SHORT_ANSWER_WORDS
+
+def is_struggling(user_message: str) -> bool:
+    # Signals are written without apostrophes, so "don't" matches "dont"
+    text = user_message.lower().replace("'", "").replace("\u2019", "")
+    return _STRUGGLE_PATTERN.search(text) is not None
+
 class InterviewAgent:
     def __init__(self, name: str, role: str):
         self.name = name
         self.role = role
-        self.llm = ChatOpenAI(
-            temperature=0.7,
-            model_name="gpt-3.5-turbo",
-            openai_api_key=os.getenv('OPENAI_API_KEY')
-        )
+        self.llm = instrument(model_router.get_routed_model('interviewer'), name)
         self.conversation_state = {
             'current_topic': None,
             'attempted_topics': set(),
             'failed_topics': set(),
-            'asked_questions': set(),
             'short_answer_count': 0,
             'topic_attempt_count': 0
         }
+        # Every question asked so far; only the most recent few go into prompts
+        self.asked_questions = QuestionIndex.from_env()
+        self.regenerations = 0
+
+    def state(self) -> dict:
+        """JSON-able conversation state; topic sets are saved as sorted lists."""
+        conversation = dict(self.conversation_state)
+        for name in ('attempted_topics', 'failed_topics'):
+            conversation[name] = sorted(conversation[name])
+        return {
+            'conversation': conversation,
+            'asked_questions': self.asked_questions.state(),
+            'regenerations': self.regenerations,
+        }
+
+    def restore(self, state: dict):
+        conversation = dict(state['conversation'])
+        for name in ('attempted_topics', 'failed_topics'):
+            conversation[name] = set(conversation[name])
+        self.conversation_state = conversation
+        self.asked_questions.restore(state['asked_questions'])
+        self.regenerations = state['regenerations']
 
     def generate_response(self, user_message: str, context: dict) -> str:
+        messages = self._prepare_messages(user_message, context)
+        content = self.llm.invoke(messages).content
+        for _ in range(MAX_REGENERATIONS):
+            retry = self._regeneration_messages(messages, content)
+            if retry is None:
+                break
+            content = self.llm.invoke(retry).content
+        return self._record_response(content)
+
+    async def agenerate_response(self, user_message: str, context: dict) -> str:
+        messages = self._prepare_messages(user_message, context)
+        content = (await self.llm.ainvoke(messages)).content
+        for _ in range(MAX_REGENERATIONS):
+            retry = self._regeneration_messages(messages, content)
+            if retry is None:
+                break
+            content = (await self.llm.ainvoke(retry)).content
+        return self._record_response(content)
+
+    def _regeneration_messages(self, messages: list, content: str) -> list:
+        """Messages asking for a new question when ``content`` repeats an earlier one, else None."""
+        question = self._extract_question(content)
+        duplicate = self.asked_questions.find_duplicate(question) if question else None
+        if duplicate is None:
+            return None
+        self.regenerations += 1
+        model_router.record_quality('repeated_question')
+        return messages + [
+            AIMessage(content=content),
+            HumanMessage(content=f'That question repeats one already asked: "{duplicate[0]}". '
+                                 'Ask something different, on a topic not covered yet.')
+        ]
+
+    def _prepare_messages(self, user_message: str, context: dict) -> list:
         # Update conversation state based on user message
         self._update_state(user_message)
         
         system_message = self._get_system_prompt()
         user_context = self._format_context(user_message, context)
         
-        messages = [
+        return [
             system_message,
             HumanMessage(content=user_context)
         ]
-        
-        response = self.llm.invoke(messages)
-        
+
+    def _record_response(self, content: str) -> str:
         # Store the question to avoid repetition
-        question = self._extract_question(response.content)
+        question = self._extract_question(content)
         if question:
-            self.conversation_state['asked_questions'].add(question.lower())
+            self.asked_questions.add(question)
         
-        return response.content
+        return content
 
     def _extract_question(self, text: str) -> str:
         """Extract the main question from the response."""
@@ -52,25 +131,13 @@ class InterviewAgent:
 
     def _update_state(self, user_message: str):
         # Detect short or struggling answers
-        words = user_message.split()
-        is_short_answer = len(words) <= 3
-        
-        if is_short_answer:
+        if is_short_answer(user_message):
             self.conversation_state['short_answer_count'] += 1
         else:
             self.conversation_state['short_answer_count'] = 0
 
-        # Detect struggle signals
-        struggle_signals = [
-            'i dont know', 'not sure', 'confused', 'dont understand',
-            'what do you mean', '??', 'why', 'can we move on', 
-            'different topic', 'next question'
-        ]
-        
-        is_struggling = any(signal in user_message.lower() for signal in struggle_signals)
-        
         # Handle topic changes
-        if is_struggling or self.conversation_state['short_answer_count'] >= 2:
+        if is_struggling(user_message) or self.conversation_state['short_answer_count'] >= 2:
             if self.conversation_state['current_topic']:
                 self.conversation_state['failed_topics'].add(
                     self.conversation_state['current_topic']
@@ -102,7 +169,7 @@ CONVERSATION RULES:
 1. If user gives short answers twice in a row -> Change topic
 2. If user struggles with a topic 3 times -> Abandon that topic completely
 3. Never ask about topics marked as failed: {self.conversation_state['failed_topics']}
-4. Never repeat these previous questions: {self.conversation_state['asked_questions']}
+4. Never repeat previous questions, such as these recent ones: {self.asked_questions.recent()}
 
 SIGNS TO CHANGE TOPIC:
 - Short answers (1-3 words)
@@ -131,7 +198,7 @@ Additional Info: {context.get('additional_context', '')}
 User's message: {user_message}
 
 Remember:
-1. Never repeat any of these questions: {self.conversation_state['asked_questions']}
+1. Never repeat previous questions ({len(self.asked_questions)} asked so far)
 2. Never return to these failed topics: {self.conversation_state['failed_topics']}
 3. If user is struggling, immediately switch to a new topic
 4. Keep responses natural and conversational
@@ -143,9 +210,29 @@ class InterviewManager:
         self.agent = InterviewAgent("Interviewer", "Empathetic Conversation Partner")
         self.conversation_history = []
 
+    def to_state(self) -> dict:
+        return {
+            'context': self.context,
+            'history': self.conversation_history,
+            'agent': self.agent.state(),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "InterviewManager":
+        manager = cls(state['context'])
+        manager.conversation_history = state['history']
+        manager.agent.restore(state['agent'])
+        return manager
+
     def chat(self, user_message: str) -> str:
         response = self.agent.generate_response(user_message, self.context)
-        
+        return self._record_turn(user_message, response)
+
+    async def achat(self, user_message: str) -> str:
+        response = await self.agent.agenerate_response(user_message, self.context)
+        return self._record_turn(user_message, response)
+
+    def _record_turn(self, user_message: str, response: str) -> str:
         self.conversation_history.append({
             'user': user_message,
             'agent': response
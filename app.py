@@ -1,14 +1,33 @@
-from flask import Flask, request, jsonify, session
+from flask import Flask, Response, g, request, jsonify, session, stream_with_context
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 from langchain_community.chat_models import ChatOpenAI
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, BaseMessage
 from planning_agent import PlanningAgent
+from discussion import GroupDiscussion
+from discussion_store import SharedDiscussions
+from plan_cache import PlanCache
+import collectors
+import llm_calls
+import metrics
+import tracing
+from server_session import ServerSideSessionInterface
+from session_registry import SessionRegistry
+from session_store import SessionStore
+from idempotency import IdempotencyCache, IdempotencyConflict, fingerprint
+from llm_calls import DeadlineExceeded
+from session_usage import BudgetExceeded
+from transcript_store import TranscriptStore
+from transcription import MAX_UPLOAD_BYTES, QueueFull, TranscriptionQueue, UploadRequest, get_transcriber
+import json
 import os
+import uuid
 from dotenv import load_dotenv
 import openai
+import time
 import traceback
 
 # Load environment variables
@@ -20,301 +39,72 @@ if not openai.api_key:
     raise ValueError("No OpenAI API key found. Please set OPENAI_API_KEY in .env file")
 
 app = Flask(__name__)
+app.request_class = UploadRequest
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
 CORS(app, supports_credentials=True)
-app.secret_key = os.urandom(24)
-
-class ResearchAgent:
-    def __init__(self, name: str, role: str, description: str):
-        self.name = name
-        self.role = role
-        self.description = description
-        self.llm = ChatOpenAI(
-            temperature=0.7,
-            model_name="gpt-3.5-turbo",
-            openai_api_key=os.getenv('OPENAI_API_KEY')
-        )
-        
-    def generate_response(self, messages: list[BaseMessage]) -> str:
-        messages = [
-            SystemMessage(content=f"""You are {self.name}, {self.role}. {self.description}
-            When responding, always stay in character and prefix your response with your name in brackets, e.g. [{self.name}]: """),
-            *messages
-        ]
-        response = self.llm.invoke(messages)
-        return f"[{self.name}]: {response.content}"
-
-class GroupDiscussion:
-    def __init__(self, context: dict, plan: dict = None):
-        self.context = context
-        self.plan = plan
-        self.agents = [
-            ResearchAgent(
-                "Lead Interviewer",
-                "Expert Research Interviewer",
-                """Your role is to conduct unbiased, methodologically sound interviews.
-                
-                CORE PRINCIPLES:
-                1. Never make assumptions
-                2. Always establish context first
-                3. One question at a time
-                4. Listen and acknowledge before proceeding
-                5. Never repeat failed questions
-                6. Read emotional signals
-                7. Match the user's tone
-                
-                CONVERSATION STRUCTURE:
-                1. Active Listening
-                   - Always acknowledge new information
-                   - Build on what they just said
-                   - Match their level of formality
-                
-                2. Natural Flow
-                   - Follow their conversational direction
-                   - Don't abruptly change topics
-                   - If they raise a new point, explore it
-                   - Know when to move on from a topic
-                
-                3. Handle Responses
-                   - If confused → Rephrase differently
-                   - If frustrated → Simplify and acknowledge
-                   - If emotional → Match tone and validate
-                   - If done with topic → Move on completely
-                
-                EMOTIONAL INTELLIGENCE:
-                1. Recognize Stop Signals
-                   - "that's the same thing" → Rephrase completely
-                   - "weird question" → Explain and simplify
-                   - "this shit is broken" → Change approach
-                   - Strong language → Match informal tone
-                
-                2. Response Patterns
-                   Too Formal: "How do machine breakdowns impact your job satisfaction?"
-                   Better: "That sounds frustrating. What else bugs you about the job?"
-                   
-                   Too Formal: "Let's refocus on understanding what you don't like..."
-                   Better: "Got it - machines and boss are issues. Anything else?"
-                   
-                   Too Formal: "Can you elaborate on the challenges you face?"
-                   Better: "What makes that hard to deal with?"
-                
-                EXAMPLE FLOWS:
-                
-                Good (Technical):
-                Human: "I've taken entrepreneurship classes for software and hardware"
-                Assistant: "You mentioned both software and hardware. Which interests you more?"
-                Human: "Mostly software"
-                Assistant: "What aspects of software entrepreneurship have you found most valuable?"
-                
-                Good (Emotional):
-                Human: "I hate our boss - he sucks"
-                Assistant: "Sounds rough. What makes him so bad?"
-                Human: "Always looking over my shoulder"
-                Assistant: "That would drive me crazy too. What else bugs you?"
-                
-                Bad (Ignoring Signals):
-                Human: "this shit is broken"
-                Assistant: "Let's refocus on understanding what aspects..."
-                Human: "are you just gonna keep asking me?"
-                Assistant: *repeats same formal question*
-                
-                RECOVERY STRATEGIES:
-                1. From Confusion
-                   - Acknowledge: "I see my question wasn't clear"
-                   - Explain: "I was trying to understand..."
-                   - Rephrase: "Let me ask this differently..."
-                
-                2. From Frustration
-                   - Drop formality: "Let me back up..."
-                   - Validate: "Yeah, that sounds really frustrating"
-                   - Simplify: "What else bugs you?"
-                
-                3. From Repetition
-                   - Change approach completely
-                   - Ask about a different aspect
-                   - Let them lead the direction
-                
-                TOPIC TRANSITIONS:
-                1. Acknowledge current topic
-                2. Explain why you're shifting
-                3. Make the connection clear
-                4. Get permission: "Would you mind if we discussed...?"
-                
-                WHEN TO ADAPT:
-                - Match formality to user's style
-                - If they're frustrated → Be more casual
-                - If they're technical → Be more precise
-                - If they're emotional → Be more empathetic
-                """
-            ),
-            ResearchAgent(
-                "Completeness Analyst",
-                "Research Methodology Expert",
-                """Your role is to ensure methodological rigor and completeness in data collection.
-                
-                ANALYSIS FRAMEWORK:
-                1. Coverage Check
-                   - Are all research goals being addressed?
-                   - Are responses complete for each topic?
-                   - Are assumptions being validated?
-                
-                2. Depth Assessment
-                   - Is the detail level sufficient?
-                   - Are examples concrete enough?
-                   - Are contexts fully explained?
-                
-                3. Clarity Verification
-                   - Are terms clearly defined?
-                   - Are experiences specific rather than general?
-                   - Are comparisons and contrasts clear?
-                
-                4. Bias Detection
-                   - Watch for leading questions
-                   - Identify unstated assumptions
-                   - Flag loaded language
-                
-                5. Methodological Gaps
-                   - Time frames not specified
-                   - Missing contextual factors
-                   - Undefined comparisons
-                
-                Suggest follow-ups that:
-                - Use neutral language
-                - Seek specific examples
-                - Clarify without leading
-                - Validate understanding
-                """
-            ),
-            ResearchAgent(
-                "Depth Explorer",
-                "Qualitative Research Specialist",
-                """Your role is to enhance the depth and quality of insights while maintaining research integrity.
-                
-                EXPLORATION FRAMEWORK:
-                1. Pattern Recognition
-                   - Look for emerging themes
-                   - Identify connecting threads
-                   - Note potential relationships
-                
-                2. Context Enrichment
-                   - Environmental factors
-                   - Situational influences
-                   - Historical context
-                
-                3. Causal Understanding
-                   - Explore decision processes
-                   - Uncover motivations
-                   - Trace impact chains
-                
-                4. Perspective Expansion
-                   - Different stakeholders 
-                   - Various timeframes
-                   - Multiple scenarios
-                
-                QUESTION TECHNIQUES:
-                1. Critical Incident
-                   - "Could you describe a specific time when..."
-                   - "What exactly happened when..."
-                
-                2. Contrast Probes
-                   - "How does this compare to..."
-                   - "What makes this different from..."
-                
-                3. Process Tracing
-                   - "Walk me through..."
-                   - "What led to..."
-                
-                Always maintain:
-                - Methodological rigor
-                - Neutral language
-                - Open exploration
-                - Respect for participant's perspective
-                """
-            )
-        ]
-        self.discussion_history = []
-        
-    def discuss(self, user_message: str) -> str:
-        # Create the discussion context
-        plan_context = ""
-        if self.plan:
-            plan_context = f"""
-            Interview Type: {self.plan.get('plan').interview_type}
-            Key Topics: {', '.join(self.plan.get('plan').key_topics)}
-            Communication Style: {self.plan.get('plan').communication_style}
-            Special Considerations: {', '.join(self.plan.get('plan').special_considerations)}
-            """
-
-        discussion_prompt = HumanMessage(content=f"""
-        Interview Context:
-        {self.context['context']}
-        
-        Interview Goals:
-        {self.context['goals']}
-        
-        Additional Context:
-        {self.context['additional_context']}
-        
-        Interview Plan:
-        {plan_context}
-        
-        Current User Response:
-        {user_message}
-        
-        Previous Discussion:
-        {self._format_discussion_history()}
-        
-        Analyze the current state:
-        1. Lead Interviewer: 
-           - Assess if we're still aligned with our goals and key topics
-           - Generate a focused follow-up question (max 15 words)
-           - If off-topic, redirect back to relevant goals
-           - Follow the planned communication style
-        2. Completeness Analyst: Identify information gaps in key topics
-        3. Depth Explorer: Suggest areas for deeper exploration within current topic
-        
-        Choose the most appropriate next question based on the combined analysis.
-        Prioritize staying on track with our interview goals and plan.
-        
-        IMPORTANT: Start your response directly with the question or statement.
-        Do not use any prefixes, labels, or colons.
-        """)
-        
-        # Have each agent contribute to the discussion
-        agent_responses = []
-        for agent in self.agents:
-            messages = [discussion_prompt]
-            if agent_responses:
-                messages.extend([AIMessage(content=resp) for resp in agent_responses])
-            response = agent.generate_response(messages)
-            # Clean up the response
-            if ']' in response:
-                response = response.split(']', 1)[1].strip()
-            if response.startswith(':'):
-                response = response[1:].strip()
-            agent_responses.append(response)
-        
-        # Store the discussion
-        self.discussion_history.append({
-            'user_message': user_message,
-            'agent_responses': agent_responses
-        })
-        
-        # Return just the lead response without any prefix
-        return agent_responses[0]
-        
-    def _format_discussion_history(self) -> str:
-        if not self.discussion_history:
-            return "No previous discussion"
-            
-        history = []
-        for entry in self.discussion_history[-3:]:  # Show last 3 discussions
-            history.append(f"User: {entry['user_message']}")
-            for response in entry['agent_responses']:
-                history.append(response)
-        return "\n".join(history)
+# Must be the same on every worker for a session cookie to be accepted by all of them
+app.secret_key = os.getenv('SECRET_KEY')
+if not app.secret_key:
+    print("SECRET_KEY is not set; using a random key, so sessions only work on this worker until it restarts")
+    app.secret_key = os.urandom(24)
+
+# Session data and discussion state, shared by every worker; the cookie holds only a signed id
+session_store = SessionStore.from_env()
+app.session_interface = ServerSideSessionInterface(session_store)
+
+# Live GroupDiscussion objects, keyed by the session id stored in the session,
+# cached per worker and reloaded from the session store when another worker moved them on
+discussions = SharedDiscussions(SessionRegistry.from_env(), session_store)
+
+# Planning results shared by interviews with identical setup inputs
+plan_cache = PlanCache.from_env()
+
+# Chat turns by idempotency key, so a retried or double-sent message runs once on whichever worker it reaches
+chat_turns = IdempotencyCache.from_env(session_store)
+
+# Durable record of every turn, written in batches off the request path
+transcripts = TranscriptStore.from_env()
+
+transcriber = get_transcriber()
+# Job status lives in the shared store, so a job can be polled on any worker
+transcription_queue = TranscriptionQueue.from_env(session_store)
+
+# Stats that already live on these objects are read when /metrics is scraped
+collectors.register(discussions, session_store, plan_cache, chat_turns, transcripts, transcription_queue)
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    metrics.http_in_flight.inc()
+    g.trace = tracing.start_trace(f"{request.method} {request.path}")
+    g.profile = tracing.start_profile()
+
+@app.after_request
+def record_request_metrics(response):
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    method, start = request.method, g.request_start
+    g.status = response.status_code
 
-# Initialize group discussion as None
-group_discussion = None
+    def observe():
+        metrics.observe_request(route, method, response.status_code, time.perf_counter() - start)
+
+    # Streamed responses are timed until the last event has been sent
+    if response.is_streamed:
+        response.call_on_close(observe)
+    else:
+        observe()
+    return response
+
+@app.teardown_request
+def finish_request(exc):
+    if 'request_start' not in g:
+        return
+    metrics.http_in_flight.dec()
+    # Streamed responses with stream_with_context are torn down after their last event
+    duration = time.perf_counter() - g.request_start
+    tracing.finish_profile(g.profile, request.path, duration, g.trace)
+    tracing.finish_trace(g.trace, route=request.url_rule.rule if request.url_rule else 'unmatched',
+                         status=g.get('status', 500), error=type(exc).__name__ if exc else None)
 
 # Define the conversation prompt template
 template = """
@@ -478,31 +268,34 @@ def initialize_interview():
             'additional_context': data.get('additional_context', '')
         }
         
-        # Create interview plan first
-        planning_agent = PlanningAgent()
-        plan = planning_agent.create_interview_plan(
-            context=context['context'],
-            background=context['background'],
-            goals=context['goals']
-        )
-        
-        # Initialize agents with the plan
-        agent_config = planning_agent.initialize_agents(plan)
+        with llm_calls.turn_budget():
+            # Plan the interview and initialize the agents in one call
+            planning_agent = PlanningAgent(cache=plan_cache)
+            agent_config = planning_agent.prepare_session(
+                context=context['context'],
+                background=context['background'],
+                goals=context['goals']
+            )
+            plan = agent_config['plan']
+            
+            group_discussion = GroupDiscussion(context, plan=agent_config)
+            
+            # Get initial question
+            initial_response = group_discussion.opening_question()
         
-        # Store in session
+        # Only a session with its opening question is registered and handed to the client
         session['interview_context'] = context
         session['interview_plan'] = vars(plan)  # Convert InterviewPlan to dict for session storage
-        
-        global group_discussion
-        group_discussion = GroupDiscussion(context, plan=agent_config)
-        
-        # Get initial question
-        initial_response = group_discussion.discuss(
-            "The interview is starting. What should be our opening question?"
-        )
+        session_id = uuid.uuid4().hex
+        session['session_id'] = session_id
+        discussions.put(session_id, group_discussion)
+        transcripts.record_session(session_id, context)
+        _store_last_turn(session_id, group_discussion)
         
         return jsonify({'message': initial_response})
         
+    except DeadlineExceeded as e:
+        return jsonify({'error': str(e)}), 504
     except Exception as e:
         print("Error in initialize_interview:", str(e))
         print("Traceback:", traceback.format_exc())
@@ -730,23 +523,161 @@ def interview():
 
 @app.route('/chat', methods=['POST'])
 def chat():
-    try:
-        if 'interview_context' not in session:
-            return jsonify({'error': 'Interview not initialized'}), 400
-            
-        data = request.get_json()
-        user_message = data.get('message', '')
+    if 'interview_context' not in session:
+        return jsonify({'error': 'Interview not initialized'}), 400
         
-        if not group_discussion:
-            return jsonify({'error': 'Interview not initialized'}), 400
-            
-        response = group_discussion.discuss(user_message)
-        return jsonify({'message': response})
+    data = request.get_json()
+    user_message = data.get('message', '')
+    
+    session_id = session.get('session_id', '')
+    with tracing.span('session_lookup'):
+        group_discussion = discussions.get(session_id)
+    if not group_discussion:
+        return jsonify({'error': 'Interview not initialized'}), 400
         
+    key = _idempotency_key(data)
+    if not key:
+        status, body = _chat_turn(session_id, group_discussion, user_message)
+        return jsonify(body), status
+    try:
+        # Duplicates of a turn wait for, or replay, the first request's result
+        (status, body), owner = chat_turns.run(
+            f"{session_id}:{key}", fingerprint(user_message),
+            lambda: _chat_turn(session_id, group_discussion, user_message),
+            keep=lambda result: result[0] == 200
+        )
+    except IdempotencyConflict as e:
+        return jsonify({'error': str(e)}), 422
+    return jsonify(body), status, {} if owner else {'Idempotent-Replayed': 'true'}
+
+def _chat_turn(session_id: str, group_discussion: GroupDiscussion, user_message: str) -> tuple[int, dict]:
+    try:
+        response = group_discussion.discuss(user_message)
+        _store_last_turn(session_id, group_discussion)
+        return 200, {'message': response}
+    except BudgetExceeded as e:
+        return 429, {'error': str(e), 'usage': group_discussion.usage.snapshot()}
+    except DeadlineExceeded as e:
+        return 504, {'error': str(e)}
     except Exception as e:
         print("Error in chat:", str(e))
         print("Traceback:", traceback.format_exc())
-        return jsonify({'error': str(e)}), 500
+        return 500, {'error': str(e)}
+
+def _idempotency_key(data: dict) -> str:
+    return request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+
+def _store_last_turn(session_id: str, group_discussion: GroupDiscussion):
+    turn_index = len(group_discussion.discussion_history) - 1
+    entry = group_discussion.discussion_history[turn_index]
+    transcripts.record_turn(
+        session_id, turn_index, entry['user_message'], entry['agent_responses'][0], entry['agent_responses']
+    )
+    discussions.save(session_id, group_discussion)
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    if 'interview_context' not in session:
+        return jsonify({'error': 'Interview not initialized'}), 400
+        
+    data = request.get_json()
+    user_message = data.get('message', '')
+    
+    session_id = session.get('session_id', '')
+    with tracing.span('session_lookup'):
+        group_discussion = discussions.get(session_id)
+    if not group_discussion:
+        return jsonify({'error': 'Interview not initialized'}), 400
+    if group_discussion.usage.refuses_turns():
+        return jsonify({'error': 'Session budget exhausted', 'usage': group_discussion.usage.snapshot()}), 429
+        
+    key = _idempotency_key(data)
+    turn, owner = None, True
+    if key:
+        key = f"{session_id}:{key}"
+        try:
+            turn, owner = chat_turns.claim(key, fingerprint(user_message))
+        except IdempotencyConflict as e:
+            return jsonify({'error': str(e)}), 422
+            
+    def release():
+        # Waiting duplicates must not hang when the turn does not complete
+        if key and owner and not turn.done():
+            chat_turns.fail(key, turn, RuntimeError("The original request for this message did not complete"))
+        
+    def generate():
+        try:
+            for event, payload in group_discussion.discuss_stream(user_message):
+                if event == 'done':
+                    _store_last_turn(session_id, group_discussion)
+                    if key:
+                        chat_turns.finish(key, turn, (200, {'message': payload['message']}))
+                yield _sse(event, payload)
+        except Exception as e:
+            print("Error in chat_stream:", str(e))
+            print("Traceback:", traceback.format_exc())
+            yield _sse('error', {'error': str(e)})
+        finally:
+            release()
+                
+    def replay():
+        # A duplicate of a turn in flight or just finished: send only the final message
+        try:
+            status, body = chat_turns.result(turn)
+        except Exception as e:
+            yield _sse('error', {'error': str(e)})
+            return
+        yield _sse('done' if status == 200 else 'error', body)
+            
+    response = Response(
+        stream_with_context(generate() if owner else replay()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no',
+                 **({} if owner else {'Idempotent-Replayed': 'true'})}
+    )
+    # Also runs when the client disconnects before the first event, when generate() never starts
+    response.call_on_close(release)
+    return response
+
+@app.route('/usage')
+def usage():
+    # Only the caller's own session; spend across sessions is aggregated on /metrics
+    group_discussion = discussions.get(session.get('session_id', ''))
+    if not group_discussion:
+        return jsonify({'error': 'Interview not found'}), 404
+    return jsonify(group_discussion.usage.snapshot())
+
+@app.route('/history')
+def history():
+    limit = _limit(20, 100)
+    before = request.args.get('before', type=float)
+    return jsonify(transcripts.list_sessions(limit=limit, before=before))
+
+@app.route('/history/search')
+def history_search():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Missing search query'}), 400
+    limit = _limit(20, 100)
+    before = request.args.get('before', type=int)
+    return jsonify(transcripts.search(query, limit=limit, before=before))
+
+@app.route('/history/<session_id>')
+def history_session(session_id):
+    limit = _limit(50, 200)
+    after = request.args.get('after', 0, type=int)
+    return jsonify(transcripts.list_turns(session_id, limit=limit, after=after))
+
+def _limit(default: int, cap: int) -> int:
+    """The request's ?limit=, or ``default`` when missing or not a number, clamped to [1, cap]."""
+    return max(1, min(request.args.get('limit', default, type=int), cap))
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
 @app.route('/transcribe', methods=['POST'])
 def transcribe_audio():
@@ -756,25 +687,50 @@ def transcribe_audio():
         
         audio_file = request.files['audio']
         
-        # Save the file temporarily
-        temp_path = 'temp_audio.wav'
-        audio_file.save(temp_path)
+        # The upload is already buffered per request; pass it straight through
+        text = transcriber(audio_file.stream, audio_file.filename or 'audio.wav', audio_file.mimetype)
         
-        # Open the file and transcribe
-        with open(temp_path, 'rb') as audio:
-            transcript = openai.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio
-            )
-        
-        # Clean up the temporary file
-        import os
-        os.remove(temp_path)
-        
-        return jsonify({'text': transcript.text})
+        return jsonify({'text': text})
+    except RequestEntityTooLarge:
+        raise
     except Exception as e:
         print(f"Error in transcription: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/transcribe/jobs', methods=['POST'])
+def submit_transcription():
+    try:
+        if 'audio' not in request.files:
+            return jsonify({'error': 'No audio file provided'}), 400
+            
+        audio_file = request.files['audio']
+        job = transcription_queue.submit(audio_file.stream, audio_file.filename or 'audio.wav', audio_file.mimetype)
+        
+        response = jsonify(job.to_dict())
+        response.headers['Location'] = f'/transcribe/jobs/{job.id}'
+        return response, 202
+    except QueueFull as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '2'
+        return response, 503
+    except RequestEntityTooLarge:
+        raise
+    except Exception as e:
+        print(f"Error submitting transcription: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/transcribe/jobs/<job_id>')
+def transcription_status(job_id):
+    # ?wait=N waits up to N seconds (capped at MAX_POLL_WAIT) for a job running on this worker
+    wait = max(request.args.get('wait', 0, type=float), 0.0)
+    job = transcription_queue.get(job_id, wait=wait)
+    if job is None:
+        return jsonify({'error': 'Unknown transcription job'}), 404
+    return jsonify(job)
+
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    return jsonify({'error': f'Upload exceeds the {MAX_UPLOAD_BYTES} byte limit'}), 413
+
 if __name__ == '__main__':
     app.run(debug=True, port=5001)
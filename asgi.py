@@ -0,0 +1,240 @@
+"""ASGI entry point serving interviews on the async execution path.
+
+Run with ``uvicorn asgi:app``. Every LLM call goes through ``ainvoke``, so a
+single worker process can multiplex many in-flight interviews on one event
+loop. The Flask app in ``app.py`` remains the synchronous entry point.
+Session store reads and writes are blocking SQLite I/O, so they run in
+worker threads rather than on the loop.
+"""
+import asyncio
+import json
+import os
+import time
+import traceback
+import uuid
+from http.cookies import SimpleCookie
+
+from dotenv import load_dotenv
+
+import collectors
+import llm_calls
+import metrics
+import tracing
+from discussion import GroupDiscussion
+from discussion_store import SharedDiscussions
+from planning_agent import PlanningAgent
+from plan_cache import PlanCache
+from session_registry import SessionRegistry
+from session_store import SessionStore
+from idempotency import IdempotencyCache, IdempotencyConflict, fingerprint
+from llm_calls import DeadlineExceeded
+from session_usage import BudgetExceeded
+from transcript_store import TranscriptStore
+
+load_dotenv()
+
+if not os.getenv('OPENAI_API_KEY'):
+    raise ValueError("No OpenAI API key found. Please set OPENAI_API_KEY in .env file")
+
+SESSION_COOKIE = 'interview_session'
+
+# Slow-request profiling covers one request at a time: cProfile follows the
+# loop thread, so the profile also shows the other requests the loop ran meanwhile
+_profiling = False
+
+session_store = SessionStore.from_env()
+discussions = SharedDiscussions(SessionRegistry.from_env(), session_store)
+plan_cache = PlanCache.from_env()
+chat_turns = IdempotencyCache.from_env(session_store)
+transcripts = TranscriptStore.from_env()
+
+collectors.register(discussions, session_store, plan_cache, chat_turns, transcripts)
+
+
+async def initialize_interview(data: dict, session_id: str):
+    context = {
+        'context': data.get('context', ''),
+        'background': data.get('background', ''),
+        'goals': data.get('goals', ''),
+        'additional_context': data.get('additional_context', '')
+    }
+
+    try:
+        with llm_calls.turn_budget():
+            planning_agent = PlanningAgent(cache=plan_cache)
+            agent_config = await planning_agent.aprepare_session(
+                context=context['context'],
+                background=context['background'],
+                goals=context['goals']
+            )
+
+            group_discussion = GroupDiscussion(context, plan=agent_config)
+            initial_response = await group_discussion.aopening_question()
+    except DeadlineExceeded as e:
+        return 504, {'error': str(e)}, None
+    # Only a session with its opening question is registered and handed to the client
+    new_session_id = uuid.uuid4().hex
+    await asyncio.to_thread(_start_session, new_session_id, context, group_discussion)
+    return 200, {'message': initial_response, 'session_id': new_session_id}, new_session_id
+
+
+async def chat(data: dict, session_id: str):
+    with tracing.span('session_lookup'):
+        group_discussion = await asyncio.to_thread(discussions.get, session_id or '')
+    if not group_discussion:
+        return 400, {'error': 'Interview not initialized'}, None
+
+    message = data.get('message', '')
+    key = data.get('idempotency_key')
+    if not key:
+        return await _chat_turn(session_id, group_discussion, message)
+    try:
+        # Duplicates of a turn wait for, or replay, the first request's result
+        result, _ = await chat_turns.arun(
+            f"{session_id}:{key}", fingerprint(message),
+            lambda: _chat_turn(session_id, group_discussion, message),
+            keep=lambda result: result[0] == 200
+        )
+    except IdempotencyConflict as e:
+        return 422, {'error': str(e)}, None
+    return result
+
+
+async def _chat_turn(session_id: str, group_discussion: GroupDiscussion, message: str):
+    try:
+        response = await group_discussion.adiscuss(message)
+        # The turn's transcript entry and incremental snapshot are written off the loop
+        await asyncio.to_thread(_store_last_turn, session_id, group_discussion)
+    except BudgetExceeded as e:
+        return 429, {'error': str(e), 'usage': group_discussion.usage.snapshot()}, None
+    except DeadlineExceeded as e:
+        return 504, {'error': str(e)}, None
+    return 200, {'message': response}, None
+
+
+def _start_session(session_id: str, context: dict, group_discussion: GroupDiscussion):
+    discussions.put(session_id, group_discussion)
+    transcripts.record_session(session_id, context)
+    _store_last_turn(session_id, group_discussion)
+
+
+def _store_last_turn(session_id: str, group_discussion: GroupDiscussion):
+    turn_index = len(group_discussion.discussion_history) - 1
+    entry = group_discussion.discussion_history[turn_index]
+    transcripts.record_turn(
+        session_id, turn_index, entry['user_message'], entry['agent_responses'][0], entry['agent_responses']
+    )
+    discussions.save(session_id, group_discussion)
+
+
+async def usage(data: dict, session_id: str):
+    group_discussion = await asyncio.to_thread(discussions.get, session_id or '')
+    if not group_discussion:
+        return 404, {'error': 'Interview not found'}, None
+    return 200, {'session_id': session_id, **group_discussion.usage.snapshot()}, None
+
+
+ROUTES = {
+    ('POST', '/initialize_interview'): initialize_interview,
+    ('POST', '/chat'): chat,
+    ('GET', '/usage'): usage,
+}
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+
+    if (scope['method'], scope['path']) == ('GET', '/metrics'):
+        # Collectors such as the session store's query SQLite
+        body = await asyncio.to_thread(metrics.render)
+        await _send(send, 200, body.encode(), metrics.CONTENT_TYPE.encode())
+        return
+
+    handler = ROUTES.get((scope['method'], scope['path']))
+    if handler is None:
+        await _send_json(send, 404, {'error': 'Not found'})
+        return
+
+    global _profiling
+    start = time.perf_counter()
+    status = 500
+    metrics.http_in_flight.inc()
+    trace = tracing.start_trace(f"{scope['method']} {scope['path']}")
+    profile = None
+    if not _profiling:
+        profile = tracing.start_profile()
+        _profiling = profile is not None
+    try:
+        body = await _read_body(receive)
+        data = json.loads(body) if body else {}
+        session_id = data.get('session_id') or _session_cookie(scope)
+        data.setdefault('idempotency_key', _header(scope, b'idempotency-key'))
+        status, payload, new_session_id = await handler(data, session_id)
+        await _send_json(send, status, payload, new_session_id)
+    except Exception as e:
+        status = 500
+        print(f"Error in {scope['path']}:", str(e))
+        print("Traceback:", traceback.format_exc())
+        await _send_json(send, 500, {'error': str(e)})
+    finally:
+        duration = time.perf_counter() - start
+        metrics.http_in_flight.dec()
+        metrics.observe_request(scope['path'], scope['method'], status, duration)
+        if profile is not None:
+            _profiling = False
+            tracing.finish_profile(profile, scope['path'], duration, trace)
+        tracing.finish_trace(trace, route=scope['path'], status=status)
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+def _header(scope, name: bytes) -> str:
+    for header, value in scope.get('headers', []):
+        if header == name:
+            return value.decode('latin-1')
+    return None
+
+
+def _session_cookie(scope) -> str:
+    for name, value in scope.get('headers', []):
+        if name == b'cookie':
+            cookie = SimpleCookie(value.decode('latin-1'))
+            if SESSION_COOKIE in cookie:
+                return cookie[SESSION_COOKIE].value
+    return None
+
+
+async def _send_json(send, status: int, payload: dict, session_id: str = None):
+    headers = []
+    if session_id:
+        headers.append((
+            b'set-cookie',
+            f'{SESSION_COOKIE}={session_id}; Path=/; HttpOnly; SameSite=Lax'.encode()
+        ))
+    await _send(send, status, json.dumps(payload).encode(), b'application/json', headers)
+
+
+async def _send(send, status: int, body: bytes, content_type: bytes, headers: list = None):
+    headers = [
+        (b'content-type', content_type),
+        (b'content-length', str(len(body)).encode()),
+        *(headers or []),
+    ]
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,33 @@
+"""The fake LLM backend as the benchmarks use it.
+
+Models come from the client factory (``LLM_BACKEND=fake``), so every call a
+benchmark makes still goes through the model router, the llm_calls
+retry/deadline wrapper and the instrumentation, as in production.
+"""
+import os
+
+import llm_clients
+import model_router
+
+
+def use_fake_backend(latency: float, reply_tokens: int = 0):
+    """Fresh fake models behind the client factory, and a router that wraps them."""
+    os.environ['LLM_BACKEND'] = 'fake'
+    os.environ['FAKE_LLM_LATENCY'] = str(latency)
+    os.environ['FAKE_LLM_REPLY_TOKENS'] = str(reply_tokens)
+    llm_clients.close_clients()
+    model_router.router = model_router.ModelRouter.from_env()
+
+
+def usage() -> dict:
+    """Calls and tokens summed over every fake model created so far."""
+    total = {'calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
+    for llm in llm_clients.cached_models():
+        for name, value in llm.usage().items():
+            total[name] += value
+    return total
+
+
+def reset_usage():
+    for llm in llm_clients.cached_models():
+        llm.reset()
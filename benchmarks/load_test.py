@@ -0,0 +1,140 @@
+"""Concurrent-session capacity of one worker on the sync and async paths.
+
+Every session runs a few interview turns against ``FakeChatModel`` with a
+fixed per-call latency, served by the client factory (``LLM_BACKEND=fake``)
+so calls go through the model router, the llm_calls deadlines and retries
+and the shared call pool as in production. The sync path models a threaded gunicorn worker (a
+fixed number of request threads), the async path a single event loop as
+served by ``asgi.py``. A concurrency level counts towards capacity while its
+p95 turn latency stays within the SLO.
+
+    python -m benchmarks.load_test --latency 0.2 --levels 1 10 50 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('OPENAI_API_KEY', 'offline-load-test')
+os.environ.setdefault('LLM_BACKEND', 'fake')
+
+from benchmarks.fake_backend import use_fake_backend
+from discussion import GroupDiscussion
+from metrics import percentile
+
+CONTEXT = {
+    'context': 'Warehouse operators using a new scanning app',
+    'goals': 'Understand friction in the picking workflow',
+    'additional_context': ''
+}
+ANSWERS = [
+    "Mostly the scanner drops connection in the cold room",
+    "We restart it, which takes a couple of minutes each time",
+    "Probably ten times a shift on a bad day",
+]
+
+
+def _make_discussion(mode: str) -> GroupDiscussion:
+    return GroupDiscussion(CONTEXT, mode=mode)
+
+
+def run_sync(sessions: int, turns: int, threads: int, mode: str) -> dict:
+    worker = ThreadPoolExecutor(max_workers=threads)
+    latencies = []
+    lock = threading.Lock()
+
+    def client(discussion):
+        for turn in range(turns):
+            start = time.perf_counter()
+            worker.submit(discussion.discuss, ANSWERS[turn % len(ANSWERS)]).result()
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    # Sessions are set up before the clock starts; only turns are measured
+    clients = [
+        threading.Thread(target=client, args=(_make_discussion(mode),))
+        for _ in range(sessions)
+    ]
+    start = time.perf_counter()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    worker.shutdown()
+    return _summarize(latencies, elapsed)
+
+
+def run_async(sessions: int, turns: int, mode: str) -> dict:
+    latencies = []
+
+    async def client(discussion):
+        for turn in range(turns):
+            start = time.perf_counter()
+            await discussion.adiscuss(ANSWERS[turn % len(ANSWERS)])
+            latencies.append(time.perf_counter() - start)
+
+    discussions = [_make_discussion(mode) for _ in range(sessions)]
+
+    async def main():
+        await asyncio.gather(*[client(discussion) for discussion in discussions])
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    return _summarize(latencies, time.perf_counter() - start)
+
+
+def _summarize(latencies: list, elapsed: float) -> dict:
+    return {
+        'turns': len(latencies),
+        'elapsed_s': round(elapsed, 3),
+        'turns_per_s': round(len(latencies) / elapsed, 2),
+        'p50_s': round(percentile(latencies, 50), 3),
+        'p95_s': round(percentile(latencies, 95), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.2, help='seconds per fake LLM call')
+    parser.add_argument('--turns', type=int, default=3, help='turns per session')
+    parser.add_argument('--threads', type=int, default=4, help='request threads of the sync worker')
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 10, 50, 100, 200])
+    parser.add_argument('--mode', default='sequential', choices=['sequential', 'parallel'])
+    parser.add_argument('--slo', type=float, default=None,
+                        help='p95 turn latency target in seconds (default: 2x an unloaded turn)')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    use_fake_backend(args.latency)
+    calls_per_turn = 3 if args.mode == 'sequential' else 2
+    slo = args.slo or 2 * calls_per_turn * args.latency
+
+    results = {'config': vars(args), 'slo_s': slo, 'levels': [], 'capacity': {}}
+    capacity = {'sync': 0, 'async': 0}
+    print(f"{'sessions':>8}  {'path':<5}  {'turns/s':>8}  {'p50 s':>7}  {'p95 s':>7}")
+    for sessions in args.levels:
+        for path, run in (
+            ('sync', lambda: run_sync(sessions, args.turns, args.threads, args.mode)),
+            ('async', lambda: run_async(sessions, args.turns, args.mode)),
+        ):
+            summary = run()
+            if summary['p95_s'] <= slo:
+                capacity[path] = max(capacity[path], sessions)
+            results['levels'].append({'sessions': sessions, 'path': path, **summary})
+            print(f"{sessions:>8}  {path:<5}  {summary['turns_per_s']:>8}  "
+                  f"{summary['p50_s']:>7}  {summary['p95_s']:>7}")
+
+    results['capacity'] = capacity
+    print(f"\nConcurrent sessions within p95 <= {slo:.2f}s: "
+          f"sync={capacity['sync']}, async={capacity['async']}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Interview setup latency: legacy three-stage setup vs the pipelined one.
+
+Legacy setup plans, initializes the agents and then runs a full discussion
+for the opening question. The pipelined setup produces plan and
+initialization in one call and takes the opening question from the plan.
+Both run against ``FakeChatModel`` served by the client factory, so calls go
+through the model router and the llm_calls wrapper as in production.
+
+    python -m benchmarks.setup_latency --latency 0.5 --runs 5
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault('OPENAI_API_KEY', 'offline-benchmark')
+os.environ.setdefault('LLM_BACKEND', 'fake')
+
+from benchmarks.fake_backend import reset_usage, usage, use_fake_backend
+from discussion import OPENING_PROMPT, GroupDiscussion
+from metrics import percentile
+from planning_agent import PlanningAgent
+
+CONTEXT = {
+    'context': 'Warehouse operators using a new scanning app',
+    'background': 'Five years on the floor, shift lead for two',
+    'goals': 'Understand friction in the picking workflow',
+    'additional_context': ''
+}
+
+
+def legacy_setup() -> str:
+    planning_agent = PlanningAgent()
+    plan = planning_agent.create_interview_plan(CONTEXT['context'], CONTEXT['background'], CONTEXT['goals'])
+    agent_config = planning_agent.initialize_agents(plan)
+    discussion = GroupDiscussion(CONTEXT, plan=agent_config)
+    return discussion.discuss(OPENING_PROMPT)
+
+
+def pipelined_setup() -> str:
+    planning_agent = PlanningAgent()
+    agent_config = planning_agent.prepare_session(CONTEXT['context'], CONTEXT['background'], CONTEXT['goals'])
+    discussion = GroupDiscussion(CONTEXT, plan=agent_config)
+    return discussion.opening_question()
+
+
+def measure(setup, latency: float, runs: int) -> dict:
+    use_fake_backend(latency)
+    durations = []
+    calls = []
+    for _ in range(runs):
+        reset_usage()
+        start = time.perf_counter()
+        setup()
+        durations.append(time.perf_counter() - start)
+        calls.append(usage()['calls'])
+    return {
+        'llm_calls': max(calls),
+        'p50_s': round(percentile(durations, 50), 3),
+        'p95_s': round(percentile(durations, 95), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.5, help='seconds per fake LLM call')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    results = {
+        'config': vars(args),
+        'legacy': measure(legacy_setup, args.latency, args.runs),
+        'pipelined': measure(pipelined_setup, args.latency, args.runs),
+    }
+    for name in ('legacy', 'pipelined'):
+        summary = results[name]
+        print(f"{name:<10} calls={summary['llm_calls']}  p50={summary['p50_s']}s  p95={summary['p95_s']}s")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+"""Offline benchmark suite for the interview engine.
+
+Runs GroupDiscussion (both deliberation modes), InterviewManager and
+PlanningAgent against ``FakeChatModel``, served by the client factory
+(``LLM_BACKEND=fake``) so every call still goes through the model router,
+the retry/deadline wrapper and the instrumentation, and reports, per scenario, turn
+latency percentiles, LLM calls and prompt/completion tokens per turn, and
+how the prompt grows over a long interview. A separate pass under
+tracemalloc runs a long interview with zero latency to measure memory
+growth, and another snapshots a long interview after every turn to
+measure snapshot size and save/load time. Results are written as JSON; pass an earlier result file as
+``--baseline`` to fail on regressions.
+
+    python -m benchmarks.suite --latency 0.05 --turns 20 --output bench.json
+    python -m benchmarks.suite --baseline bench.json
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault('OPENAI_API_KEY', 'offline-benchmark')
+os.environ.setdefault('LLM_BACKEND', 'fake')
+
+from agents import InterviewManager
+from benchmarks.fake_backend import reset_usage, usage, use_fake_backend
+from discussion import GroupDiscussion
+from metrics import percentile
+from discussion_memory import DiscussionMemory, llm_summarizer
+from planning_agent import PlanningAgent
+import snapshot
+from session_store import MemorySessionStore, SQLiteSessionStore, encode
+
+CONTEXT = {
+    'context': 'Warehouse operators using a new scanning app',
+    'background': 'Five years on the floor, shift lead for two',
+    'goals': 'Understand friction in the picking workflow',
+    'additional_context': ''
+}
+ANSWERS = [
+    "Mostly the scanner drops connection in the cold room, and then the whole pick list has to be reloaded",
+    "We restart it, which takes a couple of minutes each time",
+    "Probably ten times a shift on a bad day",
+    "I don't know",
+    "The supervisors track it on a whiteboard, but nobody looks at the numbers after the shift ends",
+]
+
+# Metrics compared against a baseline; all of them are lower-is-better
+REGRESSION_METRICS = ('p95_s', 'calls_per_turn', 'prompt_tokens_per_turn', 'completion_tokens_per_turn',
+                      'memory_growth_kb_per_turn', 'snapshot_bytes_per_turn')
+
+
+def _discussion(mode: str) -> GroupDiscussion:
+    memory = DiscussionMemory(llm_summarizer(), background=False)
+    return GroupDiscussion(CONTEXT, mode=mode, memory=memory)
+
+
+def _turns(make_session, turn) -> dict:
+    return {
+        'make_session': make_session,
+        'turn': lambda session, i: turn(session, ANSWERS[i % len(ANSWERS)]),
+    }
+
+
+def _discussion_stats(session) -> dict:
+    if not isinstance(session, GroupDiscussion) or not session.discussion_history:
+        return {}
+    history = session.discussion_history
+    first = sum(history[0]['prompt_tokens'].values())
+    last = sum(history[-1]['prompt_tokens'].values())
+    return {
+        'first_turn_prompt_tokens': first,
+        'last_turn_prompt_tokens': last,
+        'auxiliary_skip_rate': round(session.gate.stats.snapshot()['skip_rate'], 3),
+    }
+
+
+SCENARIOS = {
+    'discussion_sequential': _turns(lambda: _discussion('sequential'), lambda s, m: s.discuss(m)),
+    'discussion_parallel': _turns(lambda: _discussion('parallel'), lambda s, m: s.discuss(m)),
+    'interview_manager': _turns(lambda: InterviewManager(CONTEXT), lambda s, m: s.chat(m)),
+    'planning_create_plan': {
+        'make_session': PlanningAgent,
+        'turn': lambda agent, i: agent.create_interview_plan(
+            f"{CONTEXT['context']} #{i}", CONTEXT['background'], CONTEXT['goals']),
+    },
+    'planning_prepare_session': {
+        'make_session': PlanningAgent,
+        'turn': lambda agent, i: agent.prepare_session(
+            f"{CONTEXT['context']} #{i}", CONTEXT['background'], CONTEXT['goals']),
+    },
+    'setup': {
+        'make_session': lambda: None,
+        'turn': lambda _, i: _setup(i),
+    },
+}
+
+
+def _setup(i: int) -> str:
+    config = PlanningAgent().prepare_session(
+        f"{CONTEXT['context']} #{i}", CONTEXT['background'], CONTEXT['goals'])
+    return GroupDiscussion(CONTEXT, plan=config).opening_question()
+
+
+def run_scenario(name: str, latency: float, reply_tokens: int, turns: int) -> dict:
+    scenario = SCENARIOS[name]
+    use_fake_backend(latency, reply_tokens)
+    session = scenario['make_session']()
+    reset_usage()
+    latencies = []
+    for i in range(turns):
+        start = time.perf_counter()
+        scenario['turn'](session, i)
+        latencies.append(time.perf_counter() - start)
+    totals = usage()
+    return {
+        'turns': turns,
+        'p50_s': round(percentile(latencies, 50), 4),
+        'p95_s': round(percentile(latencies, 95), 4),
+        'p99_s': round(percentile(latencies, 99), 4),
+        'max_s': round(max(latencies), 4),
+        'calls_per_turn': round(totals['calls'] / turns, 3),
+        'prompt_tokens_per_turn': round(totals['prompt_tokens'] / turns, 1),
+        'completion_tokens_per_turn': round(totals['completion_tokens'] / turns, 1),
+        **_discussion_stats(session),
+    }
+
+
+def measure_memory(name: str, reply_tokens: int, turns: int) -> dict:
+    """Heap growth over a long zero-latency interview, after a short warm-up."""
+    scenario = SCENARIOS[name]
+    use_fake_backend(0, reply_tokens)
+    session = scenario['make_session']()
+    warmup = min(5, turns)
+    for i in range(warmup):
+        scenario['turn'](session, i)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        for i in range(warmup, turns):
+            scenario['turn'](session, i)
+        gc.collect()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    measured = max(turns - warmup, 1)
+    return {
+        'memory_turns': turns,
+        'memory_growth_kb': round((after - before) / 1024, 1),
+        'memory_growth_kb_per_turn': round((after - before) / 1024 / measured, 2),
+        'memory_peak_kb': round(peak / 1024, 1),
+    }
+
+
+def measure_snapshot(name: str, reply_tokens: int, turns: int) -> dict:
+    """Snapshot size, and save and load time, over a long interview saved after every turn."""
+    scenario = SCENARIOS[name]
+    use_fake_backend(0, reply_tokens)
+    session = scenario['make_session']()
+    memory_store = MemorySessionStore()
+    save_seconds = []
+    with tempfile.TemporaryDirectory() as directory:
+        sqlite_store = SQLiteSessionStore(os.path.join(directory, 'sessions.db'))
+        for i in range(turns):
+            scenario['turn'](session, i)
+            snapshot.save(memory_store, 'bench', session)
+            start = time.perf_counter()
+            snapshot.save(sqlite_store, 'bench', session)
+            save_seconds.append(time.perf_counter() - start)
+        load_seconds = []
+        for _ in range(5):
+            start = time.perf_counter()
+            snapshot.load(sqlite_store, 'bench')
+            load_seconds.append(time.perf_counter() - start)
+    stored = memory_store.stats()['bytes']
+    tail = save_seconds[-max(turns // 10, 1):]
+    return {
+        'snapshot_turns': turns,
+        'snapshot_bytes': stored,
+        'snapshot_bytes_per_turn': round(stored / turns, 1),
+        # One blob of the whole state, as it would be without incremental parts
+        'snapshot_full_blob_bytes': len(encode(session.to_state())),
+        'snapshot_save_p50_ms': round(percentile(save_seconds, 50) * 1000, 3),
+        'snapshot_save_p95_ms': round(percentile(save_seconds, 95) * 1000, 3),
+        'snapshot_save_last_turns_ms': round(sum(tail) / len(tail) * 1000, 3),
+        'snapshot_load_ms': round(percentile(load_seconds, 50) * 1000, 3),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous:
+            continue
+        for metric in REGRESSION_METRICS:
+            old, new = previous.get(metric), current.get(metric)
+            if old is None or new is None:
+                continue
+            # Small absolute slack so near-zero metrics do not flap
+            if new > old * (1 + tolerance) + 0.01:
+                regressions.append(f"{name}.{metric}: {old} -> {new}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds per fake LLM call')
+    parser.add_argument('--reply-tokens', type=int, default=60, help='approximate tokens per fake reply')
+    parser.add_argument('--turns', type=int, default=20, help='turns (or setups) per latency run')
+    parser.add_argument('--memory-turns', type=int, default=200, help='turns in the memory run; 0 to skip')
+    parser.add_argument('--snapshot-turns', type=int, default=200, help='turns in the snapshot run; 0 to skip')
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--baseline', help='earlier results file to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative slowdown vs baseline')
+    args = parser.parse_args()
+
+    results = {'config': vars(args), 'scenarios': {}}
+    for name in args.scenarios:
+        summary = run_scenario(name, args.latency, args.reply_tokens, args.turns)
+        if args.memory_turns and not name.startswith(('planning', 'setup')):
+            summary.update(measure_memory(name, args.reply_tokens, args.memory_turns))
+        if args.snapshot_turns and not name.startswith(('planning', 'setup')):
+            summary.update(measure_snapshot(name, args.reply_tokens, args.snapshot_turns))
+        results['scenarios'][name] = summary
+        print(f"{name:<26} p50={summary['p50_s']}s  p95={summary['p95_s']}s  "
+              f"calls/turn={summary['calls_per_turn']}  "
+              f"tokens/turn={summary['prompt_tokens_per_turn']}+{summary['completion_tokens_per_turn']}"
+              + (f"  mem/turn={summary['memory_growth_kb_per_turn']}KB" if 'memory_growth_kb' in summary else '')
+              + (f"  snapshot={summary['snapshot_bytes'] // 1024}KB save_p95={summary['snapshot_save_p95_ms']}ms "
+                 f"load={summary['snapshot_load_ms']}ms" if 'snapshot_bytes' in summary else ''))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Stats exported on /metrics, the same set from both entry points.
+
+Each feature keeps its counters on its own stats object; ``register`` exposes
+them as gauges read at scrape time, for ``app.py`` and ``asgi.py`` alike.
+"""
+import llm_calls
+import metrics
+import plan_parser
+import snapshot
+import speculation
+import turn_gating
+from session_usage import LEVELS
+
+
+def register(discussions, session_store, plan_cache, chat_turns, transcripts, transcription_queue=None):
+    """Register the process-wide collectors and those of the entry point's own objects."""
+    collectors = {
+        'interview': lambda: {'active_sessions': len(discussions)},
+        'session_usage': lambda: _usage_totals(discussions),
+        'session_registry': discussions.stats,
+        'session_store': session_store.stats,
+        'plan_cache': plan_cache.stats,
+        'idempotency': chat_turns.stats,
+        'transcript_store': transcripts.stats,
+        'llm_resilience': llm_calls.stats.snapshot,
+        'plan_parser': plan_parser.stats.snapshot,
+        'agent_gating': turn_gating.stats.snapshot,
+        'speculation': speculation.stats.snapshot,
+        'snapshots': snapshot.stats.snapshot,
+    }
+    # Only the Flask app accepts audio uploads
+    if transcription_queue is not None:
+        collectors['transcription_queue'] = transcription_queue.stats
+    for prefix, collect in collectors.items():
+        metrics.registry.register_collector(prefix, collect)
+
+
+def _usage_totals(discussions) -> dict:
+    """Spend summed over the sessions live in this worker, and how many sit at each budget level."""
+    totals = {'calls': 0, 'tokens': 0, 'cost_usd': 0.0, **{f'sessions_{level}': 0 for level in LEVELS}}
+    for _, discussion in discussions.items():
+        session_totals = discussion.usage.totals()
+        for name in ('calls', 'tokens', 'cost_usd'):
+            totals[name] += session_totals[name]
+        totals[f'sessions_{discussion.usage.level()}'] += 1
+    return totals
@@ -0,0 +1,736 @@
+from llm_clients import DEFAULT_MODEL
+from metrics import instrument, percentile
+from model_router import get_routed_model
+import llm_calls
+import tracing
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, BaseMessage
+from discussion_memory import DiscussionMemory
+from llm_calls import DeadlineExceeded
+from planning_agent import InterviewPlan
+from prompt_builder import PromptBuilder, PromptSection
+from session_usage import SessionUsage
+from speculation import Speculator
+from turn_gating import TurnGate
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
+class ResearchAgent:
+    def __init__(self, name: str, role: str, description: str, route: str = 'auxiliary'):
+        self.name = name
+        self.role = role
+        self.description = description
+        self.llm = instrument(get_routed_model(route), name)
+        # Session accounting, attached by the discussion that owns this agent
+        self.usage: SessionUsage = None
+        
+    def generate_response(self, messages: list[BaseMessage]) -> str:
+        messages = self._with_system_prompt(messages)
+        response = self.llm.invoke(messages)
+        self._record_usage(messages, response.content)
+        return f"[{self.name}]: {response.content}"
+        
+    async def agenerate_response(self, messages: list[BaseMessage]) -> str:
+        messages = self._with_system_prompt(messages)
+        response = await self.llm.ainvoke(messages)
+        self._record_usage(messages, response.content)
+        return f"[{self.name}]: {response.content}"
+        
+    def stream_response(self, messages: list[BaseMessage]) -> Iterator[str]:
+        messages = self._with_system_prompt(messages)
+        parts = []
+        for chunk in self.llm.stream(messages):
+            if chunk.content:
+                parts.append(chunk.content)
+                yield chunk.content
+        self._record_usage(messages, ''.join(parts))
+        
+    def _record_usage(self, messages: list[BaseMessage], completion: str):
+        if self.usage is not None:
+            self.usage.record_call(self.name, getattr(self.llm, 'model_name', DEFAULT_MODEL), messages, completion)
+                
+    def _with_system_prompt(self, messages: list[BaseMessage]) -> list[BaseMessage]:
+        return [
+            SystemMessage(content=f"""You are {self.name}, {self.role}. {self.description}
+            When responding, always stay in character and prefix your response with your name in brackets, e.g. [{self.name}]: """),
+            *messages
+        ]
+
+class _NamePrefixStripper:
+    """Drops a leading "[Agent Name]:" label from a stream of tokens."""
+    
+    def __init__(self):
+        self._buffer = ''
+        self._done = False
+        
+    def feed(self, token: str) -> str:
+        if self._done:
+            return token
+        self._buffer += token
+        text = self._buffer.lstrip()
+        if text.startswith('['):
+            if ']' not in text:
+                return ''
+            text = text.split(']', 1)[1].lstrip()
+            if text.startswith(':'):
+                text = text[1:].lstrip()
+        if not text:
+            return ''
+        self._done = True
+        return text
+        
+    def flush(self) -> str:
+        if self._done:
+            return ''
+        self._done = True
+        return GroupDiscussion._clean_response(self._buffer)
+
+DISCUSSION_MODES = ('sequential', 'parallel')
+
+OPENING_PROMPT = "The interview is starting. What should be our opening question?"
+
+DISCUSSION_INSTRUCTIONS = """Analyze the current state:
+1. Lead Interviewer: 
+   - Assess if we're still aligned with our goals and key topics
+   - Generate a focused follow-up question (max 15 words)
+   - If off-topic, redirect back to relevant goals
+   - Follow the planned communication style
+2. Completeness Analyst: Identify information gaps in key topics
+3. Depth Explorer: Suggest areas for deeper exploration within current topic
+
+Choose the most appropriate next question based on the combined analysis.
+Prioritize staying on track with our interview goals and plan.
+
+IMPORTANT: Start your response directly with the question or statement.
+Do not use any prefixes, labels, or colons."""
+
+# Cheaper prompts once a session nears its budget (see session_usage)
+COMPACT_PROMPT_SCALE = float(os.getenv('BUDGET_COMPACT_PROMPT_SCALE', '0.5'))
+COMPACT_HISTORY_TURNS = int(os.getenv('BUDGET_COMPACT_HISTORY_TURNS', '1'))
+
+# Share of the remaining turn budget the auxiliary agents may use, so the lead always gets its turn
+AUXILIARY_BUDGET_SHARE = 0.5
+
+# The Completeness Analyst's gap analysis, precomputed before the answer arrives
+SPECULATIVE_AGENT = "Completeness Analyst"
+PENDING_ANSWER = "(Not answered yet. Work from the discussion so far.)"
+SPECULATIVE_INSTRUCTIONS = """As the Completeness Analyst, identify which key topics and goals
+are still uncovered or only partly covered, and what information is missing.
+Do not write a question for the interviewee."""
+
+def prompt_budgets(agent_names: list[str]) -> dict:
+    """Per-agent token budgets from PROMPT_TOKEN_BUDGET and PROMPT_TOKEN_BUDGETS (JSON)."""
+    default = int(os.getenv('PROMPT_TOKEN_BUDGET', '3000'))
+    overrides = json.loads(os.getenv('PROMPT_TOKEN_BUDGETS', '{}'))
+    return {name: int(overrides.get(name, default)) for name in agent_names}
+
+# Shared pool for running the auxiliary agents concurrently in parallel mode
+_deliberation_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv('DELIBERATION_WORKERS', '16')),
+    thread_name_prefix='deliberation'
+)
+
+class GroupDiscussion:
+    def __init__(self, context: dict, plan: dict = None, mode: str = None,
+                 memory: DiscussionMemory = None, usage: SessionUsage = None, gate: TurnGate = None,
+                 speculator: Speculator = None):
+        self.context = context
+        self.plan = plan
+        self.mode = mode or os.getenv('DISCUSSION_MODE', 'sequential')
+        if self.mode not in DISCUSSION_MODES:
+            raise ValueError(f"Unknown discussion mode: {self.mode}")
+        self.agents = [
+            ResearchAgent(
+                "Lead Interviewer",
+                "Expert Research Interviewer",
+                """Your role is to conduct unbiased, methodologically sound interviews.
+                
+                CORE PRINCIPLES:
+                1. Never make assumptions
+                2. Always establish context first
+                3. One question at a time
+                4. Listen and acknowledge before proceeding
+                5. Never repeat failed questions
+                6. Read emotional signals
+                7. Match the user's tone
+                
+                CONVERSATION STRUCTURE:
+                1. Active Listening
+                   - Always acknowledge new information
+                   - Build on what they just said
+                   - Match their level of formality
+                
+                2. Natural Flow
+                   - Follow their conversational direction
+                   - Don't abruptly change topics
+                   - If they raise a new point, explore it
+                   - Know when to move on from a topic
+                
+                3. Handle Responses
+                   - If confused → Rephrase differently
+                   - If frustrated → Simplify and acknowledge
+                   - If emotional → Match tone and validate
+                   - If done with topic → Move on completely
+                
+                EMOTIONAL INTELLIGENCE:
+                1. Recognize Stop Signals
+                   - "that's the same thing" → Rephrase completely
+                   - "weird question" → Explain and simplify
+                   - "this shit is broken" → Change approach
+                   - Strong language → Match informal tone
+                
+                2. Response Patterns
+                   Too Formal: "How do machine breakdowns impact your job satisfaction?"
+                   Better: "That sounds frustrating. What else bugs you about the job?"
+                   
+                   Too Formal: "Let's refocus on understanding what you don't like..."
+                   Better: "Got it - machines and boss are issues. Anything else?"
+                   
+                   Too Formal: "Can you elaborate on the challenges you face?"
+                   Better: "What makes that hard to deal with?"
+                
+                EXAMPLE FLOWS:
+                
+                Good (Technical):
+                Human: "I've taken entrepreneurship classes for software and hardware"
+                Assistant: "You mentioned both software and hardware. Which interests you more?"
+                Human: "Mostly software"
+                Assistant: "What aspects of software entrepreneurship have you found most valuable?"
+                
+                Good (Emotional):
+                Human: "I hate our boss - he sucks"
+                Assistant: "Sounds rough. What makes him so bad?"
+                Human: "Always looking over my shoulder"
+                Assistant: "That would drive me crazy too. What else bugs you?"
+                
+                Bad (Ignoring Signals):
+                Human: "this shit is broken"
+                Assistant: "Let's refocus on understanding what aspects..."
+                Human: "are you just gonna keep asking me?"
+                Assistant: *repeats same formal question*
+                
+                RECOVERY STRATEGIES:
+                1. From Confusion
+                   - Acknowledge: "I see my question wasn't clear"
+                   - Explain: "I was trying to understand..."
+                   - Rephrase: "Let me ask this differently..."
+                
+                2. From Frustration
+                   - Drop formality: "Let me back up..."
+                   - Validate: "Yeah, that sounds really frustrating"
+                   - Simplify: "What else bugs you?"
+                
+                3. From Repetition
+                   - Change approach completely
+                   - Ask about a different aspect
+                   - Let them lead the direction
+                
+                TOPIC TRANSITIONS:
+                1. Acknowledge current topic
+                2. Explain why you're shifting
+                3. Make the connection clear
+                4. Get permission: "Would you mind if we discussed...?"
+                
+                WHEN TO ADAPT:
+                - Match formality to user's style
+                - If they're frustrated → Be more casual
+                - If they're technical → Be more precise
+                - If they're emotional → Be more empathetic
+                """,
+                route='lead'
+            ),
+            ResearchAgent(
+                "Completeness Analyst",
+                "Research Methodology Expert",
+                """Your role is to ensure methodological rigor and completeness in data collection.
+                
+                ANALYSIS FRAMEWORK:
+                1. Coverage Check
+                   - Are all research goals being addressed?
+                   - Are responses complete for each topic?
+                   - Are assumptions being validated?
+                
+                2. Depth Assessment
+                   - Is the detail level sufficient?
+                   - Are examples concrete enough?
+                   - Are contexts fully explained?
+                
+                3. Clarity Verification
+                   - Are terms clearly defined?
+                   - Are experiences specific rather than general?
+                   - Are comparisons and contrasts clear?
+                
+                4. Bias Detection
+                   - Watch for leading questions
+                   - Identify unstated assumptions
+                   - Flag loaded language
+                
+                5. Methodological Gaps
+                   - Time frames not specified
+                   - Missing contextual factors
+                   - Undefined comparisons
+                
+                Suggest follow-ups that:
+                - Use neutral language
+                - Seek specific examples
+                - Clarify without leading
+                - Validate understanding
+                """
+            ),
+            ResearchAgent(
+                "Depth Explorer",
+                "Qualitative Research Specialist",
+                """Your role is to enhance the depth and quality of insights while maintaining research integrity.
+                
+                EXPLORATION FRAMEWORK:
+                1. Pattern Recognition
+                   - Look for emerging themes
+                   - Identify connecting threads
+                   - Note potential relationships
+                
+                2. Context Enrichment
+                   - Environmental factors
+                   - Situational influences
+                   - Historical context
+                
+                3. Causal Understanding
+                   - Explore decision processes
+                   - Uncover motivations
+                   - Trace impact chains
+                
+                4. Perspective Expansion
+                   - Different stakeholders 
+                   - Various timeframes
+                   - Multiple scenarios
+                
+                QUESTION TECHNIQUES:
+                1. Critical Incident
+                   - "Could you describe a specific time when..."
+                   - "What exactly happened when..."
+                
+                2. Contrast Probes
+                   - "How does this compare to..."
+                   - "What makes this different from..."
+                
+                3. Process Tracing
+                   - "Walk me through..."
+                   - "What led to..."
+                
+                Always maintain:
+                - Methodological rigor
+                - Neutral language
+                - Open exploration
+                - Respect for participant's perspective
+                """
+            )
+        ]
+        self.discussion_history = []
+        self.memory = memory or DiscussionMemory.from_env()
+        self.last_timings = {}
+        self.prompt_budgets = prompt_budgets([agent.name for agent in self.agents])
+        self.last_prompt_sizes = {}
+        self.usage = usage or SessionUsage.from_env()
+        for agent in self.agents:
+            agent.usage = self.usage
+        self.memory.usage = self.usage
+        self.gate = gate or TurnGate.from_env()
+        self.speculator = speculator or Speculator.from_env()
+        # Speculative results claimed for the turn in progress, by agent name
+        self._speculated = {}
+        
+    def _build_prompts(self, user_message: str, level: str = 'full') -> tuple[dict, dict]:
+        """Discussion prompt for each agent within its token budget, plus a size report."""
+        with tracing.span('build_prompts', level=level):
+            return self._build_budgeted_prompts(user_message, level)
+        
+    def _build_budgeted_prompts(self, user_message: str, level: str) -> tuple[dict, dict]:
+        compact = level != 'full'
+        built = {}
+        prompts = {}
+        sizes = {}
+        for agent in self.agents:
+            budget = self.prompt_budgets[agent.name]
+            if compact:
+                budget = int(budget * COMPACT_PROMPT_SCALE)
+            if budget not in built:
+                text, report = PromptBuilder(budget).build(self._prompt_sections(user_message, compact))
+                built[budget] = (HumanMessage(content=text), report)
+            prompts[agent.name], sizes[agent.name] = built[budget]
+        self.last_prompt_sizes = sizes
+        return prompts, sizes
+        
+    def _prompt_sections(self, user_message: str, compact: bool = False) -> list[PromptSection]:
+        # Create the discussion context
+        plan_context = ""
+        if self.plan:
+            plan_context = f"""Interview Type: {self.plan.get('plan').interview_type}
+Key Topics: {', '.join(self.plan.get('plan').key_topics)}
+Communication Style: {self.plan.get('plan').communication_style}
+Special Considerations: {', '.join(self.plan.get('plan').special_considerations)}"""
+
+        history_items, compact_items = self._history_items()
+        if compact:
+            history_items = history_items[-COMPACT_HISTORY_TURNS:] if COMPACT_HISTORY_TURNS else []
+            compact_items = compact_items[-COMPACT_HISTORY_TURNS:] if COMPACT_HISTORY_TURNS else []
+        return [
+            PromptSection('context', 'Interview Context', self.context.get('context', ''), priority=4),
+            PromptSection('goals', 'Interview Goals', self.context.get('goals', ''), priority=6),
+            PromptSection('additional_context', 'Additional Context',
+                          self.context.get('additional_context', ''), priority=1),
+            PromptSection('plan', 'Interview Plan', plan_context, priority=3),
+            PromptSection('user_message', 'Current User Response', user_message, required=True),
+            PromptSection('summary', 'Summary of Earlier Discussion', self.memory.summary, priority=2),
+            PromptSection('history', 'Previous Discussion', items=history_items, compact_items=compact_items,
+                          empty_text="No previous discussion", priority=5),
+            PromptSection('instructions', None, DISCUSSION_INSTRUCTIONS, required=True),
+        ]
+        
+    def to_state(self) -> dict:
+        """JSON-able state from which :meth:`from_state` resumes this discussion in any process."""
+        plan = None
+        if self.plan:
+            plan = {**self.plan, 'plan': vars(self.plan['plan'])}
+        return {
+            'context': self.context,
+            'plan': plan,
+            'mode': self.mode,
+            'history': self.discussion_history,
+            'memory': self.memory.state(),
+            'usage': self.usage.state(),
+            'gate': self.gate.state(),
+        }
+        
+    @classmethod
+    def from_state(cls, state: dict) -> "GroupDiscussion":
+        plan = state['plan']
+        if plan:
+            plan = {**plan, 'plan': InterviewPlan(**plan['plan'])}
+        discussion = cls(state['context'], plan=plan, mode=state['mode'])
+        discussion.discussion_history = state['history']
+        discussion.memory.restore(state['memory'])
+        discussion.usage.restore(state['usage'])
+        discussion.gate.restore(state['gate'])
+        return discussion
+        
+    def opening_question(self) -> str:
+        """First question of the interview, taken straight from the plan when it has one."""
+        question = self._planned_opening_question()
+        if question is None:
+            return self.discuss(OPENING_PROMPT)
+        return question
+        
+    async def aopening_question(self) -> str:
+        question = self._planned_opening_question()
+        if question is None:
+            return await self.adiscuss(OPENING_PROMPT)
+        return question
+        
+    def _planned_opening_question(self) -> str:
+        plan = self.plan.get('plan') if self.plan else None
+        if not plan or not plan.suggested_questions:
+            return None
+        question = plan.suggested_questions[0].strip()
+        self._record_turn(OPENING_PROMPT, [question], {'total': 0.0}, mode='plan')
+        return question
+        
+    def _begin_turn(self, user_message: str) -> tuple[str, str]:
+        """Budget level of the next turn and why it skips the auxiliary agents, if it does."""
+        level = self.usage.begin_turn()
+        skip_reason = 'budget' if level in ('lead_only', 'exhausted') else self.gate.skip_reason(user_message)
+        if skip_reason is None and level == 'full':
+            future = self.speculator.take(len(self.discussion_history))
+            self._speculated = {SPECULATIVE_AGENT: future} if future else {}
+        else:
+            # Speculation runs at the full level; skipped and compact turns cannot use it
+            self.speculator.discard()
+            self._speculated = {}
+        return level, skip_reason
+        
+    def discuss(self, user_message: str) -> str:
+        with llm_calls.turn_budget():
+            return self._discuss(user_message)
+        
+    def _discuss(self, user_message: str) -> str:
+        level, skip_reason = self._begin_turn(user_message)
+        prompts, prompt_sizes = self._build_prompts(user_message, level)
+        
+        turn_start = time.perf_counter()
+        if skip_reason:
+            agent_responses, timings = self._deliberate_lead_only(prompts)
+        elif self.mode == 'parallel':
+            agent_responses, timings = self._deliberate_parallel(prompts)
+        else:
+            agent_responses, timings = self._deliberate_sequential(prompts)
+        timings['total'] = time.perf_counter() - turn_start
+        self._record_turn(user_message, agent_responses, timings, prompt_sizes=prompt_sizes,
+                          level=level, skip_reason=skip_reason)
+        
+        # Return just the lead response without any prefix
+        return agent_responses[0]
+        
+    async def adiscuss(self, user_message: str) -> str:
+        """Async variant of :meth:`discuss` for use on an event loop."""
+        with llm_calls.turn_budget():
+            return await self._adiscuss(user_message)
+        
+    async def _adiscuss(self, user_message: str) -> str:
+        level, skip_reason = self._begin_turn(user_message)
+        prompts, prompt_sizes = self._build_prompts(user_message, level)
+        
+        turn_start = time.perf_counter()
+        if skip_reason:
+            agent_responses, timings = await self._adeliberate_lead_only(prompts)
+        elif self.mode == 'parallel':
+            agent_responses, timings = await self._adeliberate_parallel(prompts)
+        else:
+            agent_responses, timings = await self._adeliberate_sequential(prompts)
+        timings['total'] = time.perf_counter() - turn_start
+        self._record_turn(user_message, agent_responses, timings, prompt_sizes=prompt_sizes,
+                          level=level, skip_reason=skip_reason)
+        
+        return agent_responses[0]
+        
+    def discuss_stream(self, user_message: str) -> Iterator[tuple[str, dict]]:
+        """Run a turn in the discussion's mode, yielding (event, data) pairs as it progresses.
+        
+        Emits ``deliberating`` while the auxiliary agents run ahead of the
+        lead (parallel mode), ``streaming`` once the lead starts answering,
+        ``token`` for every piece of the lead's answer and ``done`` with the
+        full message. In sequential mode the lead answers first, as in
+        :meth:`discuss`, and the auxiliary agents follow it before ``done``.
+        """
+        with llm_calls.turn_budget():
+            yield from self._discuss_stream(user_message)
+        
+    def _discuss_stream(self, user_message: str) -> Iterator[tuple[str, dict]]:
+        level, skip_reason = self._begin_turn(user_message)
+        prompts, prompt_sizes = self._build_prompts(user_message, level)
+        lead, *auxiliary = self.agents
+        timings = {}
+        
+        turn_start = time.perf_counter()
+        auxiliary_responses = []
+        if skip_reason or self.mode != 'parallel':
+            lead_messages = [prompts[lead.name]]
+        else:
+            yield 'deliberating', {'agents': [agent.name for agent in auxiliary]}
+            auxiliary_responses = self._run_auxiliary(prompts, timings)
+            lead_messages = self._synthesis_messages(prompts[lead.name], auxiliary_responses)
+        
+        yield 'streaming', {'agent': lead.name}
+        lead_start = time.perf_counter()
+        stripper = _NamePrefixStripper()
+        parts = []
+        for token in lead.stream_response(lead_messages):
+            text = stripper.feed(token)
+            if text:
+                if not parts:
+                    timings['time_to_first_token'] = time.perf_counter() - turn_start
+                parts.append(text)
+                yield 'token', {'text': text}
+        tail = stripper.flush()
+        if tail:
+            parts.append(tail)
+            yield 'token', {'text': tail}
+        timings[lead.name] = time.perf_counter() - lead_start
+        
+        lead_response = ''.join(parts).strip()
+        if skip_reason or self.mode == 'parallel':
+            agent_responses = [lead_response, *auxiliary_responses]
+        else:
+            agent_responses = self._continue_sequential(prompts, [lead_response], timings)
+        timings['total'] = time.perf_counter() - turn_start
+        self._record_turn(user_message, agent_responses, timings, prompt_sizes=prompt_sizes,
+                          level=level, skip_reason=skip_reason)
+        yield 'done', {'message': lead_response, 'timings': timings}
+        
+    def _record_turn(self, user_message: str, agent_responses: list[str], timings: dict,
+                     mode: str = None, prompt_sizes: dict = None, level: str = 'full',
+                     skip_reason: str = None):
+        self.last_timings = timings
+        if mode != 'plan':
+            self.gate.record(skip_reason, None if skip_reason else self._auxiliary_seconds(timings, mode or self.mode))
+        self.discussion_history.append({
+            'user_message': user_message,
+            'agent_responses': agent_responses,
+            'mode': mode or self.mode,
+            'budget_level': level,
+            'skipped_auxiliary': skip_reason,
+            'timings': timings,
+            'prompt_tokens': {name: report['tokens'] for name, report in (prompt_sizes or {}).items()}
+        })
+        self.memory.observe(self.discussion_history)
+        self._speculate()
+        
+    def _speculate(self):
+        """Start the next turn's gap analysis while the interviewee is answering."""
+        if not self.speculator.enabled or self.usage.level() != 'full':
+            return
+        self.speculator.launch(len(self.discussion_history), self._speculative_analysis)
+        
+    def _speculative_analysis(self) -> str:
+        # Runs on the speculation pool, off the request path, within a turn's budget
+        with llm_calls.turn_budget():
+            return self._analyze_gaps()
+        
+    def _analyze_gaps(self) -> str:
+        analyst = next(agent for agent in self.agents if agent.name == SPECULATIVE_AGENT)
+        sections = self._prompt_sections(PENDING_ANSWER)
+        for section in sections:
+            if section.name == 'instructions':
+                section.text = SPECULATIVE_INSTRUCTIONS
+        text, _ = PromptBuilder(self.prompt_budgets[analyst.name]).build(sections)
+        return self._clean_response(analyst.generate_response([HumanMessage(content=text)]))
+        
+    def _auxiliary_seconds(self, timings: dict, mode: str) -> float:
+        # Parallel turns wait for the slowest auxiliary agent, sequential ones for all of them
+        seconds = [timings.get(agent.name, 0.0) for agent in self.agents[1:]]
+        return max(seconds) if mode == 'parallel' else sum(seconds)
+        
+    def _deliberate_sequential(self, prompts: dict) -> tuple[list[str], dict]:
+        timings = {}
+        return self._continue_sequential(prompts, [], timings), timings
+        
+    def _continue_sequential(self, prompts: dict, agent_responses: list[str], timings: dict) -> list[str]:
+        # Each agent after those that already answered sees the responses of the agents before it
+        for agent in self.agents[len(agent_responses):]:
+            messages = [prompts[agent.name]]
+            messages.extend([AIMessage(content=resp) for resp in agent_responses if resp])
+            agent_responses.append(self._timed_response(agent, messages, timings))
+        return agent_responses
+        
+    def _deliberate_parallel(self, prompts: dict) -> tuple[list[str], dict]:
+        # Analyst and explorer deliberate concurrently, then the lead synthesizes
+        lead = self.agents[0]
+        timings = {}
+        auxiliary_responses = self._run_auxiliary(prompts, timings)
+        messages = self._synthesis_messages(prompts[lead.name], auxiliary_responses)
+        lead_response = self._timed_response(lead, messages, timings)
+        return [lead_response, *auxiliary_responses], timings
+        
+    def _deliberate_lead_only(self, prompts: dict) -> tuple[list[str], dict]:
+        # Budget nearly spent: the lead answers alone
+        lead = self.agents[0]
+        timings = {}
+        return [self._timed_response(lead, [prompts[lead.name]], timings)], timings
+        
+    async def _adeliberate_lead_only(self, prompts: dict) -> tuple[list[str], dict]:
+        lead = self.agents[0]
+        timings = {}
+        return [await self._atimed_response(lead, [prompts[lead.name]], timings)], timings
+        
+    async def _adeliberate_sequential(self, prompts: dict) -> tuple[list[str], dict]:
+        agent_responses = []
+        timings = {}
+        for agent in self.agents:
+            messages = [prompts[agent.name]]
+            messages.extend([AIMessage(content=resp) for resp in agent_responses if resp])
+            agent_responses.append(await self._atimed_response(agent, messages, timings))
+        return agent_responses, timings
+        
+    async def _adeliberate_parallel(self, prompts: dict) -> tuple[list[str], dict]:
+        lead = self.agents[0]
+        timings = {}
+        auxiliary_responses = await asyncio.gather(*[
+            self._atimed_response(agent, [prompts[agent.name]], timings)
+            for agent in self.agents[1:]
+        ])
+        messages = self._synthesis_messages(prompts[lead.name], auxiliary_responses)
+        lead_response = await self._atimed_response(lead, messages, timings)
+        return [lead_response, *auxiliary_responses], timings
+        
+    def _run_auxiliary(self, prompts: dict, timings: dict) -> list[str]:
+        futures = [
+            _deliberation_pool.submit(tracing.propagate(self._timed_response), agent, [prompts[agent.name]], timings)
+            for agent in self.agents[1:]
+        ]
+        return [future.result() for future in futures]
+        
+    @staticmethod
+    def _synthesis_messages(discussion_prompt: HumanMessage, auxiliary_responses: list[str]) -> list[BaseMessage]:
+        messages = [discussion_prompt]
+        messages.extend([AIMessage(content=resp) for resp in auxiliary_responses if resp])
+        messages.append(HumanMessage(content="""
+        Using the Completeness Analyst's and Depth Explorer's notes above,
+        give the single next question or statement for the interviewee.
+        """))
+        return messages
+        
+    def _timed_response(self, agent: ResearchAgent, messages: list[BaseMessage], timings: dict) -> str:
+        start = time.perf_counter()
+        speculated = self._speculated.pop(agent.name, None)
+        if speculated is not None:
+            # Wait no longer than the agent could spend on a live call
+            with llm_calls.budget(share=AUXILIARY_BUDGET_SHARE):
+                response = Speculator.result(speculated, llm_calls.remaining())
+            if response is not None:
+                timings[agent.name] = time.perf_counter() - start
+                return response
+        if agent is self.agents[0]:
+            response = agent.generate_response(messages)
+        else:
+            try:
+                with llm_calls.budget(share=AUXILIARY_BUDGET_SHARE):
+                    response = agent.generate_response(messages)
+            except DeadlineExceeded as e:
+                # The lead answers without this agent's notes
+                print(f"{agent.name} skipped: {e}")
+                response = ''
+        timings[agent.name] = time.perf_counter() - start
+        with tracing.span('clean_response', agent=agent.name):
+            return self._clean_response(response)
+        
+    async def _atimed_response(self, agent: ResearchAgent, messages: list[BaseMessage], timings: dict) -> str:
+        start = time.perf_counter()
+        speculated = self._speculated.pop(agent.name, None)
+        if speculated is not None:
+            # Wait no longer than the agent could spend on a live call
+            with llm_calls.budget(share=AUXILIARY_BUDGET_SHARE):
+                response = await Speculator.aresult(speculated, llm_calls.remaining())
+            if response is not None:
+                timings[agent.name] = time.perf_counter() - start
+                return response
+        if agent is self.agents[0]:
+            response = await agent.agenerate_response(messages)
+        else:
+            try:
+                with llm_calls.budget(share=AUXILIARY_BUDGET_SHARE):
+                    response = await agent.agenerate_response(messages)
+            except DeadlineExceeded as e:
+                print(f"{agent.name} skipped: {e}")
+                response = ''
+        timings[agent.name] = time.perf_counter() - start
+        with tracing.span('clean_response', agent=agent.name):
+            return self._clean_response(response)
+        
+    @staticmethod
+    def _clean_response(response: str) -> str:
+        if ']' in response:
+            response = response.split(']', 1)[1].strip()
+        if response.startswith(':'):
+            response = response[1:].strip()
+        return response
+        
+    def timing_stats(self) -> dict:
+        """p50/p95 latency per agent and per turn over this discussion."""
+        samples = {}
+        for entry in self.discussion_history:
+            for name, seconds in entry.get('timings', {}).items():
+                samples.setdefault(name, []).append(seconds)
+        return {
+            name: {'p50': percentile(values, 50), 'p95': percentile(values, 95), 'count': len(values)}
+            for name, values in samples.items()
+        }
+        
+    def _history_items(self) -> tuple[list[str], list[str]]:
+        """Turns not yet summarized, oldest first, in full and with only the lead's reply."""
+        items = []
+        compact_items = []
+        for entry in self.memory.tail(self.discussion_history):
+            user_line = f"User: {entry['user_message']}"
+            items.append("\n".join([user_line, *entry['agent_responses']]))
+            compact_items.append("\n".join([user_line, *entry['agent_responses'][:1]]))
+        return items, compact_items
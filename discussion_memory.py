@@ -0,0 +1,153 @@
+"""Incremental memory for long interviews.
+
+Keeps a compact running summary of earlier turns plus a verbatim tail of
+recent ones, so the discussion prompt stays roughly the same size however
+long the interview runs. The summary is folded forward every few turns,
+by default on a background thread so it never sits on the request path.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from llm_clients import DEFAULT_MODEL
+from metrics import instrument
+from model_router import get_routed_model
+from prompt_builder import truncate_to_tokens
+from session_usage import SessionUsage
+
+# Shared by every interview; summaries are cheap and infrequent
+_summary_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv('MEMORY_WORKERS', '2')),
+    thread_name_prefix='memory'
+)
+
+# (summary, new entries, session usage to charge or None) -> new summary
+Summarizer = Callable[[str, List[dict], Optional[SessionUsage]], str]
+
+
+def format_entries(entries: List[dict]) -> str:
+    lines = []
+    for entry in entries:
+        lines.append(f"User: {entry['user_message']}")
+        if entry['agent_responses']:
+            lines.append(f"Interviewer: {entry['agent_responses'][0]}")
+    return "\n".join(lines)
+
+
+def extractive_summarizer(max_tokens: int = 300) -> Summarizer:
+    """Summarizer that keeps the opening of each user answer; no LLM call."""
+    def summarize(summary: str, entries: List[dict], usage: SessionUsage = None) -> str:
+        notes = [summary] if summary else []
+        for entry in entries:
+            answer = entry['user_message'].split('\n')[0]
+            notes.append(f"- {truncate_to_tokens(answer, 40)}")
+        # Keep the most recent notes when the summary outgrows its budget
+        text = "\n".join(notes)
+        while len(notes) > 1 and truncate_to_tokens(text, max_tokens) != text:
+            notes.pop(0)
+            text = "\n".join(notes)
+        return truncate_to_tokens(text, max_tokens)
+    return summarize
+
+
+def llm_summarizer(max_tokens: int = 300, llm=None) -> Summarizer:
+    """Summarizer that asks the chat model to fold new turns into the summary."""
+    fallback = extractive_summarizer(max_tokens)
+    llm = instrument(llm or get_routed_model('summarizer'), 'DiscussionMemory')
+
+    def summarize(summary: str, entries: List[dict], usage: SessionUsage = None) -> str:
+        messages = [
+            SystemMessage(content="You maintain concise running notes of a research interview."),
+            HumanMessage(content=f"""
+            Current notes:
+            {summary or "None yet"}
+
+            New turns:
+            {format_entries(entries)}
+
+            Rewrite the notes to include the new turns. Keep facts the interviewee shared,
+            topics already covered and topics they did not want to discuss.
+            Use at most {max_tokens // 2} words. Reply with the notes only.
+            """)
+        ]
+        try:
+            content = llm.invoke(messages).content
+            if usage is not None:
+                usage.record_call('DiscussionMemory', getattr(llm, 'model_name', DEFAULT_MODEL), messages, content)
+            return truncate_to_tokens(content.strip(), max_tokens)
+        except Exception as e:
+            print(f"Error summarizing discussion: {e}")
+            return fallback(summary, entries)
+    return summarize
+
+
+class DiscussionMemory:
+    def __init__(self, summarizer: Summarizer = None, tail_turns: int = 3,
+                 update_every: int = 4, background: bool = True):
+        self.summarizer = summarizer or llm_summarizer()
+        self.tail_turns = tail_turns
+        self.update_every = update_every
+        self.background = background
+        self.summary = ''
+        # Number of history entries folded into the summary so far
+        self.summarized_turns = 0
+        # Session accounting, attached by the discussion that owns this memory
+        self.usage: SessionUsage = None
+        self._lock = threading.Lock()
+        self._updating = False
+
+    @classmethod
+    def from_env(cls) -> "DiscussionMemory":
+        max_tokens = int(os.getenv('MEMORY_SUMMARY_TOKENS', '300'))
+        summarizer = (extractive_summarizer(max_tokens)
+                      if os.getenv('MEMORY_SUMMARIZER', 'llm') == 'extractive'
+                      else llm_summarizer(max_tokens))
+        return cls(
+            summarizer=summarizer,
+            tail_turns=int(os.getenv('MEMORY_TAIL_TURNS', '3')),
+            update_every=int(os.getenv('MEMORY_UPDATE_EVERY', '4')),
+            background=os.getenv('MEMORY_BACKGROUND', '1') == '1',
+        )
+
+    def state(self) -> dict:
+        with self._lock:
+            return {'summary': self.summary, 'summarized_turns': self.summarized_turns}
+
+    def restore(self, state: dict):
+        with self._lock:
+            self.summary = state['summary']
+            self.summarized_turns = state['summarized_turns']
+
+    def tail(self, history: List[dict]) -> List[dict]:
+        """Turns not yet covered by the summary, at most a few more than ``tail_turns``."""
+        with self._lock:
+            return history[self.summarized_turns:]
+
+    def observe(self, history: List[dict]):
+        """Call after each turn; folds older turns into the summary every ``update_every`` turns."""
+        with self._lock:
+            if self._updating:
+                return
+            upto = len(history) - self.tail_turns
+            if upto - self.summarized_turns < self.update_every:
+                return
+            self._updating = True
+            start, summary = self.summarized_turns, self.summary
+        entries = list(history[start:upto])
+        if self.background:
+            _summary_pool.submit(self._update, summary, entries, upto)
+        else:
+            self._update(summary, entries, upto)
+
+    def _update(self, summary: str, entries: List[dict], upto: int):
+        try:
+            new_summary = self.summarizer(summary, entries, self.usage)
+            with self._lock:
+                self.summary = new_summary
+                self.summarized_turns = upto
+        finally:
+            with self._lock:
+                self._updating = False
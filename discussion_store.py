@@ -0,0 +1,79 @@
+"""Live discussions shared across worker processes.
+
+Each worker keeps the discussions it has served in its own SessionRegistry,
+and writes an incremental snapshot of each discussion to the shared
+SessionStore after every turn (see ``snapshot``), versioned by the number
+of turns. Before serving a turn a worker compares its copy's turn count
+with the stored version, a single indexed lookup, and reloads the
+discussion only when another worker has moved it on or it has never seen
+it, which is also how interviews resume after a restart or deploy.
+"""
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import snapshot
+from discussion import GroupDiscussion
+from session_registry import SessionRegistry
+from session_store import SessionStore
+
+KEY_PREFIX = 'discussion:'
+
+# Expired sessions are swept from the store once every this many saves
+SWEEP_EVERY = 500
+
+
+class SharedDiscussions:
+    def __init__(self, registry: SessionRegistry, store: SessionStore):
+        self.registry = registry
+        self.store = store
+        self._lock = threading.Lock()
+        self._loads = 0
+        self._saves = 0
+        self._save_errors = 0
+
+    def get(self, session_id: str) -> Optional[GroupDiscussion]:
+        local = self.registry.get(session_id)
+        try:
+            version = self.store.version(KEY_PREFIX + session_id)
+            if version is None or (local is not None and len(local.discussion_history) >= version):
+                return local
+            discussion = snapshot.load(self.store, KEY_PREFIX + session_id)
+        except Exception as e:
+            print(f"Error reading discussion {session_id} from the session store: {e}")
+            return local
+        if discussion is None:
+            return local
+        self.registry.put(session_id, discussion)
+        with self._lock:
+            self._loads += 1
+        return discussion
+
+    def put(self, session_id: str, discussion: GroupDiscussion):
+        self.registry.put(session_id, discussion)
+        self.save(session_id, discussion)
+
+    def save(self, session_id: str, discussion: GroupDiscussion):
+        """Snapshot the discussion after a turn, so the next turn can run on any worker."""
+        try:
+            snapshot.save(self.store, KEY_PREFIX + session_id, discussion)
+            with self._lock:
+                self._saves += 1
+                sweep = self._saves % SWEEP_EVERY == 0
+            if sweep:
+                self.store.sweep()
+        except Exception as e:
+            print(f"Error saving discussion {session_id} to the session store: {e}")
+            with self._lock:
+                self._save_errors += 1
+
+    def items(self) -> List[Tuple[str, Any]]:
+        """Discussions live in this worker."""
+        return self.registry.items()
+
+    def __len__(self) -> int:
+        return len(self.registry)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            counts = {'loads': self._loads, 'saves': self._saves, 'save_errors': self._save_errors}
+        return {**self.registry.stats(), **counts}
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import AsyncIterator, Iterator
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from prompt_builder import count_message_tokens, count_tokens
+
+
+FAKE_PLAN = {
+    "interview_type": "exploratory user research",
+    "key_topics": ["daily workflow", "pain points", "tools"],
+    "suggested_questions": [
+        "Could you walk me through a typical day?",
+        "What part of your work is most frustrating?"
+    ],
+    "personality_traits": ["curious", "patient"],
+    "communication_style": "casual and conversational",
+    "special_considerations": ["let the participant lead"]
+}
+
+# Plain replies are distinct questions, so repeated-question checks behave as with a real model
+_VOCABULARY = """
+    scanner battery aisle pallet shift handover supervisor picking route label printer forklift
+    inventory audit training manual headset dock freezer shelf barcode tablet wifi outage
+    target bonus break overtime rota safety glove ladder trolley carton return order
+""".split()
+FAKE_QUESTIONS = [
+    "Could you tell me more about " + " ".join(random.Random(seed).sample(_VOCABULARY, 4)) + "?"
+    for seed in range(256)
+]
+
+
+def _message_text(message) -> str:
+    if isinstance(message, dict):
+        return message.get('content', '')
+    return getattr(message, 'content', str(message))
+
+
+class FakeChatModel:
+    """Deterministic, offline stand-in for ChatOpenAI.
+
+    Sleeps for ``latency`` seconds per call and answers with ``reply`` (by
+    default, the next of a fixed sequence of distinct questions), or with a valid
+    interview plan when the prompt asks for one. When
+    ``reply_tokens`` is set, plain replies are padded to about that many
+    tokens. Prompt and completion tokens are counted like the real API would.
+    """
+
+    def __init__(self, latency: float = 0.5, reply: str = None, reply_tokens: int = 0, model_name: str = 'fake'):
+        self.latency = latency
+        self.model_name = model_name
+        self.replies = [reply] if reply else list(FAKE_QUESTIONS)
+        if reply_tokens:
+            self.replies = [self._pad(text, reply_tokens) for text in self.replies]
+        self._plain_replies = 0
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def usage(self) -> dict:
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'prompt_tokens': self.prompt_tokens,
+                'completion_tokens': self.completion_tokens,
+            }
+
+    def reset(self):
+        with self._lock:
+            self.calls = self.prompt_tokens = self.completion_tokens = 0
+
+    def invoke(self, messages, **kwargs) -> AIMessage:
+        time.sleep(self.latency)
+        return AIMessage(content=self._respond(messages))
+
+    async def ainvoke(self, messages, **kwargs) -> AIMessage:
+        await asyncio.sleep(self.latency)
+        return AIMessage(content=self._respond(messages))
+
+    def stream(self, messages, **kwargs) -> Iterator[AIMessageChunk]:
+        tokens = self._tokens(self._respond(messages))
+        for token in tokens:
+            time.sleep(self.latency / len(tokens))
+            yield AIMessageChunk(content=token)
+
+    async def astream(self, messages, **kwargs) -> AsyncIterator[AIMessageChunk]:
+        tokens = self._tokens(self._respond(messages))
+        for token in tokens:
+            await asyncio.sleep(self.latency / len(tokens))
+            yield AIMessageChunk(content=token)
+
+    def _respond(self, messages) -> str:
+        prompt = _message_text(messages[-1]) if messages else ''
+        if '"interview_type"' in prompt:
+            if '"initialization_message"' in prompt:
+                reply = json.dumps({**FAKE_PLAN, "initialization_message": "Session initialized."})
+            else:
+                reply = json.dumps(FAKE_PLAN)
+        else:
+            with self._lock:
+                reply = self.replies[self._plain_replies % len(self.replies)]
+                self._plain_replies += 1
+        prompt_tokens = count_message_tokens(messages)
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += count_tokens(reply)
+        return reply
+
+    @staticmethod
+    def _pad(reply: str, tokens: int) -> str:
+        filler = "Could you say a little more about how that affects your day"
+        words = reply.split(' ')
+        extra = filler.split(' ')
+        i = 0
+        while count_tokens(' '.join(words)) < tokens:
+            words.append(extra[i % len(extra)])
+            i += 1
+        return ' '.join(words)
+
+    @staticmethod
+    def _tokens(text: str) -> list[str]:
+        words = text.split(' ')
+        return [words[0]] + [' ' + word for word in words[1:]]
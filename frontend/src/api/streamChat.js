@@ -0,0 +1,62 @@
+// A fresh key for one message; resending the message with the same key
+// replays the server's answer instead of running the turn again.
+export const newIdempotencyKey = () => (
+  window.crypto?.randomUUID?.() ?? `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`
+);
+
+// Posts a message to /chat/stream and dispatches the server-sent events
+// as they arrive. Resolves with the interviewer's full reply. With an
+// idempotency key, a request lost to the network is retried once.
+export const streamChat = async (message, { onDeliberating, onToken, idempotencyKey } = {}) => {
+  const send = () => fetch('/chat/stream', {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      ...(idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {}),
+    },
+    credentials: 'include',
+    body: JSON.stringify({ message }),
+  });
+  let response;
+  try {
+    response = await send();
+  } catch (error) {
+    if (!idempotencyKey) throw error;
+    response = await send();
+  }
+  if (!response.ok || !response.body) {
+    throw new Error(`Stream request failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let finalMessage = '';
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      let data = '';
+      rawEvent.split('\n').forEach((line) => {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      });
+      const payload = data ? JSON.parse(data) : {};
+
+      if (event === 'deliberating') onDeliberating?.(payload);
+      else if (event === 'token') onToken?.(payload.text);
+      else if (event === 'done') finalMessage = payload.message;
+      else if (event === 'error') throw new Error(payload.error);
+    }
+  }
+
+  return finalMessage;
+};
@@ -0,0 +1,34 @@
+import axios from 'axios';
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+// Submits a recording for background transcription and polls for the text.
+// A poll waits at most a couple of seconds on the server, and only when it
+// reaches the worker running the job, so polls are also spaced out here.
+// Retries the submission while the server reports a full queue.
+export const transcribeInBackground = async (blob, { pollSeconds = 2, pollInterval = 1000, maxPolls = 150, maxSubmits = 3 } = {}) => {
+  const formData = new FormData();
+  formData.append('audio', blob, 'audio.wav');
+
+  let job;
+  for (let submit = 1; !job; submit += 1) {
+    try {
+      const response = await axios.post('/transcribe/jobs', formData, {
+        headers: { 'Content-Type': 'multipart/form-data' },
+      });
+      job = response.data;
+    } catch (error) {
+      if (error.response?.status !== 503 || submit >= maxSubmits) throw error;
+      const retryAfter = Number(error.response.headers['retry-after'] || 2);
+      await sleep(retryAfter * 1000);
+    }
+  }
+
+  for (let poll = 0; poll < maxPolls; poll += 1) {
+    const { data } = await axios.get(`/transcribe/jobs/${job.job_id}`, { params: { wait: pollSeconds } });
+    if (data.status === 'done') return data.text;
+    if (data.status === 'failed') throw new Error(data.error || 'Transcription failed');
+    await sleep(pollInterval);
+  }
+  throw new Error('Transcription timed out');
+};
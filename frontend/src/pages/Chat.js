@@ -9,6 +9,7 @@ import StopIcon from '@mui/icons-material/Stop';
 import { useReactMediaRecorder } from 'react-media-recorder';
 import { keyframes } from '@mui/system';
 import axios from 'axios';
+import { streamChat } from '../api/streamChat';
 
 // Keyframe animations
 const pulseAnimation = keyframes`
@@ -91,13 +92,19 @@ const Chat = () => {
     setIsLoading(true);
 
     try {
-      const response = await axios.post('/chat', {
-        message: userMessage
+      let streamedText = '';
+      await streamChat(userMessage, {
+        onToken: (text) => {
+          const isFirstToken = !streamedText;
+          streamedText += text;
+          if (isFirstToken) {
+            setIsLoading(false);
+            setMessages(prev => [...prev, { text: streamedText, isUser: false }]);
+          } else {
+            setMessages(prev => [...prev.slice(0, -1), { text: streamedText, isUser: false }]);
+          }
+        },
       });
-      
-      if (response.status === 200) {
-        setMessages(prev => [...prev, { text: response.data.message, isUser: false }]);
-      }
     } catch (error) {
       console.error('Error:', error);
       setMessages(prev => [...prev, { text: 'Error: Unable to get response', isUser: false }]);
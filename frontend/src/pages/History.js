@@ -1,35 +1,88 @@
-import React from 'react';
-import { Typography, Paper, List, ListItem, ListItemText, ListItemIcon } from '@mui/material';
+import React, { useState, useEffect } from 'react';
+import { Typography, Paper, List, ListItem, ListItemText, ListItemIcon, Button, TextField, Box } from '@mui/material';
 import ChatIcon from '@mui/icons-material/Chat';
+import SearchIcon from '@mui/icons-material/Search';
+import axios from 'axios';
 
 const History = () => {
-  // This is a placeholder. You'll need to implement actual history fetching from your backend
-  const mockHistory = [
-    { id: 1, topic: 'Research Discussion on AI Ethics', date: '2024-02-20' },
-    { id: 2, topic: 'Analysis of Climate Change Data', date: '2024-02-19' },
-    { id: 3, topic: 'Discussion on Renewable Energy', date: '2024-02-18' },
-  ];
+  const [sessions, setSessions] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [query, setQuery] = useState('');
+  const [results, setResults] = useState(null);
+
+  const loadSessions = async (before) => {
+    const { data } = await axios.get('/history', { params: { limit: 20, before } });
+    setSessions(prev => (before ? [...prev, ...data.sessions] : data.sessions));
+    setNextCursor(data.next_cursor);
+  };
+
+  useEffect(() => {
+    loadSessions().catch(error => console.error('Error loading history:', error));
+  }, []);
+
+  const handleSearch = async (e) => {
+    e.preventDefault();
+    if (!query.trim()) {
+      setResults(null);
+      return;
+    }
+    try {
+      const { data } = await axios.get('/history/search', { params: { q: query, limit: 20 } });
+      setResults(data.results);
+    } catch (error) {
+      console.error('Error searching history:', error);
+    }
+  };
 
   return (
     <div>
       <Typography variant="h4" gutterBottom>
         Chat History
       </Typography>
+      <Box component="form" onSubmit={handleSearch} sx={{ display: 'flex', gap: 1, mb: 2 }}>
+        <TextField
+          fullWidth
+          size="small"
+          placeholder="Search transcripts"
+          value={query}
+          onChange={(e) => setQuery(e.target.value)}
+        />
+        <Button type="submit" variant="contained" startIcon={<SearchIcon />}>
+          Search
+        </Button>
+      </Box>
       <Paper>
         <List>
-          {mockHistory.map((chat) => (
-            <ListItem button key={chat.id}>
-              <ListItemIcon>
-                <ChatIcon />
-              </ListItemIcon>
-              <ListItemText
-                primary={chat.topic}
-                secondary={new Date(chat.date).toLocaleDateString()}
-              />
-            </ListItem>
-          ))}
+          {results
+            ? results.map((turn) => (
+                <ListItem key={turn.id}>
+                  <ListItemIcon>
+                    <SearchIcon />
+                  </ListItemIcon>
+                  <ListItemText
+                    primary={turn.user_message}
+                    secondary={`${turn.response} · ${new Date(turn.created_at * 1000).toLocaleDateString()}`}
+                  />
+                </ListItem>
+              ))
+            : sessions.map((chat) => (
+                <ListItem button key={chat.session_id}>
+                  <ListItemIcon>
+                    <ChatIcon />
+                  </ListItemIcon>
+                  <ListItemText
+                    primary={chat.title}
+                    secondary={`${new Date(chat.created_at * 1000).toLocaleDateString()} · ${chat.turns} turns`}
+                  />
+                </ListItem>
+              ))}
         </List>
       </Paper>
+      {!results && nextCursor && (
+        <Button sx={{ mt: 2 }} onClick={() => loadSessions(nextCursor)}>
+          Load more
+        </Button>
+      )}
     </div>
   );
 };
@@ -5,7 +5,8 @@ import { useReactMediaRecorder } from 'react-media-recorder';
 import KeyboardIcon from '@mui/icons-material/Keyboard';
 import CloseIcon from '@mui/icons-material/Close';
 import MicIcon from '@mui/icons-material/Mic';
-import axios from 'axios';
+import { newIdempotencyKey, streamChat } from '../api/streamChat';
+import { transcribeInBackground } from '../api/transcribe';
 import { keyframes } from '@mui/system';
 
 // Keyframe animations
@@ -33,6 +34,8 @@ const MobileChat = () => {
   const [textMessage, setTextMessage] = useState('');
   const [isTypingEffect, setIsTypingEffect] = useState(false);
   const messagesEndRef = useRef(null);
+  // Key of the answer being sent; a repeat of the same answer reuses it
+  const pendingAnswerRef = useRef(null);
   const navigate = useNavigate();
   const theme = useTheme();
 
@@ -80,17 +83,28 @@ const MobileChat = () => {
   };
 
   const handleMessage = async (text) => {
+    // A double-tap or resend of the same answer is answered once by the server
+    if (pendingAnswerRef.current?.text !== text) {
+      pendingAnswerRef.current = { text, key: newIdempotencyKey() };
+    }
+    const { key } = pendingAnswerRef.current;
+
     // Save user's answer
     await handleNewMessage({ text, isUser: true });
 
     try {
-      const response = await axios.post('/chat', { message: text });
-      if (response.status === 200) {
-        await handleNewMessage({ 
-          text: response.data.message, 
-          isUser: false 
-        });
+      let streamedText = '';
+      const reply = await streamChat(text, {
+        idempotencyKey: key,
+        onToken: (token) => {
+          streamedText += token;
+          setCurrentQuestion({ text: streamedText, isUser: false });
+        },
+      });
+      if (pendingAnswerRef.current?.key === key) {
+        pendingAnswerRef.current = null;
       }
+      setAllMessages(prev => [...prev, { text: reply, isUser: false }]);
     } catch (error) {
       console.error('Error:', error);
       await handleNewMessage({ 
@@ -104,16 +118,11 @@ const MobileChat = () => {
   const { startRecording, stopRecording } = useReactMediaRecorder({
     audio: true,
     onStop: async (blobUrl, blob) => {
-      const formData = new FormData();
-      formData.append('audio', blob, 'audio.wav');
-      
       try {
-        const response = await axios.post('/transcribe', formData, {
-          headers: { 'Content-Type': 'multipart/form-data' },
-        });
+        const text = await transcribeInBackground(blob);
         
-        if (response.data.text) {
-          await handleMessage(response.data.text);
+        if (text) {
+          await handleMessage(text);
         }
       } catch (error) {
         console.error('Error transcribing audio:', error);
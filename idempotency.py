@@ -0,0 +1,280 @@
+"""Idempotency keys for chat turns.
+
+A client sends the same ``Idempotency-Key`` with every retry of one
+message. The first request with a key runs the turn; duplicates that
+arrive while it is running wait for that same computation, and duplicates
+that arrive afterwards get the stored result back. Either way a duplicate
+makes no LLM calls and adds nothing to the discussion history.
+
+Claims and results live in the shared session store, one row per key, so a
+retry is coalesced whichever worker it lands on. Every change to a row is
+a compare-and-put on its version: a claim, a result, a release. A slow
+owner can therefore never overwrite a newer claim. Duplicates on the
+owner's worker wait on the owner directly; duplicates on another worker
+poll the row.
+
+Keys are remembered with a fingerprint of the message, so reusing a key
+for a different message is refused rather than silently replayed. Only
+successful results are kept for replay; a failed turn releases its key so
+a retry runs it again. Duplicates wait at most ``IDEMPOTENCY_WAIT_TIMEOUT``
+for the first request, and a turn still in flight after that long is
+presumed abandoned (its request died without finishing it): its waiters
+get a timeout and the next retry claims the key again.
+
+Settings (environment):
+    IDEMPOTENCY_TTL           seconds a completed turn can be replayed (default 600)
+    IDEMPOTENCY_WAIT_TIMEOUT  seconds a duplicate waits for the turn in flight (default 300)
+    IDEMPOTENCY_POLL_INTERVAL seconds between checks on a turn running on another worker (default 0.2)
+"""
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from session_store import MemorySessionStore, SessionStore
+
+KEY_PREFIX = 'idempotency:'
+
+
+class IdempotencyConflict(Exception):
+    pass
+
+
+def fingerprint(*parts: str) -> str:
+    return hashlib.sha256('\x1f'.join(parts).encode()).hexdigest()
+
+
+class _Entry:
+    """A turn in flight that this worker runs (``owner``) or waits on."""
+
+    def __init__(self, fingerprint: str, version: int, claimed_at: float, owner: bool):
+        self.fingerprint = fingerprint
+        self.version = version
+        self.claimed_at = claimed_at
+        self.owner = owner
+        self.future = Future()
+
+
+class IdempotencyCache:
+    """Coalesces requests that share a key, across workers, and replays recent results."""
+
+    def __init__(self, store: SessionStore = None, ttl: float = 600.0, wait_timeout: float = 300.0,
+                 poll_interval: float = 0.2, clock: Callable[[], float] = time.time):
+        self.store = store or MemorySessionStore()
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Turns in flight by key, oldest claim first
+        self._in_flight: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._computed = 0
+        self._coalesced = 0
+        self._replayed = 0
+        self._conflicts = 0
+        self._abandoned = 0
+
+    @classmethod
+    def from_env(cls, store: SessionStore = None) -> "IdempotencyCache":
+        return cls(
+            store=store,
+            ttl=float(os.getenv('IDEMPOTENCY_TTL', '600')),
+            wait_timeout=float(os.getenv('IDEMPOTENCY_WAIT_TIMEOUT', '300')),
+            poll_interval=float(os.getenv('IDEMPOTENCY_POLL_INTERVAL', '0.2')),
+        )
+
+    def claim(self, key: str, fingerprint: str) -> Tuple[Future, bool]:
+        """The future holding ``key``'s result, and whether the caller must compute it."""
+        while True:
+            now = self._clock()
+            with self._lock:
+                abandoned = self._evict(now)
+                entry = self._in_flight.get(key)
+            self._abandon(abandoned)
+            if entry is not None:
+                self._check(entry.fingerprint, fingerprint)
+                with self._lock:
+                    self._coalesced += 1
+                return entry.future, False
+
+            stored = self.store.get(KEY_PREFIX + key)
+            expected = None
+            if stored is not None:
+                version, row = stored
+                self._check(row['fingerprint'], fingerprint)
+                if row['status'] == 'done' and now - row['at'] <= self.ttl:
+                    with self._lock:
+                        self._replayed += 1
+                    future = Future()
+                    future.set_result(row['result'])
+                    return future, False
+                if row['status'] == 'running' and now - row['at'] <= self.wait_timeout:
+                    return self._watch(key, fingerprint, version, row['at']), False
+                # Expired, released or abandoned: the key can be claimed again
+                expected = version
+
+            version = 0 if expected is None else expected + 1
+            claim = {'fingerprint': fingerprint, 'status': 'running', 'at': now}
+            if self.store.compare_and_put(KEY_PREFIX + key, claim, version, expected):
+                entry = _Entry(fingerprint, version, now, owner=True)
+                with self._lock:
+                    self._in_flight[key] = entry
+                    self._computed += 1
+                return entry.future, True
+            # Another request changed the row in between; look again
+
+    def finish(self, key: str, future: Future, result: Any, keep: bool = True):
+        """Hand ``result`` to every waiter on ``future``; keep it for replay unless ``keep`` is False."""
+        entry = self._release(key, future)
+        if entry is None:
+            # Evicted as abandoned; the key may already belong to a retry
+            return
+        row = {'fingerprint': entry.fingerprint, 'status': 'done', 'at': self._clock(), 'result': result}
+        self._write(key, entry, row if keep else None)
+        future.set_result(result)
+
+    def fail(self, key: str, future: Future, error: BaseException):
+        """Raise ``error`` in every waiter on ``future`` and release the key so a retry runs the turn again."""
+        entry = self._release(key, future)
+        if entry is None:
+            return
+        self._write(key, entry, None)
+        if not future.done():
+            future.set_exception(error)
+
+    def result(self, future: Future) -> Any:
+        """Wait for a claimed turn's result, at most ``wait_timeout`` seconds."""
+        try:
+            return future.result(timeout=self.wait_timeout)
+        except FutureTimeout:
+            raise TimeoutError("Timed out waiting for the original request for this message") from None
+
+    async def aresult(self, future: Future) -> Any:
+        try:
+            # Shielded: a timed-out waiter must not cancel the turn for everyone else
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.wait_timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError("Timed out waiting for the original request for this message") from None
+
+    def run(self, key: str, fingerprint: str, compute: Callable[[], Any],
+            keep: Callable[[Any], bool] = lambda result: True) -> Tuple[Any, bool]:
+        """``compute()`` once per key; returns the result and whether this call computed it."""
+        future, owner = self.claim(key, fingerprint)
+        if owner:
+            try:
+                result = compute()
+            except BaseException as e:
+                self.fail(key, future, e)
+                raise
+            self.finish(key, future, result, keep(result))
+            return result, True
+        return self.result(future), False
+
+    async def arun(self, key: str, fingerprint: str, compute: Callable[[], Awaitable[Any]],
+                   keep: Callable[[Any], bool] = lambda result: True) -> Tuple[Any, bool]:
+        future, owner = await asyncio.to_thread(self.claim, key, fingerprint)
+        if owner:
+            try:
+                result = await compute()
+            except BaseException as e:
+                await asyncio.to_thread(self.fail, key, future, e)
+                raise
+            await asyncio.to_thread(self.finish, key, future, result, keep(result))
+            return result, True
+        return await self.aresult(future), False
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'in_flight': sum(entry.owner for entry in self._in_flight.values()),
+                'waiting_remote': sum(not entry.owner for entry in self._in_flight.values()),
+                'computed': self._computed,
+                'coalesced': self._coalesced,
+                'replayed': self._replayed,
+                'conflicts': self._conflicts,
+                'abandoned': self._abandoned,
+            }
+
+    def _check(self, stored: str, fingerprint: str):
+        if stored != fingerprint:
+            with self._lock:
+                self._conflicts += 1
+            raise IdempotencyConflict("Idempotency key was already used for a different message")
+
+    def _watch(self, key: str, fingerprint: str, version: int, claimed_at: float) -> Future:
+        """A future for a turn another worker runs, resolved by polling its row."""
+        with self._lock:
+            entry = self._in_flight.get(key)
+            if entry is None:
+                entry = _Entry(fingerprint, version, claimed_at, owner=False)
+                self._in_flight[key] = entry
+                threading.Thread(target=self._poll, args=(key, entry), name='idempotency-poll', daemon=True).start()
+            self._coalesced += 1
+        return entry.future
+
+    def _poll(self, key: str, entry: _Entry):
+        while not entry.future.done():
+            time.sleep(self.poll_interval)
+            try:
+                stored = self.store.get(KEY_PREFIX + key)
+            except Exception as e:
+                print(f"Error reading idempotency key {key}: {e}")
+                continue
+            if stored is not None and stored[0] == entry.version:
+                if self._clock() - entry.claimed_at > self.wait_timeout:
+                    self._resolve(entry, TimeoutError("The original request for this message did not complete"))
+                continue
+            if stored is not None and stored[0] == entry.version + 1 and stored[1]['status'] == 'done':
+                self._resolve(entry, result=stored[1]['result'])
+            else:
+                self._resolve(entry, RuntimeError("The original request for this message did not complete"))
+        with self._lock:
+            if self._in_flight.get(key) is entry:
+                del self._in_flight[key]
+
+    @staticmethod
+    def _resolve(entry: _Entry, error: BaseException = None, result: Any = None):
+        if entry.future.done():
+            return
+        if error is not None:
+            entry.future.set_exception(error)
+        else:
+            entry.future.set_result(result)
+
+    def _release(self, key: str, future: Future) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._in_flight.get(key)
+            if entry is None or entry.future is not future:
+                return None
+            del self._in_flight[key]
+            return entry
+
+    def _write(self, key: str, entry: _Entry, row: Optional[dict]):
+        # The result, or a release so the next retry claims the key; lost if the key was claimed again
+        row = row or {'fingerprint': entry.fingerprint, 'status': 'released', 'at': self._clock()}
+        try:
+            self.store.compare_and_put(KEY_PREFIX + key, row, entry.version + 1, entry.version)
+        except Exception as e:
+            print(f"Error saving idempotency key {key}: {e}")
+
+    def _evict(self, now: float) -> list:
+        # Claims are ordered oldest first, so only the expired front of the queue is visited
+        abandoned = []
+        while self._in_flight:
+            key, entry = next(iter(self._in_flight.items()))
+            if now - entry.claimed_at <= self.wait_timeout:
+                break
+            self._in_flight.popitem(last=False)
+            abandoned.append((key, entry))
+        self._abandoned += len(abandoned)
+        return abandoned
+
+    def _abandon(self, abandoned: list):
+        for abandoned_key, entry in abandoned:
+            if entry.owner:
+                self._write(abandoned_key, entry, None)
+            self._resolve(entry, TimeoutError("The original request for this message did not complete"))
@@ -0,0 +1,366 @@
+"""Deadlines, bounded retries and hedging for LLM calls.
+
+Every model the router hands out is wrapped in ``ResilientChatModel``:
+
+- each attempt is bounded by ``LLM_CALL_TIMEOUT`` and by whatever is left
+  of the enclosing budget (see ``budget``), and fails with
+  ``DeadlineExceeded`` when that runs out;
+- transient errors (timeouts, dropped connections, rate limits, 5xx) are
+  retried with exponential backoff and full jitter, as long as the budget
+  leaves room for another attempt;
+- with hedging on, an attempt still running at the model's recent p95
+  latency gets a second, identical request, and whichever answers first
+  wins. Streams are not hedged; their deadline covers the first chunk.
+
+A synchronous attempt runs on a pool thread that cannot be interrupted, so
+each attempt also passes its deadline down as the HTTP timeout: an
+abandoned attempt gives its thread back when that runs out.
+
+Budgets nest and only ever tighten: a /chat turn or interview setup runs
+under ``TURN_BUDGET_SECONDS``, and a model route's deadline runs inside it.
+
+Settings (environment):
+    LLM_CALL_TIMEOUT       seconds one attempt may take (default 30)
+    LLM_MAX_RETRIES        retries after a transient error (default 2)
+    LLM_RETRY_BACKOFF      first backoff in seconds, doubled per retry (default 0.5)
+    LLM_HEDGE              "1" to hedge attempts slower than the p95 (default 0)
+    LLM_HEDGE_MIN_SAMPLES  successful calls observed before hedging starts (default 20)
+    LLM_CALL_WORKERS       threads for synchronous calls (default 64); with hedging
+                           on, one call can hold two, so allow two per request in flight
+    TURN_BUDGET_SECONDS    seconds all LLM calls of one turn or setup may take, 0 for no limit (default 0)
+"""
+import asyncio
+import contextvars
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import httpx
+import openai
+
+import metrics
+
+TURN_BUDGET_SECONDS = float(os.getenv('TURN_BUDGET_SECONDS', '0'))
+
+# Recent successful latencies kept per model for the hedging threshold
+LATENCY_WINDOW = 200
+
+_call_pool = ThreadPoolExecutor(max_workers=int(os.getenv('LLM_CALL_WORKERS', '64')),
+                                thread_name_prefix='llm-call')
+
+# Absolute time.monotonic() by which the calls of the current block must finish
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar('llm_call_deadline', default=None)
+
+_TRANSIENT_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+    httpx.TimeoutException,
+    httpx.TransportError,
+)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+@contextmanager
+def budget(seconds: float = None, share: float = None):
+    """Bound the LLM calls inside the block by ``seconds`` from now, or by ``share`` of what remains.
+
+    Without either, or when neither is set, the enclosing budget applies unchanged.
+    """
+    current = _deadline.get()
+    now = time.monotonic()
+    if seconds:
+        deadline = now + seconds
+    elif share and current is not None:
+        deadline = now + max(0.0, current - now) * share
+    else:
+        deadline = None
+    if deadline is None:
+        yield
+        return
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def turn_budget():
+    """The budget for one /chat turn or interview setup."""
+    return budget(TURN_BUDGET_SECONDS)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the enclosing budget, or None when there is none."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def is_transient(error: Exception) -> bool:
+    if isinstance(error, (DeadlineExceeded, *_TRANSIENT_ERRORS)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code in (408, 409, 429)
+
+
+class CallStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {
+            'calls': 0,
+            'attempts': 0,
+            'retries': 0,
+            'hedges': 0,
+            'hedge_wins': 0,
+            'deadline_exceeded': 0,
+            'failed': 0,
+        }
+
+    def count(self, name: str, route: str = None, model: str = None):
+        with self._lock:
+            self._counts[name] += 1
+        if name == 'retries':
+            metrics.llm_retries.labels(route, model).inc()
+        elif name == 'hedges':
+            metrics.llm_hedges.labels(route, model).inc()
+        elif name == 'hedge_wins':
+            metrics.llm_hedge_wins.labels(route, model).inc()
+        elif name == 'deadline_exceeded':
+            metrics.llm_deadline_exceeded.labels(route, model).inc()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts = dict(self._counts)
+        return {
+            **counts,
+            'retry_rate': counts['retries'] / counts['calls'] if counts['calls'] else 0.0,
+            'hedge_rate': counts['hedges'] / counts['calls'] if counts['calls'] else 0.0,
+        }
+
+
+stats = CallStats()
+
+
+class ResilientChatModel:
+    """Wraps one chat model with per-attempt deadlines, retries and optional hedging."""
+
+    def __init__(self, llm, route: str, model: str, timeout: float = 30.0, max_retries: int = 2,
+                 backoff: float = 0.5, hedge: bool = False, hedge_min_samples: int = 20):
+        self.llm = llm
+        self.route = route
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, llm, route: str, model: str) -> "ResilientChatModel":
+        return cls(
+            llm, route, model,
+            timeout=float(os.getenv('LLM_CALL_TIMEOUT', '30')),
+            max_retries=int(os.getenv('LLM_MAX_RETRIES', '2')),
+            backoff=float(os.getenv('LLM_RETRY_BACKOFF', '0.5')),
+            hedge=os.getenv('LLM_HEDGE', '0') == '1',
+            hedge_min_samples=int(os.getenv('LLM_HEDGE_MIN_SAMPLES', '20')),
+        )
+
+    def invoke(self, messages, **kwargs):
+        stats.count('calls')
+        for attempt in range(self.max_retries + 1):
+            timeout = self._attempt_timeout()
+            try:
+                return self._invoke_once(messages, kwargs, timeout)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+
+    async def ainvoke(self, messages, **kwargs):
+        stats.count('calls')
+        for attempt in range(self.max_retries + 1):
+            timeout = self._attempt_timeout()
+            try:
+                return await self._ainvoke_once(messages, kwargs, timeout)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+
+    def stream(self, messages, **kwargs):
+        stats.count('calls')
+        for attempt in range(self.max_retries + 1):
+            timeout = self._attempt_timeout()
+            chunks = iter(self.llm.stream(messages, timeout=timeout, **kwargs))
+            stats.count('attempts')
+            future = _call_pool.submit(next, chunks, None)
+            try:
+                first = self._within(future, timeout)
+                break
+            except Exception as e:
+                # The stream cannot be closed while next() runs on it; close it once that returns
+                future.add_done_callback(lambda _, chunks=chunks: _close(chunks))
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+        if first is not None:
+            yield first
+        yield from chunks
+
+    async def astream(self, messages, **kwargs):
+        stats.count('calls')
+        for attempt in range(self.max_retries + 1):
+            timeout = self._attempt_timeout()
+            chunks = self.llm.astream(messages, timeout=timeout, **kwargs)
+            stats.count('attempts')
+            try:
+                first = await asyncio.wait_for(chunks.__anext__(), timeout)
+                break
+            except StopAsyncIteration:
+                first = None
+                break
+            except Exception as e:
+                await chunks.aclose()
+                if isinstance(e, asyncio.TimeoutError):
+                    e = self._deadline_exceeded(timeout)
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise e
+                await asyncio.sleep(delay)
+        if first is not None:
+            yield first
+        async for chunk in chunks:
+            yield chunk
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    def _invoke_once(self, messages, kwargs: dict, timeout: float):
+        start = time.monotonic()
+        submit = lambda: _call_pool.submit(self.llm.invoke, messages, timeout=timeout, **kwargs)
+        stats.count('attempts')
+        first = submit()
+        futures = [first]
+        hedge_after = self._hedge_after(timeout)
+        if hedge_after is not None and not wait(futures, timeout=hedge_after).done:
+            stats.count('hedges', self.route, self.model)
+            futures.append(submit())
+        error = None
+        try:
+            while futures:
+                done, pending = wait(futures, timeout=max(0.0, timeout - (time.monotonic() - start)),
+                                     return_when=FIRST_COMPLETED)
+                if not done:
+                    raise self._deadline_exceeded(timeout)
+                for future in done:
+                    if future.exception() is None:
+                        if future is not first:
+                            stats.count('hedge_wins', self.route, self.model)
+                        self._observe(time.monotonic() - start)
+                        return future.result()
+                    error = future.exception()
+                futures = list(pending)
+            raise error
+        finally:
+            # Attempts still queued are dropped; running ones end at their HTTP timeout
+            for future in futures:
+                future.cancel()
+
+    async def _ainvoke_once(self, messages, kwargs: dict, timeout: float):
+        start = time.monotonic()
+        submit = lambda: asyncio.ensure_future(self.llm.ainvoke(messages, timeout=timeout, **kwargs))
+        stats.count('attempts')
+        first = submit()
+        tasks = {first}
+        try:
+            hedge_after = self._hedge_after(timeout)
+            if hedge_after is not None:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+                if not done:
+                    stats.count('hedges', self.route, self.model)
+                    tasks.add(submit())
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, timeout=max(0.0, timeout - (time.monotonic() - start)),
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise self._deadline_exceeded(timeout)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            stats.count('hedge_wins', self.route, self.model)
+                        self._observe(time.monotonic() - start)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # The losing request, or every request on a deadline, is abandoned
+            for task in tasks:
+                task.cancel()
+
+    def _within(self, future, timeout: float):
+        done, _ = wait([future], timeout=timeout)
+        if not done:
+            raise self._deadline_exceeded(timeout)
+        return future.result()
+
+    def _attempt_timeout(self) -> float:
+        left = remaining()
+        timeout = self.timeout if left is None else min(self.timeout, left)
+        if timeout <= 0:
+            raise self._deadline_exceeded(0.0)
+        return timeout
+
+    def _deadline_exceeded(self, timeout: float) -> DeadlineExceeded:
+        stats.count('deadline_exceeded', self.route, self.model)
+        return DeadlineExceeded(f"{self.model} did not answer within {timeout:.2f}s")
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying ``error``, or None when it should not be retried."""
+        if attempt >= self.max_retries or not is_transient(error):
+            stats.count('failed')
+            return None
+        delay = random.uniform(0, self.backoff * 2 ** attempt)
+        left = remaining()
+        if left is not None and left <= delay:
+            stats.count('failed')
+            return None
+        print(f"Retrying {self.model} ({self.route}) after {type(error).__name__}: {error}")
+        stats.count('retries', self.route, self.model)
+        return delay
+
+    def _hedge_after(self, timeout: float) -> Optional[float]:
+        if not self.hedge:
+            return None
+        with self._lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            threshold = metrics.percentile(list(self._latencies), 95)
+        return threshold if threshold < timeout else None
+
+    def _observe(self, seconds: float):
+        with self._lock:
+            self._latencies.append(seconds)
+
+
+def _close(chunks):
+    close = getattr(chunks, 'close', None)
+    if close is not None:
+        try:
+            close()
+        except Exception as e:
+            print(f"Error closing an abandoned stream: {e}")
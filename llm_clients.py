@@ -0,0 +1,95 @@
+"""Process-wide factory for shared chat model clients.
+
+Agents borrow clients from here instead of building their own, so every
+turn reuses the same warm HTTP connection pool. Clients are keyed by model
+and temperature; all of them share one bounded pool per process.
+
+Settings (environment):
+    LLM_MAX_CONNECTIONS   maximum concurrent requests to the API (default 50)
+    LLM_MAX_KEEPALIVE     idle keep-alive connections kept open (default 20)
+    LLM_KEEPALIVE_EXPIRY  seconds an idle connection is kept (default 30)
+    LLM_BACKEND           "openai" (default) or "fake" for offline runs
+    FAKE_LLM_LATENCY      seconds per call of the fake backend (default 0.5)
+    FAKE_LLM_LATENCIES    JSON of {model: seconds} overriding FAKE_LLM_LATENCY per model
+    FAKE_LLM_REPLY_TOKENS approximate length of the fake backend's replies (default: short fixed reply)
+"""
+import json
+import os
+import threading
+from typing import Any, Dict, Tuple
+
+import httpx
+import openai
+from langchain_community.chat_models import ChatOpenAI
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+DEFAULT_TEMPERATURE = 0.7
+
+_lock = threading.Lock()
+_models: Dict[Tuple[str, float], Any] = {}
+_http_client = None
+_async_http_client = None
+
+
+def get_chat_model(model_name: str = DEFAULT_MODEL, temperature: float = DEFAULT_TEMPERATURE):
+    """Return the shared chat model for ``model_name`` at ``temperature``."""
+    key = (model_name, float(temperature))
+    with _lock:
+        llm = _models.get(key)
+        if llm is None:
+            llm = _create_chat_model(model_name, temperature)
+            _models[key] = llm
+        return llm
+
+
+def cached_models() -> list:
+    """Every client created so far, e.g. to read the fake backend's usage counters."""
+    with _lock:
+        return list(_models.values())
+
+
+def close_clients():
+    """Close the shared connection pools and forget every cached client."""
+    global _http_client, _async_http_client
+    with _lock:
+        if _http_client is not None:
+            _http_client.close()
+        _models.clear()
+        _http_client = None
+        # The async pool is bound to the loop that used it; let it be collected
+        _async_http_client = None
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=int(os.getenv('LLM_MAX_CONNECTIONS', '50')),
+        max_keepalive_connections=int(os.getenv('LLM_MAX_KEEPALIVE', '20')),
+        keepalive_expiry=float(os.getenv('LLM_KEEPALIVE_EXPIRY', '30')),
+    )
+
+
+def _create_chat_model(model_name: str, temperature: float):
+    if os.getenv('LLM_BACKEND', 'openai') == 'fake':
+        from fake_llm import FakeChatModel
+        latencies = json.loads(os.getenv('FAKE_LLM_LATENCIES', '{}'))
+        return FakeChatModel(
+            latency=float(latencies.get(model_name, os.getenv('FAKE_LLM_LATENCY', '0.5'))),
+            reply_tokens=int(os.getenv('FAKE_LLM_REPLY_TOKENS', '0')),
+            model_name=model_name,
+        )
+
+    global _http_client, _async_http_client
+    if _http_client is None:
+        _http_client = httpx.Client(limits=_pool_limits())
+        _async_http_client = httpx.AsyncClient(limits=_pool_limits())
+
+    api_key = os.getenv('OPENAI_API_KEY')
+    return ChatOpenAI(
+        temperature=temperature,
+        model_name=model_name,
+        openai_api_key=api_key,
+        # Retries are llm_calls' job, within the caller's deadline
+        client=openai.OpenAI(api_key=api_key, http_client=_http_client, max_retries=0).chat.completions,
+        async_client=openai.AsyncOpenAI(api_key=api_key, http_client=_async_http_client,
+                                        max_retries=0).chat.completions,
+    )
@@ -0,0 +1,301 @@
+"""Process-wide metrics in the Prometheus text exposition format.
+
+A small dependency-free registry of counters, gauges and histograms. Label
+sets are resolved to a child once and cached, and every update is a single
+locked increment, so instrumentation can stay on under load. Values that
+already live elsewhere (session counts, cache and queue stats) are read at
+scrape time by collectors instead of being tracked twice.
+"""
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import tracing
+from prompt_builder import count_message_tokens, count_tokens
+
+# Seconds; covers fast routes up to multi-agent turns and slow transcriptions
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def percentile(values: list, q: float) -> float:
+    """Nearest-rank percentile of ``values`` for ``q`` in [0, 100]."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+
+class _Value:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_labels(self.label_names, values)} {child.value:g}"]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, amount: float = 1):
+        self.labels().dec(amount)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class _HistogramValue:
+    __slots__ = ('counts', 'sum', 'count', '_lock', '_buckets')
+
+    def __init__(self, buckets):
+        self._buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            if index < len(self.counts):
+                self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _render_child(self, values, child):
+        with child._lock:
+            counts, total, count = list(child.counts), child.sum, child.count
+        labels = _labels(self.label_names, values)
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            le = 'le="%g"' % bound
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, values, le)} {cumulative}")
+        inf = 'le="+Inf"'
+        lines.append(f"{self.name}_bucket{_labels(self.label_names, values, inf)} {count}")
+        lines.append(f"{self.name}_sum{labels} {total:g}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: Dict[str, Callable[[], Dict[str, float]]] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, prefix: str, collect: Callable[[], Dict[str, float]]):
+        """Expose numeric values of ``collect()`` as gauges named ``<prefix>_<key>`` at scrape time."""
+        self._collectors[prefix] = collect
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for prefix, collect in self._collectors.items():
+            try:
+                values = collect()
+            except Exception as e:
+                print(f"Error collecting {prefix} metrics: {e}")
+                continue
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                lines.append(f"# TYPE {prefix}_{key} gauge")
+                lines.append(f"{prefix}_{key} {value:g}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    'http_requests_total', 'HTTP requests by route, method and status.', ('route', 'method', 'status')))
+http_latency = registry.register(Histogram(
+    'http_request_duration_seconds', 'HTTP request latency until the response is returned.', ('route', 'method')))
+http_in_flight = registry.register(Gauge(
+    'http_requests_in_flight', 'HTTP requests currently being handled.'))
+llm_calls = registry.register(Counter(
+    'llm_calls_total', 'LLM calls by agent and outcome.', ('agent', 'outcome')))
+llm_latency = registry.register(Histogram(
+    'llm_call_duration_seconds', 'LLM call latency by agent.', ('agent',)))
+llm_in_flight = registry.register(Gauge(
+    'llm_calls_in_flight', 'LLM calls currently waiting on the API, by agent.', ('agent',)))
+llm_prompt_tokens = registry.register(Counter(
+    'llm_prompt_tokens_total', 'Prompt tokens sent, by agent (local estimate).', ('agent',)))
+llm_completion_tokens = registry.register(Counter(
+    'llm_completion_tokens_total', 'Completion tokens received, by agent (local estimate).', ('agent',)))
+route_calls = registry.register(Counter(
+    'llm_route_calls_total', 'LLM calls by model route, serving model and outcome.', ('route', 'model', 'outcome')))
+route_latency = registry.register(Histogram(
+    'llm_route_duration_seconds', 'LLM call latency by model route and serving model.', ('route', 'model')))
+route_deadline_misses = registry.register(Counter(
+    'llm_route_deadline_misses_total', 'Calls that missed their route deadline, by primary model.', ('route', 'model')))
+route_quality = registry.register(Counter(
+    'llm_route_quality_signals_total', 'Quality problems by model route, serving model and signal.',
+    ('route', 'model', 'signal')))
+llm_retries = registry.register(Counter(
+    'llm_call_retries_total', 'LLM call retries after transient errors.', ('route', 'model')))
+llm_hedges = registry.register(Counter(
+    'llm_call_hedges_total', 'Hedged second requests sent for slow LLM calls.', ('route', 'model')))
+llm_hedge_wins = registry.register(Counter(
+    'llm_call_hedge_wins_total', 'Hedged requests that answered before the original.', ('route', 'model')))
+llm_deadline_exceeded = registry.register(Counter(
+    'llm_call_deadline_exceeded_total', 'LLM call attempts cut off by their deadline.', ('route', 'model')))
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def render() -> str:
+    return registry.render()
+
+
+def observe_request(route: str, method: str, status: int, seconds: float):
+    http_requests.labels(route, method, str(status)).inc()
+    http_latency.labels(route, method).observe(seconds)
+
+
+class InstrumentedChatModel:
+    """Wraps a chat model and records latency, tokens and errors under an agent name."""
+
+    def __init__(self, llm, agent: str):
+        self.llm = llm
+        self.agent = agent
+        self._latency = llm_latency.labels(agent)
+        self._in_flight = llm_in_flight.labels(agent)
+        self._prompt_tokens = llm_prompt_tokens.labels(agent)
+        self._completion_tokens = llm_completion_tokens.labels(agent)
+
+    def invoke(self, messages, **kwargs):
+        with self._call(messages) as record:
+            response = self.llm.invoke(messages, **kwargs)
+            record(response.content)
+        return response
+
+    async def ainvoke(self, messages, **kwargs):
+        with self._call(messages) as record:
+            response = await self.llm.ainvoke(messages, **kwargs)
+            record(response.content)
+        return response
+
+    def stream(self, messages, **kwargs):
+        with self._call(messages) as record:
+            parts = []
+            for chunk in self.llm.stream(messages, **kwargs):
+                parts.append(chunk.content)
+                yield chunk
+            record(''.join(parts))
+
+    async def astream(self, messages, **kwargs):
+        with self._call(messages) as record:
+            parts = []
+            async for chunk in self.llm.astream(messages, **kwargs):
+                parts.append(chunk.content)
+                yield chunk
+            record(''.join(parts))
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    @contextmanager
+    def _call(self, messages):
+        start = time.perf_counter()
+        self._in_flight.inc()
+        outcome = 'error'
+
+        def record(completion: str):
+            nonlocal outcome
+            outcome = 'ok'
+            self._completion_tokens.inc(count_tokens(completion))
+
+        try:
+            with tracing.span('llm_call', agent=self.agent):
+                yield record
+        finally:
+            self._in_flight.dec()
+            self._latency.observe(time.perf_counter() - start)
+            llm_calls.labels(self.agent, outcome).inc()
+            self._prompt_tokens.inc(count_message_tokens(messages))
+
+
+def instrument(llm, agent: str) -> InstrumentedChatModel:
+    return llm if isinstance(llm, InstrumentedChatModel) else InstrumentedChatModel(llm, agent)
@@ -0,0 +1,299 @@
+"""Per-role model routing with latency deadlines.
+
+Each agent asks for a model by route rather than by name:
+
+    lead         the Lead Interviewer, whose words the interviewee reads
+    auxiliary    the Completeness Analyst and Depth Explorer
+    interviewer  the single-agent InterviewAgent
+    planner      PlanningAgent
+    summarizer   DiscussionMemory's rolling summary
+
+Every route defaults to the shared default model. A route may set a
+``deadline`` in seconds and a ``fallback`` model: when the primary model
+has not answered (or, for streams, sent its first token) by the deadline,
+the call is answered by the fallback instead; both run under the
+deadline, retry and hedging policy of ``llm_calls``. Latency, deadline misses,
+fallbacks and quality signals (empty replies, repeated questions,
+unparseable plans) are recorded per route and model.
+
+Settings (environment):
+    MODEL_ROUTES  JSON of {route: {"model", "temperature", "deadline", "fallback"}}
+
+    MODEL_ROUTES='{"lead": {"model": "gpt-4-turbo-preview", "deadline": 8, "fallback": "gpt-3.5-turbo"}}'
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import llm_calls
+import metrics
+from llm_calls import DeadlineExceeded, ResilientChatModel
+from llm_clients import DEFAULT_MODEL, DEFAULT_TEMPERATURE, get_chat_model
+
+ROUTES = ('lead', 'auxiliary', 'interviewer', 'planner', 'summarizer')
+
+# Latencies kept per route and model for percentiles
+LATENCY_WINDOW = 512
+
+# (route, model) that served the most recent call in this thread or task
+_last_served: contextvars.ContextVar[Optional[Tuple[str, str]]] = contextvars.ContextVar(
+    'model_router_last_served', default=None)
+
+
+@dataclass
+class Route:
+    model: str = DEFAULT_MODEL
+    temperature: float = DEFAULT_TEMPERATURE
+    deadline: float = 0.0
+    fallback: Optional[str] = None
+
+
+class RouteStats:
+    """Latency, deadline and quality counters per route and model."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models: Dict[Tuple[str, str], Dict] = {}
+
+    def _entry(self, route: str, model: str) -> Dict:
+        return self._models.setdefault((route, model), {
+            'calls': 0,
+            'errors': 0,
+            'deadline_misses': 0,
+            'fallbacks': 0,
+            'latencies': deque(maxlen=LATENCY_WINDOW),
+            'quality': {},
+        })
+
+    def record_call(self, route: str, model: str, seconds: float, ok: bool = True):
+        with self._lock:
+            entry = self._entry(route, model)
+            entry['calls'] += 1
+            if ok:
+                entry['latencies'].append(seconds)
+            else:
+                entry['errors'] += 1
+        metrics.route_calls.labels(route, model, 'ok' if ok else 'error').inc()
+        if ok:
+            metrics.route_latency.labels(route, model).observe(seconds)
+
+    def record_deadline_miss(self, route: str, model: str, fallback: Optional[str]):
+        with self._lock:
+            self._entry(route, model)['deadline_misses'] += 1
+            if fallback:
+                self._entry(route, fallback)['fallbacks'] += 1
+        metrics.route_deadline_misses.labels(route, model).inc()
+
+    def record_quality(self, route: str, model: str, signal: str):
+        with self._lock:
+            quality = self._entry(route, model)['quality']
+            quality[signal] = quality.get(signal, 0) + 1
+        metrics.route_quality.labels(route, model, signal).inc()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            entries = {key: {**entry, 'latencies': list(entry['latencies']), 'quality': dict(entry['quality'])}
+                       for key, entry in self._models.items()}
+        routes: Dict[str, Dict] = {}
+        for (route, model), entry in sorted(entries.items()):
+            latencies = entry.pop('latencies')
+            quality = entry.pop('quality')
+            calls = entry['calls']
+            routes.setdefault(route, {})[model] = {
+                **entry,
+                'p50_s': round(metrics.percentile(latencies, 50), 4),
+                'p95_s': round(metrics.percentile(latencies, 95), 4),
+                'quality': quality,
+                'quality_rates': {signal: count / calls for signal, count in quality.items()} if calls else {},
+            }
+        return routes
+
+
+class RoutedChatModel:
+    """Chat model for one route; calls the fallback model when the primary misses its deadline."""
+
+    def __init__(self, name: str, route: Route, stats: RouteStats):
+        self.name = name
+        self.route = route
+        self.stats = stats
+        self.primary = ResilientChatModel.from_env(get_chat_model(route.model, route.temperature), name, route.model)
+        self.fallback = None
+        if route.fallback:
+            self.fallback = ResilientChatModel.from_env(
+                get_chat_model(route.fallback, route.temperature), name, route.fallback)
+
+    @property
+    def model_name(self) -> str:
+        """The model that served this thread's or task's last call on this route."""
+        served = _last_served.get()
+        if served is not None and served[0] == self.name:
+            return served[1]
+        return self.route.model
+
+    def invoke(self, messages, **kwargs):
+        try:
+            with llm_calls.budget(self.route.deadline):
+                return self._call(self.route.model, lambda: self.primary.invoke(messages, **kwargs))
+        except DeadlineExceeded:
+            if not self._can_fall_back():
+                raise
+        self._missed_deadline()
+        return self._call(self.route.fallback, lambda: self.fallback.invoke(messages, **kwargs))
+
+    async def ainvoke(self, messages, **kwargs):
+        try:
+            with llm_calls.budget(self.route.deadline):
+                return await self._acall(self.route.model, self.primary.ainvoke(messages, **kwargs))
+        except DeadlineExceeded:
+            if not self._can_fall_back():
+                raise
+        self._missed_deadline()
+        return await self._acall(self.route.fallback, self.fallback.ainvoke(messages, **kwargs))
+
+    def stream(self, messages, **kwargs):
+        # The deadline applies to the first chunk; once tokens flow the stream runs to the end
+        start, model = time.perf_counter(), self.route.model
+        try:
+            chunks = iter(self.primary.stream(messages, **kwargs))
+            try:
+                with llm_calls.budget(self.route.deadline):
+                    first = next(chunks, None)
+            except DeadlineExceeded:
+                if not self._can_fall_back():
+                    raise
+                self._missed_deadline()
+                start, model = time.perf_counter(), self.route.fallback
+                chunks = iter(self.fallback.stream(messages, **kwargs))
+                first = next(chunks, None)
+            parts = []
+            for chunk in self._prepend(first, chunks):
+                parts.append(chunk.content)
+                yield chunk
+        except Exception:
+            self.stats.record_call(self.name, model, time.perf_counter() - start, ok=False)
+            raise
+        self._record(model, ''.join(parts), time.perf_counter() - start)
+
+    async def astream(self, messages, **kwargs):
+        start, model = time.perf_counter(), self.route.model
+        try:
+            chunks = self.primary.astream(messages, **kwargs)
+            try:
+                with llm_calls.budget(self.route.deadline):
+                    first = await anext(chunks, None)
+            except DeadlineExceeded:
+                if not self._can_fall_back():
+                    raise
+                self._missed_deadline()
+                start, model = time.perf_counter(), self.route.fallback
+                chunks = self.fallback.astream(messages, **kwargs)
+                first = await anext(chunks, None)
+            parts = []
+            if first is not None:
+                parts.append(first.content)
+                yield first
+            async for chunk in chunks:
+                parts.append(chunk.content)
+                yield chunk
+        except Exception:
+            self.stats.record_call(self.name, model, time.perf_counter() - start, ok=False)
+            raise
+        self._record(model, ''.join(parts), time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self.primary, name)
+
+    def _can_fall_back(self) -> bool:
+        # Not when the turn's own budget is what ran out
+        left = llm_calls.remaining()
+        return self.fallback is not None and (left is None or left > 0)
+
+    def _missed_deadline(self):
+        print(f"{self.name} route: {self.route.model} missed its {self.route.deadline}s deadline, "
+              f"falling back to {self.route.fallback}")
+        self.stats.record_deadline_miss(self.name, self.route.model, self.route.fallback)
+
+    def _call(self, model: str, call):
+        start = time.perf_counter()
+        try:
+            response = call()
+        except Exception:
+            self.stats.record_call(self.name, model, time.perf_counter() - start, ok=False)
+            raise
+        return self._served(model, response, time.perf_counter() - start)
+
+    async def _acall(self, model: str, call):
+        start = time.perf_counter()
+        try:
+            response = await call
+        except Exception:
+            self.stats.record_call(self.name, model, time.perf_counter() - start, ok=False)
+            raise
+        return self._served(model, response, time.perf_counter() - start)
+
+    def _served(self, model: str, response, seconds: float):
+        self._record(model, response.content, seconds)
+        return response
+
+    def _record(self, model: str, content: str, seconds: float):
+        _last_served.set((self.name, model))
+        self.stats.record_call(self.name, model, seconds)
+        if not content or not content.strip():
+            self.stats.record_quality(self.name, model, 'empty_reply')
+
+    @staticmethod
+    def _prepend(first, chunks):
+        if first is not None:
+            yield first
+        yield from chunks
+
+
+class ModelRouter:
+    def __init__(self, routes: Dict[str, Route] = None):
+        self.routes = {name: Route() for name in ROUTES}
+        self.routes.update(routes or {})
+        self.stats = RouteStats()
+        self._models: Dict[str, RoutedChatModel] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ModelRouter":
+        config = json.loads(os.getenv('MODEL_ROUTES', '{}'))
+        unknown = set(config) - set(ROUTES)
+        if unknown:
+            raise ValueError(f"Unknown model routes in MODEL_ROUTES: {', '.join(sorted(unknown))}")
+        return cls({name: Route(**settings) for name, settings in config.items()})
+
+    def model_for(self, route: str) -> RoutedChatModel:
+        """The shared routed model for ``route``."""
+        with self._lock:
+            model = self._models.get(route)
+            if model is None:
+                model = RoutedChatModel(route, self.routes[route], self.stats)
+                self._models[route] = model
+            return model
+
+    def snapshot(self) -> Dict:
+        return {
+            'routes': {name: vars(route) for name, route in self.routes.items()},
+            'stats': self.stats.snapshot(),
+        }
+
+
+router = ModelRouter.from_env()
+
+
+def get_routed_model(route: str) -> RoutedChatModel:
+    return router.model_for(route)
+
+
+def record_quality(signal: str):
+    """Count a quality problem against the route and model that served this thread's or task's last call."""
+    served = _last_served.get()
+    if served is not None:
+        router.stats.record_quality(*served, signal)
@@ -0,0 +1,128 @@
+"""Content-addressed cache for interview planning results.
+
+Keys are hashes of the normalized planning inputs plus the model settings,
+so researchers reusing the same context/background/goals skip the planning
+LLM calls entirely. Entries live in an in-memory LRU tier and, when a
+database path is configured, in a SQLite tier shared across workers and
+restarts.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+
+def normalize(text: str) -> str:
+    return ' '.join(str(text).split())
+
+
+def make_key(*parts) -> str:
+    """Hash ``parts`` (strings, numbers or JSON-able values) into a cache key."""
+    normalized = [normalize(part) if isinstance(part, str) else part for part in parts]
+    payload = json.dumps(normalized, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class PlanCache:
+    def __init__(self, max_entries: int = 256, ttl: float = 86400.0,
+                 db_path: Optional[str] = None, max_disk_entries: int = 10000,
+                 clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._stats = {
+            'memory_hits': 0, 'disk_hits': 0, 'misses': 0,
+            'sets': 0, 'evictions': 0, 'expirations': 0,
+        }
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS plan_cache ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS plan_cache_created ON plan_cache (created_at)')
+            self._db.commit()
+
+    @classmethod
+    def from_env(cls) -> "PlanCache":
+        return cls(
+            max_entries=int(os.getenv('PLAN_CACHE_SIZE', '256')),
+            ttl=float(os.getenv('PLAN_CACHE_TTL', '86400')),
+            db_path=os.getenv('PLAN_CACHE_DB') or None,
+            max_disk_entries=int(os.getenv('PLAN_CACHE_DISK_ENTRIES', '10000')),
+        )
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = self._clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if now - created_at <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self._stats['memory_hits'] += 1
+                    return json.loads(value)
+                del self._memory[key]
+                self._stats['expirations'] += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT value, created_at FROM plan_cache WHERE key = ?', (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created_at = row
+                    if now - created_at <= self.ttl:
+                        self._remember(key, value, created_at)
+                        self._stats['disk_hits'] += 1
+                        return json.loads(value)
+                    self._db.execute('DELETE FROM plan_cache WHERE key = ?', (key,))
+                    self._db.commit()
+                    self._stats['expirations'] += 1
+
+            self._stats['misses'] += 1
+            return None
+
+    def set(self, key: str, value: Dict) -> None:
+        encoded = json.dumps(value)
+        now = self._clock()
+        with self._lock:
+            self._remember(key, encoded, now)
+            self._stats['sets'] += 1
+            if self._db is not None:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO plan_cache (key, value, created_at) VALUES (?, ?, ?)',
+                    (key, encoded, now)
+                )
+                self._db.execute(
+                    'DELETE FROM plan_cache WHERE created_at < ? OR key IN ('
+                    'SELECT key FROM plan_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)',
+                    (now - self.ttl, self.max_disk_entries)
+                )
+                self._db.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+            stats['memory_bytes'] = sum(len(value) for value, _ in self._memory.values())
+            if self._db is not None:
+                stats['disk_entries'] = self._db.execute('SELECT COUNT(*) FROM plan_cache').fetchone()[0]
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def _remember(self, key: str, encoded: str, created_at: float) -> None:
+        self._memory[key] = (encoded, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats['evictions'] += 1
@@ -0,0 +1,165 @@
+"""Strict, fast parsing of structured interview plans returned by the model.
+
+Plans are requested in JSON mode and decoded with a strict JSON decoder
+(``orjson`` when installed). Replies that are almost right are repaired
+locally: code fences and surrounding prose are stripped, trailing commas
+removed, Python-literal dicts read with ``ast.literal_eval`` and field
+types coerced to the schema. Anything still invalid raises
+PlanParseError, whose message is specific enough to drive one targeted
+retry.
+"""
+import ast
+import json
+import re
+import threading
+import time
+from typing import Dict, Iterable, List
+
+try:
+    import orjson
+    _loads = orjson.loads
+    _DecodeError = orjson.JSONDecodeError
+except ImportError:
+    _loads = json.loads
+    _DecodeError = json.JSONDecodeError
+
+# Field name -> expected type, mirroring InterviewPlan
+PLAN_SCHEMA = {
+    "interview_type": str,
+    "key_topics": list,
+    "suggested_questions": list,
+    "personality_traits": list,
+    "communication_style": str,
+    "special_considerations": list,
+}
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+class PlanParseError(ValueError):
+    def __init__(self, problems: List[str]):
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+    def retry_prompt(self) -> str:
+        return (
+            "Your previous reply could not be used: " + "; ".join(self.problems) + ". "
+            "Reply again with only the corrected JSON object, no other text."
+        )
+
+
+class ParseStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.attempts = 0
+        self.failures = 0
+        self.repaired = 0
+        self.retries = 0
+        self.fallbacks = 0
+        self.seconds = 0.0
+
+    def record(self, seconds: float, failed: bool, repaired: bool):
+        with self._lock:
+            self.attempts += 1
+            self.failures += failed
+            self.repaired += repaired
+            self.seconds += seconds
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_fallback(self):
+        with self._lock:
+            self.fallbacks += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'attempts': self.attempts,
+                'failures': self.failures,
+                'repaired': self.repaired,
+                'retries': self.retries,
+                'fallbacks': self.fallbacks,
+                'failure_rate': self.failures / self.attempts if self.attempts else 0.0,
+                'parse_seconds_total': round(self.seconds, 6),
+                'parse_seconds_avg': round(self.seconds / self.attempts, 6) if self.attempts else 0.0,
+            }
+
+
+stats = ParseStats()
+
+
+def parse_plan(content: str, extra_fields: Iterable[str] = (), defaults: Dict = None) -> Dict:
+    """Decode and validate a plan; ``defaults`` fills missing fields instead of failing."""
+    start = time.perf_counter()
+    repaired = False
+    try:
+        try:
+            data = _loads(content)
+        except (_DecodeError, TypeError):
+            data = _repair(content)
+            repaired = True
+        plan, coerced = _validate(data, extra_fields, defaults)
+        stats.record(time.perf_counter() - start, failed=False, repaired=repaired or coerced)
+        return plan
+    except PlanParseError:
+        stats.record(time.perf_counter() - start, failed=True, repaired=repaired)
+        raise
+
+
+def _repair(content: str) -> Dict:
+    text = _FENCE.sub("", content.strip())
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        raise PlanParseError(["the reply did not contain a JSON object"])
+    text = _TRAILING_COMMA.sub(r"\1", text[start:end + 1])
+    try:
+        return _loads(text)
+    except _DecodeError:
+        pass
+    try:
+        # Python-literal dicts (single quotes, True/None) are common near-misses
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        raise PlanParseError(["the reply was not valid JSON"])
+
+
+def _validate(data, extra_fields: Iterable[str], defaults: Dict = None):
+    if not isinstance(data, dict):
+        raise PlanParseError(["the reply must be a JSON object"])
+
+    plan = {}
+    problems = []
+    coerced = False
+    for field, expected in PLAN_SCHEMA.items():
+        value = data.get(field)
+        if value is None or value == "" or value == []:
+            if defaults and field in defaults:
+                plan[field] = defaults[field]
+                coerced = True
+            else:
+                problems.append(f'"{field}" is missing')
+            continue
+        if expected is list:
+            if isinstance(value, str):
+                value = [value]
+                coerced = True
+            if not isinstance(value, list):
+                problems.append(f'"{field}" must be a list of strings')
+                continue
+            value = [str(item).strip() for item in value if str(item).strip()]
+        else:
+            if isinstance(value, list):
+                value = ", ".join(str(item) for item in value)
+                coerced = True
+            value = str(value).strip()
+        plan[field] = value
+
+    for field in extra_fields:
+        if isinstance(data.get(field), str):
+            plan[field] = data[field]
+    if problems:
+        raise PlanParseError(problems)
+    return plan, coerced
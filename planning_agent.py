@@ -1,7 +1,18 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 import os
 from dataclasses import dataclass
-from langchain_community.chat_models import ChatOpenAI
+from metrics import instrument
+import model_router
+from llm_calls import DeadlineExceeded
+from plan_cache import PlanCache, make_key
+import plan_parser
+from plan_parser import PlanParseError, parse_plan
+
+# Bump when the planning prompts change so cached plans are not reused
+PLAN_PROMPT_VERSION = 1
+
+# Ask the API for a JSON object; disable for models without JSON mode
+PLAN_JSON_MODE = os.getenv('PLAN_JSON_MODE', '1') == '1'
 
 @dataclass
 class InterviewPlan:
@@ -13,14 +24,226 @@ class InterviewPlan:
     special_considerations: List[str]
 
 class PlanningAgent:
-    def __init__(self):
-        self.llm = ChatOpenAI(
-            temperature=0.7,
-            model_name="gpt-3.5-turbo",
-            openai_api_key=os.getenv('OPENAI_API_KEY')
-        )
+    """
+    Plans an interview and initializes its agents.
+
+    A failed or unparseable response falls back to the default plan, or to
+    the default initialization message, but running out of setup time does
+    not: DeadlineExceeded propagates so the caller reports the timeout
+    instead of quietly starting with generic defaults.
+    """
+    def __init__(self, cache: Optional[PlanCache] = None):
+        route = model_router.router.routes['planner']
+        self.model_name = route.model
+        self.temperature = route.temperature
+        self.llm = instrument(model_router.get_routed_model('planner'), 'PlanningAgent')
+        self.cache = cache
         
     def create_interview_plan(self, context: str, background: str, goals: str) -> InterviewPlan:
+        key = self._cache_key('plan', context, background, goals)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return InterviewPlan(**cached)
+            
+        try:
+            # Parse the response into our InterviewPlan structure
+            plan = InterviewPlan(**self._request_plan(self._plan_messages(context, background, goals)))
+            self._cache_set(key, vars(plan))
+            return plan
+            
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"Error in creating interview plan: {e}")
+            return self._default_plan()
+
+    async def acreate_interview_plan(self, context: str, background: str, goals: str) -> InterviewPlan:
+        key = self._cache_key('plan', context, background, goals)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return InterviewPlan(**cached)
+            
+        try:
+            plan = InterviewPlan(**await self._arequest_plan(self._plan_messages(context, background, goals)))
+            self._cache_set(key, vars(plan))
+            return plan
+            
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"Error in creating interview plan: {e}")
+            return self._default_plan()
+    
+    def initialize_agents(self, plan: InterviewPlan) -> Dict:
+        """
+        Initialize the interview and topic agents with the planned approach
+        """
+        key = self._cache_key('init', vars(plan))
+        cached = self._cache_get(key)
+        if cached is not None:
+            return {**cached, "plan": plan}
+            
+        try:
+            response = self.llm.invoke(self._initialization_messages(plan))
+            self._cache_set(key, {"initialization_message": response.content})
+            
+            return {
+                "initialization_message": response.content,
+                "plan": plan
+            }
+            
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"Error in initializing agents: {e}")
+            return self._default_initialization(plan)
+
+    async def ainitialize_agents(self, plan: InterviewPlan) -> Dict:
+        """
+        Async variant of initialize_agents
+        """
+        key = self._cache_key('init', vars(plan))
+        cached = self._cache_get(key)
+        if cached is not None:
+            return {**cached, "plan": plan}
+            
+        try:
+            response = await self.llm.ainvoke(self._initialization_messages(plan))
+            self._cache_set(key, {"initialization_message": response.content})
+            
+            return {
+                "initialization_message": response.content,
+                "plan": plan
+            }
+            
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"Error in initializing agents: {e}")
+            return self._default_initialization(plan)
+
+    def prepare_session(self, context: str, background: str, goals: str) -> Dict:
+        """
+        Plan the interview and initialize the agents in a single LLM call.
+        Returns the same structure as initialize_agents.
+        """
+        key = self._cache_key('session', context, background, goals)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return self._session_config(cached)
+            
+        try:
+            config = self._session_config(self._request_plan(
+                self._session_messages(context, background, goals), extra_fields=("initialization_message",)
+            ))
+            self._cache_set(key, {**vars(config["plan"]), "initialization_message": config["initialization_message"]})
+            return config
+            
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"Error in preparing interview session: {e}")
+            return self._default_initialization(self._default_plan())
+
+    async def aprepare_session(self, context: str, background: str, goals: str) -> Dict:
+        """
+        Async variant of prepare_session
+        """
+        key = self._cache_key('session', context, background, goals)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return self._session_config(cached)
+            
+        try:
+            config = self._session_config(await self._arequest_plan(
+                self._session_messages(context, background, goals), extra_fields=("initialization_message",)
+            ))
+            self._cache_set(key, {**vars(config["plan"]), "initialization_message": config["initialization_message"]})
+            return config
+            
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"Error in preparing interview session: {e}")
+            return self._default_initialization(self._default_plan())
+
+    def _request_plan(self, messages: List[Dict], extra_fields=()) -> Dict:
+        """
+        Ask for a plan in JSON mode and parse it strictly, with one targeted retry
+        """
+        response = self.llm.invoke(messages, **self._json_mode())
+        try:
+            return parse_plan(response.content, extra_fields)
+        except PlanParseError as e:
+            plan_parser.stats.record_retry()
+            model_router.record_quality('plan_parse_retry')
+            retry = self._retry_messages(messages, response.content, e)
+            response = self.llm.invoke(retry, **self._json_mode())
+            return self._parse_final(response.content, extra_fields)
+
+    async def _arequest_plan(self, messages: List[Dict], extra_fields=()) -> Dict:
+        response = await self.llm.ainvoke(messages, **self._json_mode())
+        try:
+            return parse_plan(response.content, extra_fields)
+        except PlanParseError as e:
+            plan_parser.stats.record_retry()
+            model_router.record_quality('plan_parse_retry')
+            retry = self._retry_messages(messages, response.content, e)
+            response = await self.llm.ainvoke(retry, **self._json_mode())
+            return self._parse_final(response.content, extra_fields)
+
+    @staticmethod
+    def _json_mode() -> Dict:
+        return {"response_format": {"type": "json_object"}} if PLAN_JSON_MODE else {}
+
+    @staticmethod
+    def _retry_messages(messages: List[Dict], content: str, error: PlanParseError) -> List[Dict]:
+        return messages + [
+            {"role": "assistant", "content": content},
+            {"role": "user", "content": error.retry_prompt()}
+        ]
+
+    def _parse_final(self, content: str, extra_fields) -> Dict:
+        # Last attempt: keep whatever the model got right and fill the rest from the default plan
+        try:
+            return parse_plan(content, extra_fields, defaults=vars(self._default_plan()))
+        except PlanParseError:
+            plan_parser.stats.record_fallback()
+            model_router.record_quality('plan_fallback')
+            raise
+
+    @staticmethod
+    def _session_config(session_dict: Dict) -> Dict:
+        session_dict = dict(session_dict)
+        initialization_message = session_dict.pop(
+            "initialization_message", "Interview session initialized with standard parameters."
+        )
+        return {
+            "initialization_message": initialization_message,
+            "plan": InterviewPlan(**session_dict)
+        }
+
+    def _cache_key(self, kind: str, *inputs) -> str:
+        return make_key(kind, PLAN_PROMPT_VERSION, self.model_name, self.temperature, *inputs)
+
+    def _cache_get(self, key: str) -> Optional[Dict]:
+        if self.cache is None:
+            return None
+        try:
+            return self.cache.get(key)
+        except Exception as e:
+            print(f"Error reading plan cache: {e}")
+            return None
+
+    def _cache_set(self, key: str, value: Dict):
+        if self.cache is None:
+            return
+        try:
+            self.cache.set(key, value)
+        except Exception as e:
+            print(f"Error writing plan cache: {e}")
+
+    def _plan_messages(self, context: str, background: str, goals: str) -> List[Dict]:
         # Combine all information for the LLM
         prompt = f"""
         As an expert interview planner, analyze the following information and create a detailed interview plan:
@@ -44,34 +267,26 @@ class PlanningAgent:
             "special_considerations": ["important points to keep in mind"]
         }}
         """
-        
-        try:
-            messages = [
-                {"role": "system", "content": "You are an expert interview planner, skilled at creating strategic interview approaches."},
-                {"role": "user", "content": prompt}
-            ]
-            response = self.llm.invoke(messages)
-            
-            # Parse the response into our InterviewPlan structure
-            plan_dict = eval(response.content)
-            return InterviewPlan(**plan_dict)
-            
-        except Exception as e:
-            print(f"Error in creating interview plan: {e}")
-            # Return a basic plan in case of error
-            return InterviewPlan(
-                interview_type="general",
-                key_topics=["background", "experience", "goals"],
-                suggested_questions=["Could you tell me about yourself?"],
-                personality_traits=["professional", "friendly"],
-                communication_style="balanced and professional",
-                special_considerations=["maintain professional atmosphere"]
-            )
-    
-    def initialize_agents(self, plan: InterviewPlan) -> Dict:
-        """
-        Initialize the interview and topic agents with the planned approach
+        return [
+            {"role": "system", "content": "You are an expert interview planner, skilled at creating strategic interview approaches."},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _session_messages(self, context: str, background: str, goals: str) -> List[Dict]:
+        messages = self._plan_messages(context, background, goals)
+        messages[0] = {
+            "role": "system",
+            "content": "You are an expert interview planner, skilled at creating strategic interview approaches "
+                       "and briefing the interviewers who will carry them out."
+        }
+        messages[1]["content"] += """
+        Also include an "initialization_message" field: a short briefing that initializes the
+        interview session for the interviewers, covering the approach, tone and first steps.
+        Order "suggested_questions" so the first one is the best opening question.
         """
+        return messages
+
+    def _initialization_messages(self, plan: InterviewPlan) -> List[Dict]:
         initialization_prompt = f"""
         Initialize interview session with the following parameters:
         
@@ -83,22 +298,26 @@ class PlanningAgent:
         
         Initial questions to consider: {', '.join(plan.suggested_questions)}
         """
-        
-        try:
-            messages = [
-                {"role": "system", "content": "You are initializing an interview session based on a strategic plan."},
-                {"role": "user", "content": initialization_prompt}
-            ]
-            response = self.llm.invoke(messages)
-            
-            return {
-                "initialization_message": response.content,
-                "plan": plan
-            }
-            
-        except Exception as e:
-            print(f"Error in initializing agents: {e}")
-            return {
-                "initialization_message": "Interview session initialized with standard parameters.",
-                "plan": plan
-            }
+        return [
+            {"role": "system", "content": "You are initializing an interview session based on a strategic plan."},
+            {"role": "user", "content": initialization_prompt}
+        ]
+
+    @staticmethod
+    def _default_plan() -> InterviewPlan:
+        # Return a basic plan in case of error
+        return InterviewPlan(
+            interview_type="general",
+            key_topics=["background", "experience", "goals"],
+            suggested_questions=["Could you tell me about yourself?"],
+            personality_traits=["professional", "friendly"],
+            communication_style="balanced and professional",
+            special_considerations=["maintain professional atmosphere"]
+        )
+
+    @staticmethod
+    def _default_initialization(plan: InterviewPlan) -> Dict:
+        return {
+            "initialization_message": "Interview session initialized with standard parameters.",
+            "plan": plan
+        }
@@ -0,0 +1,137 @@
+"""Token-budgeted prompt assembly.
+
+Prompts are assembled from named sections. Token counts are computed
+locally (with ``tiktoken`` when it is installed, otherwise a character
+estimate) and cached, so the static sections that repeat on every turn are
+only counted once. When a prompt exceeds its budget, the lowest-priority
+sections are trimmed first: history entries are compacted and then dropped
+oldest-first, and text sections are truncated or removed.
+"""
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding('cl100k_base')
+except Exception:
+    _encoding = None
+
+# Sections smaller than this after truncation are dropped entirely
+MIN_SECTION_TOKENS = 24
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    # Roughly four characters per token for English text
+    return (len(text) + 3) // 4
+
+
+def count_message_tokens(messages) -> int:
+    """Tokens in the content of chat messages, given as message objects or role/content dicts."""
+    total = 0
+    for message in messages:
+        content = message.get('content', '') if isinstance(message, dict) else getattr(message, 'content', '')
+        total += count_tokens(content) if isinstance(content, str) else 0
+    return total
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if max_tokens <= 0:
+        return ''
+    if _encoding is not None:
+        tokens = _encoding.encode(text)
+        return text if len(tokens) <= max_tokens else _encoding.decode(tokens[:max_tokens]) + '...'
+    max_chars = max_tokens * 4
+    return text if len(text) <= max_chars else text[:max_chars] + '...'
+
+
+@dataclass
+class PromptSection:
+    name: str
+    heading: Optional[str]
+    text: str = ''
+    # History-like sections list their entries oldest first; ``compact_items``
+    # holds a cheaper rendering of each entry that is swapped in before dropping
+    items: List[str] = field(default_factory=list)
+    compact_items: List[str] = field(default_factory=list)
+    empty_text: str = ''
+    # Lower priorities are trimmed first; required sections are never trimmed
+    priority: int = 0
+    required: bool = False
+    dropped: bool = False
+
+    def body(self) -> str:
+        if self.items:
+            return '\n'.join(self.items)
+        return self.text or self.empty_text
+
+    def render(self) -> str:
+        if self.dropped:
+            return ''
+        if self.heading is None:
+            return self.body()
+        return f"{self.heading}:\n{self.body()}\n"
+
+    def tokens(self) -> int:
+        if self.dropped:
+            return 0
+        if self.items:
+            return count_tokens(f"{self.heading}:\n") + sum(count_tokens(item) + 1 for item in self.items)
+        return count_tokens(self.render())
+
+
+class PromptBuilder:
+    def __init__(self, budget: int):
+        self.budget = budget
+
+    def build(self, sections: List[PromptSection]) -> Tuple[str, Dict]:
+        """Render ``sections`` in order within the budget; return the prompt and a size report."""
+        sizes = {section.name: section.tokens() for section in sections}
+        original = sum(sizes.values())
+        total = original
+        trimmed = []
+
+        for section in sorted((s for s in sections if not s.required), key=lambda s: s.priority):
+            if total <= self.budget:
+                break
+            before = sizes[section.name]
+            self._trim(section, total - self.budget)
+            sizes[section.name] = section.tokens()
+            if sizes[section.name] < before:
+                total -= before - sizes[section.name]
+                trimmed.append(section.name)
+
+        prompt = '\n'.join(section.render() for section in sections if not section.dropped)
+        return prompt, {
+            'tokens': total,
+            'budget': self.budget,
+            'untrimmed_tokens': original,
+            'sections': sizes,
+            'trimmed': trimmed,
+        }
+
+    @staticmethod
+    def _trim(section: PromptSection, excess: int):
+        if section.items:
+            # Compact the oldest entries first, then drop them, keeping recent turns verbatim
+            for i in range(len(section.items)):
+                if excess <= 0:
+                    return
+                if i < len(section.compact_items) and section.compact_items[i] != section.items[i]:
+                    saved = count_tokens(section.items[i]) - count_tokens(section.compact_items[i])
+                    section.items[i] = section.compact_items[i]
+                    excess -= saved
+            while section.items and excess > 0:
+                excess -= count_tokens(section.items.pop(0)) + 1
+            return
+
+        keep = count_tokens(section.text) - excess
+        if keep < MIN_SECTION_TOKENS:
+            section.dropped = True
+        else:
+            section.text = truncate_to_tokens(section.text, keep)
@@ -0,0 +1,175 @@
+"""Near-duplicate detection for questions an interviewer has already asked.
+
+Questions are normalized, split into word shingles and reduced to a
+MinHash signature. Signatures are bucketed with locality-sensitive
+hashing (banding), so a lookup only compares against the few earlier
+questions sharing a band and stays well under a millisecond however long
+the interview runs. Each question's signature and text are kept (the text
+is what a duplicate is reported as), but only a short tail of recent
+questions goes into prompts.
+
+For snapshots, each signature is packed as little-endian 32-bit integers
+and base64-encoded, about a third of its size as JSON numbers; the LSH
+buckets are rebuilt from them on restore.
+"""
+import base64
+import os
+import re
+import sys
+import threading
+import zlib
+from array import array
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+# Large prime for the universal hash family (a * x + b) mod p
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_WORD = re.compile(r"[a-z0-9']+")
+_STOPWORDS = frozenset("""
+    a an and are as at be can could did do does for from how i in is it me of on or
+    so that the this to was what when where which who why would you your
+""".split())
+
+
+def _coefficients(count: int) -> List[Tuple[int, int]]:
+    # Fixed, deterministic permutations so signatures are stable across processes
+    coefficients = []
+    state = 0x9E3779B97F4A7C15
+    for _ in range(count):
+        state = (state * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+        a = (state >> 3) % _PRIME or 1
+        state = (state * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+        b = (state >> 3) % _PRIME
+        coefficients.append((a, b))
+    return coefficients
+
+
+def _pack(signature: Tuple[int, ...]) -> str:
+    packed = array('I', signature)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return base64.b64encode(packed.tobytes()).decode('ascii')
+
+
+def _unpack(text: str) -> Tuple[int, ...]:
+    packed = array('I')
+    packed.frombytes(base64.b64decode(text))
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return tuple(packed)
+
+
+def shingles(text: str, size: int = 2) -> set:
+    words = [word for word in _WORD.findall(text.lower().replace('’', "'")) if word not in _STOPWORDS]
+    if len(words) < size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class QuestionIndex:
+    def __init__(self, num_perm: int = 64, bands: int = 16, threshold: float = 0.5, recent: int = 5):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self._coefficients = _coefficients(num_perm)
+        self._signatures: List[Tuple[int, ...]] = []
+        self._questions: Dict[int, str] = {}
+        self._buckets: List[Dict[Tuple[int, ...], List[int]]] = [{} for _ in range(bands)]
+        self._recent = deque(maxlen=recent)
+        self._packed: List[str] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "QuestionIndex":
+        return cls(
+            threshold=float(os.getenv('QUESTION_DUPLICATE_THRESHOLD', '0.5')),
+            recent=int(os.getenv('QUESTION_PROMPT_RECENT', '5')),
+        )
+
+    def signature(self, question: str) -> Optional[Tuple[int, ...]]:
+        hashes = [zlib.crc32(shingle.encode()) for shingle in shingles(question)]
+        if not hashes:
+            return None
+        return tuple(
+            min((a * h + b) % _PRIME for h in hashes) & _MAX_HASH
+            for a, b in self._coefficients
+        )
+
+    def add(self, question: str):
+        signature = self.signature(question)
+        with self._lock:
+            self._recent.append(question.strip())
+            if signature is None:
+                return
+            question_id = len(self._signatures)
+            self._signatures.append(signature)
+            self._questions[question_id] = question.strip()
+            for band, key in enumerate(self._band_keys(signature)):
+                self._buckets[band].setdefault(key, []).append(question_id)
+
+    def find_duplicate(self, question: str) -> Optional[Tuple[str, float]]:
+        """The most similar earlier question at or above the threshold, with its estimated Jaccard similarity."""
+        signature = self.signature(question)
+        if signature is None:
+            return None
+        with self._lock:
+            candidates = set()
+            for band, key in enumerate(self._band_keys(signature)):
+                candidates.update(self._buckets[band].get(key, ()))
+            best = None
+            for question_id in candidates:
+                other = self._signatures[question_id]
+                similarity = sum(x == y for x, y in zip(signature, other)) / self.num_perm
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (self._questions[question_id], similarity)
+            return best
+
+    def state(self) -> dict:
+        """Questions in order, each with its packed signature, and the recent tail."""
+        with self._lock:
+            # Signatures are packed once and the packed form kept, so saving after every question stays cheap
+            for signature in self._signatures[len(self._packed):]:
+                self._packed.append(_pack(signature))
+            return {
+                'num_perm': self.num_perm,
+                'questions': [[self._questions[question_id], packed]
+                              for question_id, packed in enumerate(self._packed)],
+                'recent': list(self._recent),
+            }
+
+    def restore(self, state: dict):
+        questions = [question for question, _ in state['questions']]
+        if state['num_perm'] == self.num_perm:
+            packed = [signature for _, signature in state['questions']]
+            signatures = [_unpack(signature) for signature in packed]
+        else:
+            # Saved with a different signature length; recompute from the questions
+            packed = []
+            signatures = [self.signature(question) for question in questions]
+        with self._lock:
+            self._signatures = signatures
+            self._packed = packed
+            self._questions = dict(enumerate(questions))
+            self._buckets = [{} for _ in range(self.bands)]
+            for question_id, signature in enumerate(signatures):
+                for band, key in enumerate(self._band_keys(signature)):
+                    self._buckets[band].setdefault(key, []).append(question_id)
+            self._recent.clear()
+            self._recent.extend(state['recent'])
+
+    def recent(self) -> List[str]:
+        """The last few questions asked; a bounded stand-in for the full list in prompts."""
+        with self._lock:
+            return list(self._recent)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            yield signature[band * self.rows:(band + 1) * self.rows]
@@ -0,0 +1,78 @@
+"""Flask sessions kept in a SessionStore instead of the cookie.
+
+The cookie holds only a random id signed with the app's secret key, so it
+stays a few dozen bytes however much the session holds, and any worker
+sharing the store (and ``SECRET_KEY``) can serve any request.
+"""
+import uuid
+
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+
+from session_store import SessionStore
+
+KEY_PREFIX = 'flask-session:'
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    def __init__(self, initial: dict = None, sid: str = None, new: bool = False):
+        def on_update(session):
+            session.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+
+class ServerSideSessionInterface(SessionInterface):
+    def __init__(self, store: SessionStore):
+        self.store = store
+
+    def open_session(self, app, request) -> ServerSession:
+        sid = self._unsign(app, request.cookies.get(self.get_cookie_name(app)))
+        stored = self.store.get(KEY_PREFIX + sid) if sid else None
+        if stored is None:
+            return ServerSession(sid=uuid.uuid4().hex, new=True)
+        return ServerSession(stored[1], sid=sid)
+
+    def save_session(self, app, session: ServerSession, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.modified:
+                self.store.delete(KEY_PREFIX + session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+                response.vary.add('Cookie')
+            return
+
+        if session.modified:
+            self.store.put(KEY_PREFIX + session.sid, dict(session))
+        if session.new or self.should_set_cookie(app, session):
+            response.set_cookie(
+                name,
+                self._signer(app).sign(session.sid).decode(),
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
+            response.vary.add('Cookie')
+
+    def _unsign(self, app, value: str):
+        if not value:
+            return None
+        try:
+            return self._signer(app).unsign(value).decode()
+        except BadSignature:
+            return None
+
+    @staticmethod
+    def _signer(app) -> Signer:
+        return Signer(app.secret_key, salt='interview-session')
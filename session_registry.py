@@ -0,0 +1,105 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class SessionRegistry:
+    """Thread-safe, session-keyed store of live interview objects.
+
+    Entries are evicted least-recently-used once ``capacity`` is reached and
+    dropped after ``idle_ttl`` seconds without access.
+    """
+
+    def __init__(self, capacity: int = 500, idle_ttl: float = 3600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.idle_ttl = idle_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._lru_evictions = 0
+        self._ttl_evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "SessionRegistry":
+        return cls(
+            capacity=int(os.getenv('SESSION_REGISTRY_CAPACITY', '500')),
+            idle_ttl=float(os.getenv('SESSION_REGISTRY_IDLE_TTL', '3600')),
+        )
+
+    def get(self, session_id: str) -> Optional[Any]:
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                self._misses += 1
+                return None
+            if now - entry[1] > self.idle_ttl:
+                del self._entries[session_id]
+                self._ttl_evictions += 1
+                self._misses += 1
+                return None
+            entry[1] = now
+            self._entries.move_to_end(session_id)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, session_id: str, value: Any) -> None:
+        now = self._clock()
+        with self._lock:
+            self._entries[session_id] = [value, now]
+            self._entries.move_to_end(session_id)
+            self._evict_expired(now)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self._lru_evictions += 1
+
+    def pop(self, session_id: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+            return entry[0] if entry else None
+
+    def items(self) -> List[Tuple[str, Any]]:
+        """Snapshot of live entries; does not count as access."""
+        with self._lock:
+            return [(session_id, entry[0]) for session_id, entry in self._entries.items()]
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def sweep(self) -> int:
+        """Drop every entry that has been idle longer than ``idle_ttl``."""
+        with self._lock:
+            return self._evict_expired(self._clock())
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'live_sessions': len(self._entries),
+                'capacity': self.capacity,
+                'hits': self._hits,
+                'misses': self._misses,
+                'lru_evictions': self._lru_evictions,
+                'ttl_evictions': self._ttl_evictions,
+                'evictions': self._lru_evictions + self._ttl_evictions,
+            }
+
+    def _evict_expired(self, now: float) -> int:
+        # Entries are kept in access order, so expired ones sit at the front.
+        evicted = 0
+        while self._entries:
+            session_id, (_, last_access) = next(iter(self._entries.items()))
+            if now - last_access <= self.idle_ttl:
+                break
+            del self._entries[session_id]
+            evicted += 1
+        self._ttl_evictions += evicted
+        return evicted
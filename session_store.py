@@ -0,0 +1,306 @@
+"""Server-side storage for interview sessions, shared by every worker.
+
+The session cookie carries only a signed id; the session data and each
+interview's discussion state are kept here under string keys. Values are
+stored as zlib-compressed compact JSON, together with a version number
+that only moves forward, so a worker can tell cheaply whether its
+in-memory copy of an interview is current and a slow writer can never
+overwrite a newer state. ``compare_and_put`` writes only over an expected
+version, for state that several workers race to claim.
+
+A key can have parts, stored under ``part_key(key, name)``: a large value
+split into pieces that are written independently, so an update rewrites
+only the pieces it changed. Parts live as long as their key: they do not
+expire on their own, and deleting or sweeping the key removes them.
+
+Settings (environment):
+    SESSION_STORE  "sqlite" (default) or "memory" (single process only)
+    SESSION_DB     SQLite database path (default sessions.db)
+    SESSION_TTL    seconds an untouched session is kept (default 604800, a week)
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+PART_SEPARATOR = '#'
+# Sorts immediately after the separator, bounding a key's parts as a key range
+_PARTS_END = chr(ord(PART_SEPARATOR) + 1)
+
+
+def part_key(key: str, part: str) -> str:
+    return f"{key}{PART_SEPARATOR}{part}"
+
+
+def encode(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'))
+
+
+def decode(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob))
+
+
+class SessionStore:
+    """Versioned key-value store for session data; subclasses choose where it lives."""
+
+    @classmethod
+    def from_env(cls) -> "SessionStore":
+        ttl = float(os.getenv('SESSION_TTL', str(7 * 24 * 3600)))
+        backend = os.getenv('SESSION_STORE', 'sqlite')
+        if backend == 'memory':
+            return MemorySessionStore(ttl=ttl)
+        if backend == 'sqlite':
+            return SQLiteSessionStore(os.getenv('SESSION_DB', 'sessions.db'), ttl=ttl)
+        raise ValueError(f"Unknown session store: {backend}")
+
+    def get(self, key: str) -> Optional[Tuple[int, Any]]:
+        """``(version, value)`` stored under ``key``, or None."""
+        raise NotImplementedError
+
+    def version(self, key: str) -> Optional[int]:
+        """Stored version of ``key`` without reading the value."""
+        raise NotImplementedError
+
+    def put(self, key: str, value: Any, version: int = 0) -> bool:
+        """Store ``value`` unless a newer version is already stored; True when written."""
+        raise NotImplementedError
+
+    def put_many(self, entries: Iterable[Tuple[str, Any, int]]) -> int:
+        """Store several ``(key, value, version)`` entries at once; returns how many were written."""
+        return sum(self.put(key, value, version) for key, value, version in entries)
+
+    def compare_and_put(self, key: str, value: Any, version: int, expected: Optional[int]) -> bool:
+        """Store ``value`` only if ``key`` is still at version ``expected`` (None: absent); True when written."""
+        raise NotImplementedError
+
+    def parts(self, key: str) -> Dict[str, Tuple[int, Any]]:
+        """``{part: (version, value)}`` for every part stored under ``key``."""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        """Remove ``key`` and its parts."""
+        raise NotImplementedError
+
+    def sweep(self) -> int:
+        """Drop keys untouched for longer than the TTL, with their parts; returns how many keys."""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, float]:
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    def __init__(self, ttl: float = 7 * 24 * 3600, clock: Callable[[], float] = time.time):
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[str, list] = {}
+        self._writes = 0
+        self._stale_writes = 0
+
+    def get(self, key: str) -> Optional[Tuple[int, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._expired(key, entry):
+                return None
+            return entry[0], decode(entry[1])
+
+    def version(self, key: str) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry is not None and not self._expired(key, entry) else None
+
+    def put(self, key: str, value: Any, version: int = 0) -> bool:
+        return self.put_many([(key, value, version)]) == 1
+
+    def put_many(self, entries: Iterable[Tuple[str, Any, int]]) -> int:
+        blobs = [(key, encode(value), version) for key, value, version in entries]
+        written = 0
+        with self._lock:
+            now = self._clock()
+            for key, blob, version in blobs:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > version:
+                    self._stale_writes += 1
+                    continue
+                self._entries[key] = [version, blob, now]
+                self._writes += 1
+                written += 1
+        return written
+
+    def compare_and_put(self, key: str, value: Any, version: int, expected: Optional[int]) -> bool:
+        blob = encode(value)
+        with self._lock:
+            entry = self._entries.get(key)
+            current = entry[0] if entry is not None and not self._expired(key, entry) else None
+            if current != expected:
+                self._stale_writes += 1
+                return False
+            self._entries[key] = [version, blob, self._clock()]
+            self._writes += 1
+            return True
+
+    def parts(self, key: str) -> Dict[str, Tuple[int, Any]]:
+        prefix = part_key(key, '')
+        with self._lock:
+            found = [(name, entry) for name, entry in self._entries.items() if name.startswith(prefix)]
+        return {name[len(prefix):]: (entry[0], decode(entry[1])) for name, entry in found}
+
+    def delete(self, key: str):
+        with self._lock:
+            self._delete(key)
+
+    def sweep(self) -> int:
+        with self._lock:
+            expired = [key for key, entry in self._entries.items() if self._expired(key, entry)]
+            for key in expired:
+                self._delete(key)
+        return len(expired)
+
+    def _expired(self, key: str, entry: list) -> bool:
+        return PART_SEPARATOR not in key and self._clock() - entry[2] > self.ttl
+
+    def _delete(self, key: str):
+        self._entries.pop(key, None)
+        prefix = part_key(key, '')
+        for name in [name for name in self._entries if name.startswith(prefix)]:
+            del self._entries[name]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': sum(len(entry[1]) for entry in self._entries.values()),
+                'writes': self._writes,
+                'stale_writes': self._stale_writes,
+            }
+
+
+class SQLiteSessionStore(SessionStore):
+    def __init__(self, db_path: str, ttl: float = 7 * 24 * 3600, clock: Callable[[], float] = time.time):
+        self.db_path = db_path
+        self.ttl = ttl
+        self._clock = clock
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._stale_writes = 0
+        db = self._connection()
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS sessions ('
+            'key TEXT PRIMARY KEY, version INTEGER NOT NULL, value BLOB NOT NULL, updated_at REAL NOT NULL)'
+        )
+        db.execute('CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated_at)')
+        db.commit()
+
+    def get(self, key: str) -> Optional[Tuple[int, Any]]:
+        row = self._connection().execute(
+            'SELECT version, value FROM sessions WHERE key = ? AND updated_at >= ?',
+            (key, self._cutoff(key))
+        ).fetchone()
+        return (row[0], decode(row[1])) if row else None
+
+    def version(self, key: str) -> Optional[int]:
+        row = self._connection().execute(
+            'SELECT version FROM sessions WHERE key = ? AND updated_at >= ?',
+            (key, self._cutoff(key))
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, value: Any, version: int = 0) -> bool:
+        return self.put_many([(key, value, version)]) == 1
+
+    def put_many(self, entries: Iterable[Tuple[str, Any, int]]) -> int:
+        now = self._clock()
+        rows = [(key, version, encode(value), now) for key, value, version in entries]
+        db = self._connection()
+        written = 0
+        # One transaction, so readers never see some of the entries without the rest
+        with db:
+            for row in rows:
+                written += db.execute(
+                    'INSERT INTO sessions (key, version, value, updated_at) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT (key) DO UPDATE SET version = excluded.version, value = excluded.value, '
+                    'updated_at = excluded.updated_at WHERE sessions.version <= excluded.version',
+                    row
+                ).rowcount
+        with self._lock:
+            self._writes += written
+            self._stale_writes += len(rows) - written
+        return written
+
+    def compare_and_put(self, key: str, value: Any, version: int, expected: Optional[int]) -> bool:
+        now = self._clock()
+        db = self._connection()
+        with db:
+            if expected is None:
+                # An expired row counts as absent
+                written = db.execute(
+                    'INSERT INTO sessions (key, version, value, updated_at) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT (key) DO UPDATE SET version = excluded.version, value = excluded.value, '
+                    'updated_at = excluded.updated_at WHERE sessions.updated_at < ?',
+                    (key, version, encode(value), now, self._cutoff(key))
+                ).rowcount
+            else:
+                written = db.execute(
+                    'UPDATE sessions SET version = ?, value = ?, updated_at = ? '
+                    'WHERE key = ? AND version = ? AND updated_at >= ?',
+                    (version, encode(value), now, key, expected, self._cutoff(key))
+                ).rowcount
+        with self._lock:
+            self._writes += written
+            self._stale_writes += 1 - written
+        return written == 1
+
+    def parts(self, key: str) -> Dict[str, Tuple[int, Any]]:
+        prefix = part_key(key, '')
+        rows = self._connection().execute(
+            'SELECT key, version, value FROM sessions WHERE key > ? AND key < ?',
+            (prefix, key + _PARTS_END)
+        ).fetchall()
+        return {name[len(prefix):]: (version, decode(value)) for name, version, value in rows}
+
+    def delete(self, key: str):
+        db = self._connection()
+        with db:
+            db.execute('DELETE FROM sessions WHERE key = ? OR (key > ? AND key < ?)',
+                       (key, part_key(key, ''), key + _PARTS_END))
+
+    def sweep(self) -> int:
+        db = self._connection()
+        with db:
+            expired = db.execute(
+                'DELETE FROM sessions WHERE updated_at < ? AND instr(key, ?) = 0',
+                (self._clock() - self.ttl, PART_SEPARATOR)
+            ).rowcount
+            db.execute(
+                'DELETE FROM sessions WHERE instr(key, ?) > 0 '
+                'AND substr(key, 1, instr(key, ?) - 1) NOT IN (SELECT key FROM sessions)',
+                (PART_SEPARATOR, PART_SEPARATOR)
+            )
+        return expired
+
+    def stats(self) -> Dict[str, float]:
+        entries, = self._connection().execute('SELECT COUNT(*) FROM sessions').fetchone()
+        with self._lock:
+            return {
+                'entries': entries,
+                'writes': self._writes,
+                'stale_writes': self._stale_writes,
+            }
+
+    def _cutoff(self, key: str) -> float:
+        # Parts never expire on their own; they go when their key is swept
+        return float('-inf') if PART_SEPARATOR in key else self._clock() - self.ttl
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=10)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+        return db
@@ -0,0 +1,162 @@
+"""Token and cost accounting for one interview session.
+
+Every LLM call a discussion makes is recorded per agent. Operators can set
+a token and/or cost budget per session; as a session approaches it, the
+discussion degrades to cheaper behavior instead of failing:
+
+    full       normal turns
+    compact    shorter prompts: history cut to the most recent turns
+    lead_only  compact prompts and the auxiliary agents are skipped
+    exhausted  like lead_only; refused outright when hard stop is enabled
+
+Settings (environment):
+    SESSION_TOKEN_BUDGET     tokens per session, 0 for no limit (default 0)
+    SESSION_COST_BUDGET      US dollars per session, 0 for no limit (default 0)
+    BUDGET_COMPACT_AT        fraction of the budget that switches to compact (default 0.7)
+    BUDGET_LEAD_ONLY_AT      fraction of the budget that switches to lead_only (default 0.9)
+    SESSION_BUDGET_HARD_STOP "1" to refuse turns once the budget is spent (default 0)
+    LLM_PRICES               JSON of {model: [input, output]} dollars per 1K tokens
+"""
+import json
+import os
+import threading
+from typing import Dict
+
+from prompt_builder import count_message_tokens, count_tokens
+
+LEVELS = ('full', 'compact', 'lead_only', 'exhausted')
+
+# Dollars per 1K tokens, (input, output)
+DEFAULT_PRICES = {
+    'gpt-3.5-turbo': (0.0005, 0.0015),
+    'gpt-4': (0.03, 0.06),
+    'gpt-4-turbo-preview': (0.01, 0.03),
+}
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+def load_prices() -> Dict[str, tuple]:
+    prices = dict(DEFAULT_PRICES)
+    for model, (prompt_price, completion_price) in json.loads(os.getenv('LLM_PRICES', '{}')).items():
+        prices[model] = (float(prompt_price), float(completion_price))
+    return prices
+
+
+class SessionUsage:
+    def __init__(self, token_budget: int = 0, cost_budget: float = 0.0, compact_at: float = 0.7,
+                 lead_only_at: float = 0.9, hard_stop: bool = False, prices: Dict[str, tuple] = None):
+        self.token_budget = token_budget
+        self.cost_budget = cost_budget
+        self.compact_at = compact_at
+        self.lead_only_at = lead_only_at
+        self.hard_stop = hard_stop
+        self.prices = prices or DEFAULT_PRICES
+        self.agents: Dict[str, Dict] = {}
+        self.degraded_turns = {level: 0 for level in LEVELS[1:]}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "SessionUsage":
+        return cls(
+            token_budget=int(os.getenv('SESSION_TOKEN_BUDGET', '0')),
+            cost_budget=float(os.getenv('SESSION_COST_BUDGET', '0')),
+            compact_at=float(os.getenv('BUDGET_COMPACT_AT', '0.7')),
+            lead_only_at=float(os.getenv('BUDGET_LEAD_ONLY_AT', '0.9')),
+            hard_stop=os.getenv('SESSION_BUDGET_HARD_STOP', '0') == '1',
+            prices=load_prices(),
+        )
+
+    def record(self, agent: str, model: str, prompt_tokens: int, completion_tokens: int):
+        prompt_price, completion_price = self.prices.get(model, (0.0, 0.0))
+        cost = (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+        with self._lock:
+            totals = self.agents.setdefault(agent, {
+                'model': model, 'calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0
+            })
+            totals['calls'] += 1
+            totals['prompt_tokens'] += prompt_tokens
+            totals['completion_tokens'] += completion_tokens
+            totals['cost_usd'] += cost
+
+    def record_call(self, agent: str, model: str, messages: list, completion: str):
+        self.record(agent, model, count_message_tokens(messages), count_tokens(completion))
+
+    def totals(self) -> Dict:
+        with self._lock:
+            agents = [dict(agent) for agent in self.agents.values()]
+        prompt_tokens = sum(agent['prompt_tokens'] for agent in agents)
+        completion_tokens = sum(agent['completion_tokens'] for agent in agents)
+        return {
+            'calls': sum(agent['calls'] for agent in agents),
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'tokens': prompt_tokens + completion_tokens,
+            'cost_usd': sum(agent['cost_usd'] for agent in agents),
+        }
+
+    def fraction_used(self) -> float:
+        totals = self.totals()
+        fractions = [0.0]
+        if self.token_budget:
+            fractions.append(totals['tokens'] / self.token_budget)
+        if self.cost_budget:
+            fractions.append(totals['cost_usd'] / self.cost_budget)
+        return max(fractions)
+
+    def level(self) -> str:
+        used = self.fraction_used()
+        if used >= 1:
+            return 'exhausted'
+        if used >= self.lead_only_at:
+            return 'lead_only'
+        if used >= self.compact_at:
+            return 'compact'
+        return 'full'
+
+    def refuses_turns(self) -> bool:
+        return self.hard_stop and self.level() == 'exhausted'
+
+    def begin_turn(self) -> str:
+        """Degradation level for the next turn; raises BudgetExceeded under a hard stop."""
+        level = self.level()
+        if level == 'exhausted' and self.hard_stop:
+            raise BudgetExceeded("Session budget exhausted")
+        if level != 'full':
+            with self._lock:
+                self.degraded_turns[level] += 1
+        return level
+
+    def state(self) -> Dict:
+        """Accumulated usage, for resuming the session in another process."""
+        with self._lock:
+            return {
+                'agents': {name: dict(agent) for name, agent in self.agents.items()},
+                'degraded_turns': dict(self.degraded_turns),
+            }
+
+    def restore(self, state: Dict):
+        with self._lock:
+            self.agents = {name: dict(agent) for name, agent in state['agents'].items()}
+            self.degraded_turns.update(state['degraded_turns'])
+
+    def snapshot(self) -> Dict:
+        totals = self.totals()
+        totals['cost_usd'] = round(totals['cost_usd'], 6)
+        with self._lock:
+            agents = {name: {**agent, 'cost_usd': round(agent['cost_usd'], 6)} for name, agent in self.agents.items()}
+            degraded_turns = dict(self.degraded_turns)
+        return {
+            **totals,
+            'agents': agents,
+            'budget': {
+                'tokens': self.token_budget or None,
+                'cost_usd': self.cost_budget or None,
+                'fraction_used': round(self.fraction_used(), 4),
+                'level': self.level(),
+                'hard_stop': self.hard_stop,
+            },
+            'degraded_turns': degraded_turns,
+        }
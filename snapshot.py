@@ -0,0 +1,195 @@
+"""Versioned, incremental snapshots of live interviews.
+
+A ``GroupDiscussion`` or ``InterviewManager`` is stored under one key as a
+small head plus parts (see ``session_store.part_key``):
+
+    <key>                 head: format version, kind, the length of each
+                          log, and the state that changes every turn
+                          (memory, usage, gating, the interviewer's topics)
+    <key>#setup           context, plan and mode; written once
+    <key>#<log>:<n>       entries n*S .. (n+1)*S - 1 of an append-only log:
+                          the turn history, and the interviewer's asked
+                          questions with their packed signatures
+
+The head's version is the turn count. Saving after a turn writes the head
+and, for each log, only the segment still filling up, all in a single
+transaction, so it costs the same at turn 500 as at turn 5. Loading reads
+the head and then all parts in one key-range query. Snapshots written
+before the format was split (format 1, a single blob) are still read and
+are rewritten in the current format on their next save.
+
+Settings (environment):
+    SNAPSHOT_SEGMENT_TURNS  log entries per stored segment (default 16)
+"""
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents import InterviewManager
+from discussion import GroupDiscussion
+from metrics import percentile
+from session_store import SessionStore, part_key
+
+FORMAT_VERSION = 2
+
+SEGMENT_TURNS = int(os.getenv('SNAPSHOT_SEGMENT_TURNS', '16'))
+
+# Snapshot kind -> (class, state fields that never change after setup, paths of append-only logs in the state)
+KINDS = {
+    'discussion': (GroupDiscussion, ('context', 'plan', 'mode'), (('history',),)),
+    'interview': (InterviewManager, ('context',), (('history',), ('agent', 'asked_questions', 'questions'))),
+}
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class SnapshotStats:
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._counts = {'saves': 0, 'loads': 0, 'upgraded': 0, 'entries_written': 0}
+        self._save_seconds = deque(maxlen=window)
+        self._load_seconds = deque(maxlen=window)
+
+    def record_save(self, entries: int, seconds: float):
+        with self._lock:
+            self._counts['saves'] += 1
+            self._counts['entries_written'] += entries
+            self._save_seconds.append(seconds)
+
+    def record_load(self, seconds: float, upgraded: bool = False):
+        with self._lock:
+            self._counts['loads'] += 1
+            self._counts['upgraded'] += upgraded
+            self._load_seconds.append(seconds)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            counts = dict(self._counts)
+            saves, loads = list(self._save_seconds), list(self._load_seconds)
+        return {
+            **counts,
+            'save_p50_ms': round(percentile(saves, 50) * 1000, 3) if saves else 0.0,
+            'save_p95_ms': round(percentile(saves, 95) * 1000, 3) if saves else 0.0,
+            'load_p50_ms': round(percentile(loads, 50) * 1000, 3) if loads else 0.0,
+            'load_p95_ms': round(percentile(loads, 95) * 1000, 3) if loads else 0.0,
+        }
+
+
+stats = SnapshotStats()
+
+# What has already been written for each live object, by (store, key): log lengths and segment size
+_saved: "weakref.WeakKeyDictionary[Any, Dict[tuple, dict]]" = weakref.WeakKeyDictionary()
+_saved_lock = threading.Lock()
+
+
+def save(store: SessionStore, key: str, obj) -> int:
+    """Write what changed since ``obj`` was last saved or loaded; returns entries written."""
+    start = time.perf_counter()
+    kind = _kind(obj)
+    _, setup_fields, log_paths = KINDS[kind]
+    state = obj.to_state()
+    logs = {_log_name(path): _pop(state, path) for path in log_paths}
+    setup = {name: state.pop(name) for name in setup_fields}
+    turns = len(logs['history'])
+    with _saved_lock:
+        saved = _saved.get(obj, {}).get((store, key))
+    segment_turns = saved['segment_turns'] if saved else SEGMENT_TURNS
+
+    entries = []
+    if saved is None:
+        entries.append((part_key(key, 'setup'), setup, 0))
+    for name, log in logs.items():
+        written = min(saved['logs'].get(name, 0), len(log)) if saved else 0
+        for segment in range(written // segment_turns, -(-len(log) // segment_turns)):
+            entries.append((
+                part_key(key, f'{name}:{segment}'),
+                log[segment * segment_turns:(segment + 1) * segment_turns],
+                turns
+            ))
+    lengths = {name: len(log) for name, log in logs.items()}
+    head = {
+        'format': FORMAT_VERSION,
+        'kind': kind,
+        'logs': lengths,
+        'segment_turns': segment_turns,
+        'state': state,
+    }
+    entries.append((key, head, turns))
+    written = store.put_many(entries)
+    _mark_saved(obj, store, key, lengths, segment_turns)
+    stats.record_save(len(entries), time.perf_counter() - start)
+    return written
+
+
+def load(store: SessionStore, key: str) -> Optional[Any]:
+    """The object saved under ``key``, or None when there is none."""
+    start = time.perf_counter()
+    stored = store.get(key)
+    if stored is None:
+        return None
+    head = stored[1]
+    version = head.get('format', 1)
+    if version == 1:
+        # A whole GroupDiscussion.to_state() blob; not marked as saved, so the next save writes every part
+        obj = GroupDiscussion.from_state(head)
+        stats.record_load(time.perf_counter() - start, upgraded=True)
+        return obj
+    if version > FORMAT_VERSION:
+        raise SnapshotError(f"Snapshot {key} has format {version}; this version reads up to {FORMAT_VERSION}")
+
+    cls, _, log_paths = KINDS[head['kind']]
+    parts = store.parts(key)
+    segment_turns = head['segment_turns']
+    if 'setup' not in parts:
+        raise SnapshotError(f"Snapshot {key} is missing its setup")
+    state = {**head['state'], **parts['setup'][1]}
+    for path in log_paths:
+        name = _log_name(path)
+        length = head['logs'][name]
+        log = []
+        for segment in range(-(-length // segment_turns)):
+            part = parts.get(f'{name}:{segment}')
+            if part is None:
+                raise SnapshotError(f"Snapshot {key} is missing {name} segment {segment}")
+            log.extend(part[1])
+        # Parts can run ahead of the head when another worker saved in between the two reads
+        del log[length:]
+        _put(state, path, log)
+
+    obj = cls.from_state(state)
+    _mark_saved(obj, store, key, head['logs'], segment_turns)
+    stats.record_load(time.perf_counter() - start)
+    return obj
+
+
+def _mark_saved(obj, store: SessionStore, key: str, lengths: Dict[str, int], segment_turns: int):
+    with _saved_lock:
+        _saved.setdefault(obj, {})[(store, key)] = {'logs': dict(lengths), 'segment_turns': segment_turns}
+
+
+def _kind(obj) -> str:
+    for kind, (cls, _, _) in KINDS.items():
+        if isinstance(obj, cls):
+            return kind
+    raise TypeError(f"Cannot snapshot {type(obj).__name__}")
+
+
+def _log_name(path: Tuple[str, ...]) -> str:
+    return '.'.join(path)
+
+
+def _pop(state: dict, path: Tuple[str, ...]) -> List:
+    for name in path[:-1]:
+        state = state[name]
+    return state.pop(path[-1])
+
+
+def _put(state: dict, path: Tuple[str, ...], value: List):
+    for name in path[:-1]:
+        state = state[name]
+    state[path[-1]] = value
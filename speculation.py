@@ -0,0 +1,169 @@
+"""Speculative pre-generation of answer-independent discussion work.
+
+While the interviewee is reading and answering, a discussion can start the
+parts of its next turn that do not depend on the answer, such as the
+Completeness Analyst's gap analysis of the topics covered so far. The
+result is tagged with the history length it was computed from; if the
+history has moved on by the time the answer arrives, it is thrown away.
+
+Speculation runs on a small dedicated pool behind a process-wide cap, and
+is skipped rather than queued when the cap is reached, so it never
+competes with real requests for workers. A turn waits for its
+speculation only as long as its own budget allows, then abandons it and
+makes the call live.
+
+Settings (environment):
+    SPECULATIVE_ANALYSIS        "1" to enable speculation (default 0)
+    SPECULATION_MAX_CONCURRENT  speculative calls in flight per process (default 2)
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional
+
+MAX_CONCURRENT = int(os.getenv('SPECULATION_MAX_CONCURRENT', '2'))
+
+_slots = threading.BoundedSemaphore(MAX_CONCURRENT)
+_speculation_pool = ThreadPoolExecutor(max_workers=MAX_CONCURRENT, thread_name_prefix='speculation')
+
+
+class SpeculationStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {
+            'launched': 0,
+            'hits': 0,
+            'misses': 0,
+            'stale': 0,
+            'unused': 0,
+            'failed': 0,
+            'timed_out': 0,
+            'skipped_at_capacity': 0,
+        }
+        self.seconds_saved = 0.0
+
+    def count(self, name: str, seconds_saved: float = 0.0):
+        with self._lock:
+            self._counts[name] += 1
+            self.seconds_saved += seconds_saved
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts = dict(self._counts)
+            seconds_saved = self.seconds_saved
+        used = counts['hits'] + counts['misses']
+        return {
+            **counts,
+            'hit_rate': counts['hits'] / used if used else 0.0,
+            'seconds_saved': round(seconds_saved, 3),
+            'max_concurrent': MAX_CONCURRENT,
+        }
+
+
+stats = SpeculationStats()
+
+
+class _Pending:
+    def __init__(self, version: int, future: Future):
+        self.version = version
+        self.future = future
+
+
+class Speculator:
+    """Holds at most one pending speculation for a discussion."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._pending: Optional[_Pending] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "Speculator":
+        return cls(enabled=os.getenv('SPECULATIVE_ANALYSIS', '0') == '1')
+
+    def launch(self, version: int, work: Callable[[], str]) -> bool:
+        """Start ``work`` for the state identified by ``version``, if a slot is free."""
+        if not self.enabled:
+            return False
+        self.discard()
+        if not _slots.acquire(blocking=False):
+            stats.count('skipped_at_capacity')
+            return False
+        future = _speculation_pool.submit(self._run, work)
+        future.add_done_callback(lambda _: _slots.release())
+        with self._lock:
+            self._pending = _Pending(version, future)
+        stats.count('launched')
+        return True
+
+    def take(self, version: int) -> Optional[Future]:
+        """The pending speculation if it was computed for ``version``; stale ones are dropped."""
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is None:
+            if self.enabled:
+                stats.count('misses')
+            return None
+        if pending.version != version:
+            pending.future.cancel()
+            stats.count('stale')
+            stats.count('misses')
+            return None
+        return pending.future
+
+    def discard(self):
+        """Drop a speculation the next turn did not need."""
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is not None:
+            pending.future.cancel()
+            stats.count('unused')
+
+    @staticmethod
+    def result(future: Future, timeout: Optional[float] = None) -> Optional[str]:
+        """Wait up to ``timeout`` for a taken speculation; None if it failed or is late, so it is computed live."""
+        start = time.perf_counter()
+        done, _ = wait([future], timeout=timeout)
+        if not done:
+            return Speculator._abandon(future)
+        try:
+            text, duration = future.result()
+        except Exception as e:
+            print(f"Speculation failed: {e}")
+            stats.count('failed')
+            stats.count('misses')
+            return None
+        stats.count('hits', max(0.0, duration - (time.perf_counter() - start)))
+        return text
+
+    @staticmethod
+    async def aresult(future: Future, timeout: Optional[float] = None) -> Optional[str]:
+        start = time.perf_counter()
+        waiter = asyncio.wrap_future(future)
+        done, _ = await asyncio.wait([waiter], timeout=timeout)
+        if not done:
+            return Speculator._abandon(future)
+        try:
+            text, duration = waiter.result()
+        except Exception as e:
+            print(f"Speculation failed: {e}")
+            stats.count('failed')
+            stats.count('misses')
+            return None
+        stats.count('hits', max(0.0, duration - (time.perf_counter() - start)))
+        return text
+
+    @staticmethod
+    def _abandon(future: Future) -> None:
+        # Still running at the deadline: let it finish in the background, unused
+        future.cancel()
+        stats.count('timed_out')
+        stats.count('misses')
+        return None
+
+    @staticmethod
+    def _run(work: Callable[[], str]):
+        start = time.perf_counter()
+        return work(), time.perf_counter() - start
@@ -0,0 +1,109 @@
+import threading
+import time
+
+import pytest
+
+from idempotency import IdempotencyCache, IdempotencyConflict
+from session_store import MemorySessionStore, SQLiteSessionStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_replays_the_first_result():
+    cache = IdempotencyCache()
+    calls = []
+    compute = lambda: calls.append(1) or (200, {'message': 'hi'})
+    assert cache.run('session:key', 'fp', compute) == ((200, {'message': 'hi'}), True)
+    assert cache.run('session:key', 'fp', compute) == ([200, {'message': 'hi'}], False)
+    assert len(calls) == 1
+    assert cache.stats()['replayed'] == 1
+
+
+def test_key_reused_for_a_different_message_conflicts():
+    cache = IdempotencyCache()
+    cache.run('session:key', 'fp', lambda: 'done')
+    with pytest.raises(IdempotencyConflict):
+        cache.run('session:key', 'other', lambda: 'done')
+    future, owner = cache.claim('session:busy', 'fp')
+    with pytest.raises(IdempotencyConflict):
+        cache.claim('session:busy', 'other')
+    assert cache.stats()['conflicts'] == 2
+
+
+def test_results_not_kept_and_failures_release_the_key():
+    cache = IdempotencyCache()
+    assert cache.run('k', 'fp', lambda: 'busy', keep=lambda result: False) == ('busy', True)
+    assert cache.run('k', 'fp', lambda: 'ok') == ('ok', True)
+
+    def fail():
+        raise ValueError('boom')
+    with pytest.raises(ValueError):
+        cache.run('f', 'fp', fail)
+    assert cache.run('f', 'fp', lambda: 'ok') == ('ok', True)
+
+
+def test_duplicate_waits_for_the_turn_in_flight():
+    cache = IdempotencyCache()
+    future, owner = cache.claim('k', 'fp')
+    duplicate, duplicate_owner = cache.claim('k', 'fp')
+    assert owner and not duplicate_owner
+    cache.finish('k', future, 'result')
+    assert cache.result(duplicate) == 'result'
+
+
+def test_coalesces_across_workers_sharing_a_store(tmp_path):
+    path = str(tmp_path / 'sessions.db')
+    first = IdempotencyCache(SQLiteSessionStore(path), poll_interval=0.01)
+    second = IdempotencyCache(SQLiteSessionStore(path), poll_interval=0.01)
+    started = threading.Event()
+    calls = []
+
+    def slow_turn():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return [200, {'message': 'hi'}]
+
+    owner = threading.Thread(target=first.run, args=('k', 'fp', slow_turn))
+    owner.start()
+    started.wait()
+    assert second.run('k', 'fp', slow_turn) == ([200, {'message': 'hi'}], False)
+    owner.join()
+    assert second.run('k', 'fp', slow_turn) == ([200, {'message': 'hi'}], False)
+    assert len(calls) == 1
+
+
+def test_abandoned_claim_times_out_waiters_and_is_claimed_again():
+    clock = Clock()
+    store = MemorySessionStore(clock=clock)
+    cache = IdempotencyCache(store, wait_timeout=30, clock=clock)
+    abandoned, _ = cache.claim('k', 'fp')
+    waiter, _ = cache.claim('k', 'fp')
+
+    clock.now += 31
+    retry, owner = cache.claim('k', 'fp')
+    assert owner
+    with pytest.raises(TimeoutError):
+        waiter.result(timeout=0)
+    assert cache.stats()['abandoned'] == 1
+
+    # The original request finishing late must not overwrite the retry's claim
+    cache.finish('k', abandoned, 'stale')
+    cache.finish('k', retry, 'fresh')
+    assert cache.run('k', 'fp', lambda: 'again') == ('fresh', False)
+
+
+def test_stale_claim_left_by_another_worker_is_claimed_again():
+    clock = Clock()
+    store = MemorySessionStore(clock=clock)
+    crashed = IdempotencyCache(store, wait_timeout=30, clock=clock)
+    crashed.claim('k', 'fp')
+    clock.now += 31
+    survivor = IdempotencyCache(store, wait_timeout=30, clock=clock)
+    assert survivor.run('k', 'fp', lambda: 'ok') == ('ok', True)
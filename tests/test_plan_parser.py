@@ -0,0 +1,104 @@
+import json
+import os
+
+os.environ.setdefault('OPENAI_API_KEY', 'test')
+os.environ.setdefault('LLM_BACKEND', 'fake')
+
+import pytest
+
+from plan_parser import PlanParseError, parse_plan
+from planning_agent import PlanningAgent
+
+PLAN = {
+    "interview_type": "exploratory",
+    "key_topics": ["picking", "scanners"],
+    "suggested_questions": ["What slows a pick down?"],
+    "personality_traits": ["curious"],
+    "communication_style": "plain",
+    "special_considerations": ["shift workers"],
+}
+
+
+class ScriptedLLM:
+    """Answers each call with the next scripted reply and records the messages it was sent."""
+
+    def __init__(self, *replies: str):
+        self.replies = list(replies)
+        self.calls = []
+
+    def invoke(self, messages, **kwargs):
+        self.calls.append(messages)
+        return type('Reply', (), {'content': self.replies.pop(0)})()
+
+
+def test_parses_strict_json():
+    assert parse_plan(json.dumps(PLAN)) == PLAN
+
+
+def test_repairs_fenced_json_with_surrounding_prose():
+    reply = "Here is the plan:\n```json\n" + json.dumps(PLAN, indent=2) + "\n```\nGood luck!"
+    assert parse_plan(reply) == PLAN
+
+
+def test_repairs_trailing_commas_and_python_literals():
+    assert parse_plan(json.dumps(PLAN)[:-1] + ",}") == PLAN
+    assert parse_plan(repr(PLAN)) == PLAN
+
+
+def test_coerces_field_types():
+    plan = parse_plan(json.dumps({**PLAN, "key_topics": "picking", "communication_style": ["plain", "warm"]}))
+    assert plan["key_topics"] == ["picking"]
+    assert plan["communication_style"] == "plain, warm"
+
+
+@pytest.mark.parametrize("reply", [
+    "I could not come up with a plan.",
+    '{"interview_type": "exploratory", "key_topics": [',
+    '["not", "an", "object"]',
+])
+def test_malformed_replies_raise(reply):
+    with pytest.raises(PlanParseError) as error:
+        parse_plan(reply)
+    assert "Reply again with only the corrected JSON object" in error.value.retry_prompt()
+
+
+def test_partial_plan_names_missing_fields():
+    partial = {name: value for name, value in PLAN.items() if name not in ("key_topics", "personality_traits")}
+    with pytest.raises(PlanParseError) as error:
+        parse_plan(json.dumps(partial))
+    assert error.value.problems == ['"key_topics" is missing', '"personality_traits" is missing']
+
+
+def test_partial_plan_filled_from_defaults():
+    partial = {name: value for name, value in PLAN.items() if name != "key_topics"}
+    plan = parse_plan(json.dumps(partial), defaults={"key_topics": ["background"]})
+    assert plan == {**PLAN, "key_topics": ["background"]}
+
+
+def test_extra_fields_are_kept_only_when_asked_for():
+    reply = json.dumps({**PLAN, "initialization_message": "Begin gently", "notes": "ignored"})
+    assert parse_plan(reply, extra_fields=("initialization_message",)) == {**PLAN, "initialization_message": "Begin gently"}
+
+
+def test_request_plan_retries_once_with_the_parse_error():
+    agent = PlanningAgent()
+    agent.llm = ScriptedLLM("no plan here", json.dumps(PLAN))
+    assert agent._request_plan([{"role": "user", "content": "plan"}]) == PLAN
+    assert len(agent.llm.calls) == 2
+    retry = agent.llm.calls[1]
+    assert retry[-2] == {"role": "assistant", "content": "no plan here"}
+    assert "did not contain a JSON object" in retry[-1]["content"]
+
+
+def test_retry_keeps_what_the_model_got_right():
+    partial = {name: value for name, value in PLAN.items() if name != "special_considerations"}
+    agent = PlanningAgent()
+    agent.llm = ScriptedLLM("{", json.dumps(partial))
+    plan = agent._request_plan([{"role": "user", "content": "plan"}])
+    assert plan == {**partial, "special_considerations": agent._default_plan().special_considerations}
+
+
+def test_falls_back_to_the_default_plan_after_two_bad_replies():
+    agent = PlanningAgent()
+    agent.llm = ScriptedLLM("not json", "still not json")
+    assert agent.create_interview_plan("context", "background", "goals") == agent._default_plan()
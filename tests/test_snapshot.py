@@ -0,0 +1,90 @@
+import os
+
+os.environ.setdefault('OPENAI_API_KEY', 'test')
+os.environ.setdefault('LLM_BACKEND', 'fake')
+os.environ.setdefault('FAKE_LLM_LATENCY', '0')
+os.environ.setdefault('MEMORY_SUMMARIZER', 'extractive')
+
+import pytest
+
+import snapshot
+from agents import InterviewManager
+from discussion import GroupDiscussion
+from session_store import MemorySessionStore, part_key
+from snapshot import SnapshotError
+
+CONTEXT = {'product': 'warehouse scanners', 'goals': 'find what slows picking down'}
+
+
+def _discussion(turns: int) -> GroupDiscussion:
+    discussion = GroupDiscussion(CONTEXT, mode='sequential')
+    for turn in range(turns):
+        discussion.discuss(f"Answer number {turn} about the scanners")
+    return discussion
+
+
+def test_discussion_round_trips(monkeypatch):
+    monkeypatch.setattr(snapshot, 'SEGMENT_TURNS', 2)
+    store = MemorySessionStore()
+    discussion = _discussion(5)
+    snapshot.save(store, 'discussion:a', discussion)
+
+    loaded = snapshot.load(store, 'discussion:a')
+    assert loaded.to_state() == discussion.to_state()
+    assert sorted(store.parts('discussion:a')) == ['history:0', 'history:1', 'history:2', 'setup']
+
+
+def test_save_writes_only_the_head_and_the_filling_segment(monkeypatch):
+    monkeypatch.setattr(snapshot, 'SEGMENT_TURNS', 2)
+    store = MemorySessionStore()
+    discussion = _discussion(5)
+    snapshot.save(store, 'discussion:a', discussion)
+
+    loaded = snapshot.load(store, 'discussion:a')
+    loaded.discuss("One more answer")
+    assert snapshot.save(store, 'discussion:a', loaded) == 2
+    assert snapshot.load(store, 'discussion:a').to_state() == loaded.to_state()
+
+
+def test_interview_round_trips():
+    store = MemorySessionStore()
+    manager = InterviewManager(CONTEXT)
+    for turn in range(3):
+        manager.chat(f"Answer number {turn} about the scanners")
+    snapshot.save(store, 'interview:a', manager)
+
+    loaded = snapshot.load(store, 'interview:a')
+    assert isinstance(loaded, InterviewManager)
+    assert loaded.to_state() == manager.to_state()
+
+
+def test_format_1_blob_is_read_and_rewritten_on_next_save():
+    store = MemorySessionStore()
+    discussion = _discussion(3)
+    store.put('discussion:old', discussion.to_state(), len(discussion.discussion_history))
+    upgraded = snapshot.stats.snapshot()['upgraded']
+
+    loaded = snapshot.load(store, 'discussion:old')
+    assert loaded.to_state() == discussion.to_state()
+    assert snapshot.stats.snapshot()['upgraded'] == upgraded + 1
+
+    snapshot.save(store, 'discussion:old', loaded)
+    assert store.get('discussion:old')[1]['format'] == snapshot.FORMAT_VERSION
+    assert 'setup' in store.parts('discussion:old')
+    assert snapshot.load(store, 'discussion:old').to_state() == discussion.to_state()
+
+
+def test_newer_format_is_refused():
+    store = MemorySessionStore()
+    store.put('discussion:new', {'format': snapshot.FORMAT_VERSION + 1, 'kind': 'discussion'})
+    with pytest.raises(SnapshotError):
+        snapshot.load(store, 'discussion:new')
+
+
+def test_missing_segment_is_reported(monkeypatch):
+    monkeypatch.setattr(snapshot, 'SEGMENT_TURNS', 2)
+    store = MemorySessionStore()
+    snapshot.save(store, 'discussion:a', _discussion(3))
+    store.delete(part_key('discussion:a', 'history:0'))
+    with pytest.raises(SnapshotError, match='history segment 0'):
+        snapshot.load(store, 'discussion:a')
@@ -0,0 +1,25 @@
+import os
+
+os.environ.setdefault('OPENAI_API_KEY', 'test')
+os.environ.setdefault('LLM_BACKEND', 'fake')
+
+from agents import is_struggling
+from turn_gating import TurnGate
+
+
+def test_long_answer_containing_why_runs_auxiliary_agents():
+    gate = TurnGate()
+    answer = "That's why we restart it, which takes a couple of minutes"
+    assert is_struggling(answer)
+    assert gate.skip_reason(answer) is None
+
+
+def test_short_struggling_answer_skips_auxiliary_agents():
+    assert TurnGate().skip_reason("why??") == 'struggle'
+    assert TurnGate().skip_reason("I don't know, not sure") == 'struggle'
+
+
+def test_signals_match_whole_words():
+    assert not is_struggling("I'm unconfused about it now")
+    assert not is_struggling("Whyever would they move the dock")
+    assert is_struggling("Not sure")
@@ -0,0 +1,213 @@
+"""Per-request tracing and slow-request profiling.
+
+A trace is started for a sampled fraction of requests and carried in a
+context variable, so code anywhere below the request can open spans with
+``span(name)`` without passing anything around. When no trace is active a
+span costs one context-variable lookup. Finished traces are appended to a
+JSONL file by a background thread.
+
+Settings (environment):
+    TRACE_SAMPLE_RATE     fraction of requests traced, 0 to 1 (default 0, off)
+    TRACE_FILE            JSONL file traces are appended to (default traces.jsonl)
+    PROFILE_SLOW_SECONDS  profile every request with cProfile and keep the
+                          profile of those slower than this (default unset, off)
+    PROFILE_DIR           where slow-request profiles are written (default profiles)
+"""
+import contextvars
+import cProfile
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0'))
+TRACE_FILE = os.getenv('TRACE_FILE', 'traces.jsonl')
+PROFILE_SLOW_SECONDS = float(os.getenv('PROFILE_SLOW_SECONDS', '0')) or None
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+
+_current_trace = contextvars.ContextVar('trace', default=None)
+_current_span = contextvars.ContextVar('span', default=None)
+
+
+class Trace:
+    def __init__(self, name: str, attrs: Dict = None):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.attrs = dict(attrs or {})
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.spans: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def add_span(self, span: Dict):
+        with self._lock:
+            self.spans.append(span)
+
+    def offset_ms(self, at: float) -> float:
+        return round((at - self._start) * 1000, 3)
+
+    def to_dict(self, duration: float) -> Dict:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span['start_ms'])
+        return {
+            'trace_id': self.trace_id,
+            'name': self.name,
+            'started_at': self.started_at,
+            'duration_ms': round(duration * 1000, 3),
+            'attrs': self.attrs,
+            'spans': spans,
+        }
+
+
+class _Exporter:
+    def __init__(self, path: str, max_pending: int = 1000):
+        self.path = path
+        self.dropped = 0
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def export(self, record: Dict):
+        self._ensure_started()
+        try:
+            self._pending.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._write_loop, name='trace-exporter', daemon=True)
+                    self._thread.start()
+
+    def _write_loop(self):
+        while True:
+            records = [self._pending.get()]
+            while True:
+                try:
+                    records.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with open(self.path, 'a') as f:
+                    f.write(''.join(json.dumps(record) + '\n' for record in records))
+            except Exception as e:
+                self.dropped += len(records)
+                print(f"Error exporting traces: {e}")
+
+
+_exporter = _Exporter(TRACE_FILE)
+
+
+def start_trace(name: str, attrs: Dict = None, sample_rate: float = None) -> Optional[Trace]:
+    """Begin a trace in the current context if this request is sampled; returns None otherwise."""
+    rate = SAMPLE_RATE if sample_rate is None else sample_rate
+    if rate <= 0 or (rate < 1 and random.random() >= rate):
+        return None
+    trace = Trace(name, attrs)
+    _current_trace.set(trace)
+    _current_span.set(None)
+    return trace
+
+
+def finish_trace(trace: Optional[Trace], **attrs):
+    if trace is None:
+        return
+    trace.attrs.update({key: value for key, value in attrs.items() if value is not None})
+    _exporter.export(trace.to_dict(time.perf_counter() - trace._start))
+    if _current_trace.get() is trace:
+        _current_trace.set(None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def trace(name: str, **attrs):
+    """Trace the enclosed block as one request."""
+    active = start_trace(name, attrs)
+    try:
+        yield active
+    finally:
+        finish_trace(active)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Record the enclosed block as a span of the active trace, if any."""
+    active = _current_trace.get()
+    if active is None:
+        yield None
+        return
+    span_id = uuid.uuid4().hex[:16]
+    parent = _current_span.set(span_id)
+    start = time.perf_counter()
+    error = None
+    try:
+        yield attrs
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        end = time.perf_counter()
+        _current_span.reset(parent)
+        record = {
+            'span_id': span_id,
+            'parent_id': parent.old_value if parent.old_value is not contextvars.Token.MISSING else None,
+            'name': name,
+            'start_ms': active.offset_ms(start),
+            'duration_ms': round((end - start) * 1000, 3),
+            'thread': threading.current_thread().name,
+        }
+        if attrs:
+            record['attrs'] = attrs
+        if error:
+            record['error'] = error
+        active.add_span(record)
+
+
+def propagate(fn: Callable) -> Callable:
+    """Bind ``fn`` to the current context (trace, LLM call budget), for work handed to a thread pool."""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+def start_profile() -> Optional[cProfile.Profile]:
+    """Start profiling the current thread when slow-request profiling is enabled."""
+    if PROFILE_SLOW_SECONDS is None:
+        return None
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Another profiler is already active on this thread
+        return None
+    return profile
+
+
+def finish_profile(profile: Optional[cProfile.Profile], name: str, duration: float,
+                   trace: Optional[Trace] = None) -> Optional[str]:
+    """Stop ``profile`` and keep it if the request was slow; returns the profile path."""
+    if profile is None:
+        return None
+    profile.disable()
+    if duration < PROFILE_SLOW_SECONDS:
+        return None
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    label = ''.join(c if c.isalnum() else '_' for c in name).strip('_') or 'request'
+    path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{label}-{uuid.uuid4().hex[:8]}.prof")
+    try:
+        profile.dump_stats(path)
+    except Exception as e:
+        print(f"Error writing profile: {e}")
+        return None
+    if trace is not None:
+        trace.attrs['profile'] = path
+    return path
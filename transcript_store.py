@@ -0,0 +1,227 @@
+"""Durable store for interview transcripts.
+
+Turns are written to SQLite in WAL mode by a background thread that batches
+inserts, so recording a turn never waits on disk. Reads use keyset
+pagination over indexed columns and an FTS5 index for full-text search,
+which keeps the History API fast with hundreds of thousands of turns.
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS interview_sessions (
+        session_id TEXT PRIMARY KEY,
+        created_at REAL NOT NULL,
+        title TEXT NOT NULL,
+        context TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS interview_sessions_created ON interview_sessions (created_at)",
+    """CREATE TABLE IF NOT EXISTS turns (
+        id INTEGER PRIMARY KEY,
+        session_id TEXT NOT NULL,
+        turn_index INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        user_message TEXT NOT NULL,
+        response TEXT NOT NULL,
+        agent_responses TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS turns_session ON turns (session_id, id)",
+    "CREATE INDEX IF NOT EXISTS turns_created ON turns (created_at)",
+]
+
+FTS_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5(
+        user_message, response, content='turns', content_rowid='id'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS turns_fts_insert AFTER INSERT ON turns BEGIN
+        INSERT INTO turns_fts (rowid, user_message, response)
+        VALUES (new.id, new.user_message, new.response);
+    END""",
+]
+
+
+class TranscriptStore:
+    def __init__(self, db_path: str, batch_size: int = 200, flush_interval: float = 0.5,
+                 max_pending: int = 10000):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._local = threading.local()
+        self._dropped = 0
+        self._written = 0
+
+        db = self._connection()
+        for statement in SCHEMA:
+            db.execute(statement)
+        try:
+            for statement in FTS_SCHEMA:
+                db.execute(statement)
+            self.full_text = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5; search falls back to LIKE scans
+            self.full_text = False
+        db.commit()
+
+        self._writer = threading.Thread(target=self._write_loop, name='transcript-writer', daemon=True)
+        self._writer.start()
+
+    @classmethod
+    def from_env(cls) -> "TranscriptStore":
+        return cls(
+            db_path=os.getenv('TRANSCRIPT_DB', 'transcripts.db'),
+            batch_size=int(os.getenv('TRANSCRIPT_BATCH_SIZE', '200')),
+            flush_interval=float(os.getenv('TRANSCRIPT_FLUSH_INTERVAL', '0.5')),
+        )
+
+    def record_session(self, session_id: str, context: dict):
+        title = (context.get('goals') or context.get('context') or 'Interview').strip().split('\n')[0][:120]
+        self._enqueue(('session', (session_id, time.time(), title, json.dumps(context))))
+
+    def record_turn(self, session_id: str, turn_index: int, user_message: str,
+                    response: str, agent_responses: List[str]):
+        self._enqueue(('turn', (
+            session_id, turn_index, time.time(), user_message, response, json.dumps(agent_responses)
+        )))
+
+    def flush(self, timeout: float = 5.0):
+        """Block until everything recorded so far has been written."""
+        done = threading.Event()
+        self._pending.put(('flush', done))
+        done.wait(timeout)
+
+    def list_sessions(self, limit: int = 20, before: Optional[float] = None) -> Dict:
+        rows = self._connection().execute(
+            """SELECT s.session_id, s.created_at, s.title,
+                      (SELECT COUNT(*) FROM turns t WHERE t.session_id = s.session_id)
+               FROM interview_sessions s
+               WHERE s.created_at < ?
+               ORDER BY s.created_at DESC LIMIT ?""",
+            (before if before is not None else float('inf'), limit)
+        ).fetchall()
+        sessions = [
+            {'session_id': row[0], 'created_at': row[1], 'title': row[2], 'turns': row[3]}
+            for row in rows
+        ]
+        return {
+            'sessions': sessions,
+            'next_cursor': sessions[-1]['created_at'] if len(sessions) == limit else None,
+        }
+
+    def list_turns(self, session_id: str, limit: int = 50, after: int = 0) -> Dict:
+        rows = self._connection().execute(
+            """SELECT id, turn_index, created_at, user_message, response, agent_responses
+               FROM turns WHERE session_id = ? AND id > ?
+               ORDER BY id LIMIT ?""",
+            (session_id, after, limit)
+        ).fetchall()
+        turns = [self._turn(row) for row in rows]
+        return {
+            'session_id': session_id,
+            'turns': turns,
+            'next_cursor': turns[-1]['id'] if len(turns) == limit else None,
+        }
+
+    def search(self, query: str, limit: int = 20, before: Optional[int] = None) -> Dict:
+        before = before if before is not None else 2 ** 62
+        db = self._connection()
+        if self.full_text:
+            rows = db.execute(
+                """SELECT t.id, t.turn_index, t.created_at, t.user_message, t.response,
+                          t.agent_responses, t.session_id
+                   FROM turns_fts JOIN turns t ON t.id = turns_fts.rowid
+                   WHERE turns_fts MATCH ? AND turns_fts.rowid < ?
+                   ORDER BY turns_fts.rowid DESC LIMIT ?""",
+                (self._match_expression(query), before, limit)
+            ).fetchall()
+        else:
+            pattern = f"%{query}%"
+            rows = db.execute(
+                """SELECT id, turn_index, created_at, user_message, response, agent_responses, session_id
+                   FROM turns WHERE (user_message LIKE ? OR response LIKE ?) AND id < ?
+                   ORDER BY id DESC LIMIT ?""",
+                (pattern, pattern, before, limit)
+            ).fetchall()
+        results = [{**self._turn(row), 'session_id': row[6]} for row in rows]
+        return {
+            'query': query,
+            'results': results,
+            'next_cursor': results[-1]['id'] if len(results) == limit else None,
+        }
+
+    def stats(self) -> Dict:
+        return {'pending': self._pending.qsize(), 'written': self._written, 'dropped': self._dropped}
+
+    @staticmethod
+    def _match_expression(query: str) -> str:
+        # Quote each term so user input is never parsed as FTS5 syntax
+        terms = [term.replace('"', '""') for term in query.split()]
+        return ' '.join(f'"{term}"' for term in terms) or '""'
+
+    @staticmethod
+    def _turn(row) -> Dict:
+        return {
+            'id': row[0],
+            'turn_index': row[1],
+            'created_at': row[2],
+            'user_message': row[3],
+            'response': row[4],
+            'agent_responses': json.loads(row[5]),
+        }
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=10)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+        return db
+
+    def _enqueue(self, item):
+        try:
+            self._pending.put(item, timeout=1)
+        except queue.Full:
+            self._dropped += 1
+            print(f"Transcript store backlog full; dropped a {item[0]} record")
+
+    def _write_loop(self):
+        db = self._connection()
+        while True:
+            batch = [self._pending.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1][0] != 'flush':
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write_batch(db, batch)
+
+    def _write_batch(self, db: sqlite3.Connection, batch: list):
+        sessions = [payload for kind, payload in batch if kind == 'session']
+        turns = [payload for kind, payload in batch if kind == 'turn']
+        try:
+            with db:
+                db.executemany(
+                    'INSERT OR IGNORE INTO interview_sessions (session_id, created_at, title, context) '
+                    'VALUES (?, ?, ?, ?)', sessions
+                )
+                db.executemany(
+                    'INSERT INTO turns (session_id, turn_index, created_at, user_message, response, '
+                    'agent_responses) VALUES (?, ?, ?, ?, ?, ?)', turns
+                )
+            self._written += len(sessions) + len(turns)
+        except Exception as e:
+            self._dropped += len(sessions) + len(turns)
+            print(f"Error writing transcripts: {e}")
+        for kind, payload in batch:
+            if kind == 'flush':
+                payload.set()
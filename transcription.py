@@ -0,0 +1,251 @@
+"""Audio upload handling and transcription for /transcribe.
+
+Uploads are parsed in chunks straight into a per-request spooled buffer:
+small recordings stay in memory, larger ones roll over to a unique
+temporary file. The buffer is handed directly to the transcription client,
+so nothing is written to a shared path and concurrent requests cannot
+collide.
+
+Long recordings can instead be submitted to a TranscriptionQueue, which
+transcribes them on a bounded pool of worker threads and hands back a job
+id to poll. Job status and text are kept in the shared session store, so a
+poll can land on any worker; a poll answers at once, or after a short wait
+when the job runs on the worker that serves it.
+"""
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from collections import deque
+from tempfile import SpooledTemporaryFile
+from typing import IO, Callable, Dict, Optional
+
+import openai
+from flask import Request
+
+from metrics import percentile
+from session_store import MemorySessionStore, SessionStore
+
+# Whisper rejects files above 25 MB
+MAX_UPLOAD_BYTES = int(os.getenv('TRANSCRIBE_MAX_BYTES', str(25 * 1024 * 1024)))
+SPOOL_THRESHOLD_BYTES = int(os.getenv('TRANSCRIBE_SPOOL_BYTES', str(4 * 1024 * 1024)))
+
+# Longest a status poll may wait for its job, so polls never hold a worker for long
+MAX_POLL_WAIT = 2.0
+
+KEY_PREFIX = 'transcription:'
+
+# Stored job versions; a slow writer never moves a job back
+QUEUED, RUNNING, FINISHED = 0, 1, 2
+
+
+class UploadRequest(Request):
+    """Flask request whose file uploads spool to disk only above SPOOL_THRESHOLD_BYTES."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None) -> IO[bytes]:
+        return SpooledTemporaryFile(max_size=SPOOL_THRESHOLD_BYTES, mode='rb+')
+
+
+def transcribe(audio: IO[bytes], filename: str = 'audio.wav', content_type: str = None) -> str:
+    audio.seek(0)
+    transcript = openai.audio.transcriptions.create(
+        model="whisper-1",
+        file=(filename, audio, content_type) if content_type else (filename, audio)
+    )
+    return transcript.text
+
+
+class StubTranscriber:
+    """Offline transcriber for local runs and tests; sleeps, then describes the audio."""
+
+    def __init__(self, latency: float = 0.5):
+        self.latency = latency
+
+    def __call__(self, audio: IO[bytes], filename: str = 'audio.wav', content_type: str = None) -> str:
+        time.sleep(self.latency)
+        audio.seek(0, os.SEEK_END)
+        return f"[stub transcript of {filename}, {audio.tell()} bytes]"
+
+
+def get_transcriber() -> Callable[..., str]:
+    """Whisper by default; TRANSCRIBER=stub swaps in StubTranscriber."""
+    if os.getenv('TRANSCRIBER', 'whisper') == 'stub':
+        return StubTranscriber(latency=float(os.getenv('STUB_TRANSCRIBER_LATENCY', '0.5')))
+    return transcribe
+
+
+class QueueFull(Exception):
+    pass
+
+
+class TranscriptionJob:
+    def __init__(self, audio: IO[bytes], filename: str, content_type: str = None):
+        self.id = uuid.uuid4().hex
+        self.audio = audio
+        self.filename = filename
+        self.content_type = content_type
+        self.status = 'queued'
+        self.text = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.done = threading.Event()
+
+    def to_dict(self) -> dict:
+        job = {'job_id': self.id, 'status': self.status}
+        if self.text is not None:
+            job['text'] = self.text
+        if self.error is not None:
+            job['error'] = self.error
+        if self.started_at is not None:
+            job['queue_wait_s'] = round(self.started_at - self.submitted_at, 3)
+        if self.finished_at is not None:
+            job['transcribe_s'] = round(self.finished_at - self.started_at, 3)
+        return job
+
+
+class TranscriptionQueue:
+    """Bounded pool of worker threads transcribing submitted audio in the background."""
+
+    def __init__(self, transcriber: Callable[..., str] = None, workers: int = 4,
+                 max_queued: int = 32, result_ttl: float = 600.0, store: SessionStore = None):
+        self.transcriber = transcriber or get_transcriber()
+        self.result_ttl = result_ttl
+        self.store = store or MemorySessionStore()
+        self._queue = queue.Queue(maxsize=max_queued)
+        # Jobs queued or running on this worker, so a poll served here can wait for them
+        self._jobs: Dict[str, TranscriptionJob] = {}
+        self._lock = threading.Lock()
+        self._counts = {'submitted': 0, 'rejected': 0, 'completed': 0, 'failed': 0}
+        self._queue_waits = deque(maxlen=1000)
+        self._durations = deque(maxlen=1000)
+        self._running = 0
+        self._workers = [
+            threading.Thread(target=self._work, name=f'transcribe-{i}', daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    @classmethod
+    def from_env(cls, store: SessionStore = None) -> "TranscriptionQueue":
+        return cls(
+            workers=int(os.getenv('TRANSCRIBE_WORKERS', '4')),
+            max_queued=int(os.getenv('TRANSCRIBE_MAX_QUEUED', '32')),
+            result_ttl=float(os.getenv('TRANSCRIBE_RESULT_TTL', '600')),
+            store=store,
+        )
+
+    def submit(self, audio: IO[bytes], filename: str = 'audio.wav', content_type: str = None) -> TranscriptionJob:
+        """Queue ``audio`` for transcription; raises QueueFull when the backlog is at capacity.
+
+        The audio is copied into a buffer owned by the job, since request
+        uploads are closed once the response is sent.
+        """
+        if self._queue.full():
+            self._reject()
+        buffer = SpooledTemporaryFile(max_size=SPOOL_THRESHOLD_BYTES, mode='rb+')
+        audio.seek(0)
+        shutil.copyfileobj(audio, buffer)
+        job = TranscriptionJob(buffer, filename, content_type)
+        try:
+            self.store.put(KEY_PREFIX + job.id, self._status(job), QUEUED)
+        except Exception:
+            buffer.close()
+            raise
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+            self.store.delete(KEY_PREFIX + job.id)
+            buffer.close()
+            self._reject()
+        with self._lock:
+            self._counts['submitted'] += 1
+        return job
+
+    def get(self, job_id: str, wait: float = 0) -> Optional[dict]:
+        """Status of a job submitted to any worker, or None once unknown or expired.
+
+        When the job runs on this worker, waits up to ``wait`` seconds (at
+        most MAX_POLL_WAIT) for it to finish.
+        """
+        wait = min(max(wait, 0.0), MAX_POLL_WAIT)
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None and wait > 0:
+            job.done.wait(wait)
+        stored = self.store.get(KEY_PREFIX + job_id)
+        if stored is None:
+            return None
+        status = dict(stored[1])
+        finished_at = status.pop('finished_at', None)
+        if finished_at is not None and time.time() - finished_at > self.result_ttl:
+            self.store.delete(KEY_PREFIX + job_id)
+            return None
+        return status
+
+    def stats(self) -> dict:
+        with self._lock:
+            queue_waits = list(self._queue_waits)
+            durations = list(self._durations)
+            return {
+                **self._counts,
+                'queued': self._queue.qsize(),
+                'max_queued': self._queue.maxsize,
+                'running': self._running,
+                'workers': len(self._workers),
+                'queue_wait_p50_s': round(percentile(queue_waits, 50), 3),
+                'queue_wait_p95_s': round(percentile(queue_waits, 95), 3),
+                'transcribe_p50_s': round(percentile(durations, 50), 3),
+                'transcribe_p95_s': round(percentile(durations, 95), 3),
+            }
+
+    def _reject(self):
+        with self._lock:
+            self._counts['rejected'] += 1
+        raise QueueFull('Transcription queue is full')
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            job.started_at = time.time()
+            job.status = 'running'
+            self._publish(job, RUNNING)
+            with self._lock:
+                self._running += 1
+            try:
+                job.text = self.transcriber(job.audio, job.filename, job.content_type)
+                job.status = 'done'
+            except Exception as e:
+                print(f"Error in transcription job {job.id}: {str(e)}")
+                job.error = str(e)
+                job.status = 'failed'
+            finally:
+                job.finished_at = time.time()
+                job.audio.close()
+                self._publish(job, FINISHED)
+                with self._lock:
+                    del self._jobs[job.id]
+                    self._running -= 1
+                    self._counts['completed' if job.status == 'done' else 'failed'] += 1
+                    self._queue_waits.append(job.started_at - job.submitted_at)
+                    self._durations.append(job.finished_at - job.started_at)
+                job.done.set()
+                self._queue.task_done()
+
+    @staticmethod
+    def _status(job: TranscriptionJob) -> dict:
+        return {**job.to_dict(), 'finished_at': job.finished_at}
+
+    def _publish(self, job: TranscriptionJob, version: int):
+        try:
+            self.store.put(KEY_PREFIX + job.id, self._status(job), version)
+        except Exception as e:
+            print(f"Error saving transcription job {job.id} to the session store: {e}")
@@ -0,0 +1,104 @@
+"""Zero-LLM gating of the auxiliary discussion agents.
+
+Before each turn a local classifier, built on the same short-answer and
+struggle heuristics InterviewAgent uses, decides whether the Completeness
+Analyst and Depth Explorer have anything to add. On trivial turns ("yes",
+"not sure", "can we move on") the lead answers alone. A struggle signal in
+a longer answer ("that's why we restart it...") is part of real content,
+so it only counts in answers of at most ``STRUGGLE_MAX_WORDS`` words.
+Auxiliary agents still run at least every ``max_consecutive_skips + 1``
+turns so coverage of the plan keeps being checked.
+
+Settings (environment):
+    AGENT_GATING            "0" to always run every agent (default 1)
+    AGENT_GATING_MAX_SKIPS  consecutive turns that may skip the auxiliary agents (default 2)
+"""
+import os
+import threading
+from typing import Dict, Optional
+
+from agents import is_short_answer, is_struggling
+
+# Longer answers carry content even when they contain a struggle signal
+STRUGGLE_MAX_WORDS = 6
+
+
+class GatingStats:
+    """Skip counts and estimated latency saved, per discussion or process-wide."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.skipped = 0
+        self.reasons: Dict[str, int] = {}
+        self.seconds_saved = 0.0
+
+    def record(self, reason: Optional[str], seconds_saved: float = 0.0):
+        with self._lock:
+            self.turns += 1
+            if reason:
+                self.skipped += 1
+                self.reasons[reason] = self.reasons.get(reason, 0) + 1
+                self.seconds_saved += seconds_saved
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'turns': self.turns,
+                'skipped': self.skipped,
+                'skip_rate': self.skipped / self.turns if self.turns else 0.0,
+                'reasons': dict(self.reasons),
+                'seconds_saved': round(self.seconds_saved, 3),
+            }
+
+
+# Totals across every discussion in this process
+stats = GatingStats()
+
+
+class TurnGate:
+    def __init__(self, enabled: bool = True, max_consecutive_skips: int = 2):
+        self.enabled = enabled
+        self.max_consecutive_skips = max_consecutive_skips
+        self.stats = GatingStats()
+        self._consecutive_skips = 0
+        # Running estimate of what the auxiliary agents add to a turn, from turns that ran them
+        self._auxiliary_seconds = None
+
+    @classmethod
+    def from_env(cls) -> "TurnGate":
+        return cls(
+            enabled=os.getenv('AGENT_GATING', '1') == '1',
+            max_consecutive_skips=int(os.getenv('AGENT_GATING_MAX_SKIPS', '2')),
+        )
+
+    def state(self) -> Dict:
+        return {'consecutive_skips': self._consecutive_skips, 'auxiliary_seconds': self._auxiliary_seconds}
+
+    def restore(self, state: Dict):
+        self._consecutive_skips = state['consecutive_skips']
+        self._auxiliary_seconds = state['auxiliary_seconds']
+
+    def skip_reason(self, user_message: str) -> Optional[str]:
+        """Why the auxiliary agents can sit this turn out, or None when they are needed."""
+        if not self.enabled or self._consecutive_skips >= self.max_consecutive_skips:
+            return None
+        if is_struggling(user_message) and len(user_message.split()) <= STRUGGLE_MAX_WORDS:
+            return 'struggle'
+        if is_short_answer(user_message):
+            return 'short_answer'
+        return None
+
+    def record(self, reason: Optional[str], auxiliary_seconds: float = None):
+        """Record a turn; ``auxiliary_seconds`` is the time the auxiliary agents took, when they ran."""
+        saved = 0.0
+        if reason:
+            self._consecutive_skips += 1
+            saved = self._auxiliary_seconds or 0.0
+        else:
+            self._consecutive_skips = 0
+            if auxiliary_seconds is not None:
+                self._auxiliary_seconds = (auxiliary_seconds if self._auxiliary_seconds is None
+                                           else 0.8 * self._auxiliary_seconds + 0.2 * auxiliary_seconds)
+        self.stats.record(reason, saved)
+        stats.record(reason, saved)